@@ -1,6 +1,9 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import forecast, warnings, seismic, marine, stations, agriculture
+from fastapi.responses import PlainTextResponse
+from app.middleware import HTTPCacheMiddleware, MetricsMiddleware, ProfilingMiddleware, TracedRoute, TracingMiddleware
+from app.services.metrics import REGISTRY
+from app.routers import forecast, warnings, seismic, marine, stations, agriculture, locations, admin
 import logging
 
 # Configurar logging
@@ -48,6 +51,9 @@ app = FastAPI(
     - Índice PDSI (seca)
     - Qualidade da água (moluscos bivalves)
     
+    ### 📍 Localidades
+    - Previsão, avisos, risco de incêndio, UV e estado do mar num só pedido
+    
     Todos os dados são obtidos diretamente da API oficial do IPMA com cache inteligente.
     """,
     version="2.0.0",
@@ -55,7 +61,22 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
-# Configurar CORS
+# Spans endpoint / response.encode também nas rotas definidas diretamente na aplicação (/dashboard, ...)
+app.router.route_class = TracedRoute
+
+# Perfilamento cProfile opcional (PROFILING_TOKEN / PROFILING_SAMPLE_RATE); desligado por omissão
+app.add_middleware(ProfilingMiddleware)
+
+# Latência por rota e pedidos em curso (pedidos que chegam aos endpoints; os 304 da cache HTTP não passam aqui)
+app.add_middleware(MetricsMiddleware)
+
+# Spans por pedido (TRACING_EXPORTER=log|file|otlp); sem exportador não regista nada
+app.add_middleware(TracingMiddleware)
+
+# ETag, Cache-Control e respostas 304 com base nas renovações das entradas de cache usadas
+app.add_middleware(HTTPCacheMiddleware)
+
+# Configurar CORS (o mais exterior, para que também os 304 da cache HTTP levem os cabeçalhos Access-Control-*)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -71,6 +92,8 @@ app.include_router(seismic.router)      # Dados sísmicos
 app.include_router(marine.router)       # Dados marítimos (mar, incêndio, UV)
 app.include_router(stations.router)     # Estações meteorológicas
 app.include_router(agriculture.router)  # Dados agrícolas e qualidade água
+app.include_router(locations.router)    # Dados agregados por localidade
+app.include_router(admin.router)        # Perfis de pedidos (requer PROFILING_TOKEN)
 
 
 @app.get("/")
@@ -84,16 +107,28 @@ async def root():
             "meteorology": {
                 "current_forecast": "/forecast/{distrito}/{localidade}",
                 "forecast_by_date": "/forecast/{distrito}/{localidade}/?day=YYYY-MM-DD",
+                "forecast_by_coordinates": "/forecast/by-coords?lat={lat}&lon={lon}",
+                "forecast_query": "/forecast/query?variable=&op=&value=&day=&days=&top=&group_by=district",
+                "district_summary": "/forecast/{distrito}/summary",
+                "all_district_summaries": "/forecast/summary",
                 "locations": "/forecast/{distrito}",
                 "districts": "/forecast/"
             },
             "warnings": {
                 "all_warnings": "/warnings/",
-                "by_level": "/warnings/by-level/{level}"
+                "by_level": "/warnings/by-level/{level}",
+                "active": "/warnings/active?at=&area=&level=",
+                "stream_sse": "/warnings/stream",
+                "stream_websocket": "/warnings/ws"
             },
             "seismic": {
                 "all_events": "/seismic/?region=continente|acores|madeira",
-                "by_magnitude": "/seismic/magnitude/{min_magnitude}"
+                "all_regions": "/seismic/all",
+                "history": "/seismic/history?region=&since=&until=&min_mag=",
+                "statistics": "/seismic/stats?region=continente|acores|madeira|all",
+                "by_magnitude": "/seismic/magnitude/{min_magnitude}",
+                "filtered": "/seismic/?min_mag=&since=&lat=&lon=&radius_km=&bbox=",
+                "export": "/seismic/export?region=continente|acores|madeira|all&format=arrow|parquet|csv"
             },
             "marine": {
                 "sea_state": "/marine/sea-state",
@@ -104,9 +139,12 @@ async def root():
             },
             "stations": {
                 "all_stations": "/stations/",
+                "nearest": "/stations/nearest?lat={lat}&lon={lon}&k={k}",
+                "within_bbox": "/stations/within?bbox={min_lon},{min_lat},{max_lon},{max_lat}",
                 "observations": "/stations/observations",
                 "specific_station": "/stations/observations?station_id={id}",
-                "latest": "/stations/observations/latest"
+                "latest": "/stations/observations/latest",
+                "export": "/stations/observations/export?format=arrow|parquet|csv"
             },
             "agriculture": {
                 "evapotranspiration": "/agriculture/evapotranspiration",
@@ -114,8 +152,15 @@ async def root():
                 "temperature_min": "/agriculture/temperature-min",
                 "temperature_max": "/agriculture/temperature-max",
                 "drought_index": "/agriculture/pdsi",
+                "combined": "/agriculture/combined",
+                "aggregates": "/agriculture/aggregate/{metric}?period=week|month|rolling",
+                "export": "/agriculture/export/{data_type}?format=arrow|parquet|csv",
                 "water_quality": "/agriculture/water-quality",
-                "water_by_status": "/agriculture/water-quality/status/{status}"
+                "water_by_status": "/agriculture/water-quality/status/{status}",
+                "water_at_point": "/agriculture/water-quality/at?lat=&lon="
+            },
+            "locations": {
+                "bundle": "/locations/{distrito}/{localidade}/bundle?day=YYYY-MM-DD"
             }
         },
         "examples": {
@@ -198,7 +243,8 @@ async def dashboard():
             "quick_links": {
                 "documentation": "/docs",
                 "all_endpoints": "/",
-                "health_check": "/health"
+                "health_check": "/health",
+                "metrics": "/metrics"
             }
         }
 
@@ -240,6 +286,18 @@ async def health_check():
         }
 
 
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Métricas no formato de texto do Prometheus
+
+    Latência e tamanho das respostas do IPMA por endpoint, tempo de parsing,
+    acertos/falhas/expirações/despejos das caches por conjunto de dados,
+    latência por rota e pedidos em curso.
+    """
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,6 @@
+# Middleware package
+
+from app.middleware.http_cache import HTTPCacheMiddleware
+from app.middleware.metrics import MetricsMiddleware
+from app.middleware.profiling import ProfilingMiddleware
+from app.middleware.tracing import TracedRoute, TracingMiddleware
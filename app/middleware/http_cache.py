@@ -0,0 +1,266 @@
+import gzip
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from email.utils import formatdate
+from typing import Dict, NamedTuple, Optional, Sequence, Tuple
+from starlette.datastructures import Headers, MutableHeaders
+from app.services.cache import DATASET_TTLS, CacheDependency, dependencies_current, track_dependencies
+
+try:
+    import brotli
+except ImportError:  # brotli é opcional; sem ele só se oferece gzip
+    brotli = None
+
+# Prefixo do caminho -> conjuntos de dados de que as respostas dependem (o mais específico primeiro)
+ROUTE_DATASETS: Sequence[Tuple[str, Tuple[str, ...]]] = (
+    ("/forecast", ("locations", "forecasts", "reference")),
+    ("/warnings", ("warnings",)),
+    ("/seismic", ("seismic",)),
+    ("/marine/sea-state", ("sea_state",)),
+    ("/marine/fire-risk", ("fire_risk",)),
+    ("/marine/uv-index", ("uv_index",)),
+    ("/stations/observations", ("observations",)),
+    ("/stations", ("stations",)),
+    ("/agriculture/water-quality", ("water_quality",)),
+    ("/agriculture", ("agriculture",)),
+    ("/locations", ("locations", "forecasts", "reference", "warnings", "fire_risk", "uv_index", "sea_state"))
+)
+
+
+# Respostas em streaming, que não são acumuladas para calcular o ETag
+STREAMING_MEDIA_TYPES = ("text/event-stream", "application/x-ndjson")
+
+# Corpos menores do que isto não compensam a compressão
+MIN_COMPRESS_SIZE = 1024
+
+# Formatos já comprimidos internamente (ex: exportação Parquet), enviados sem Content-Encoding
+PRECOMPRESSED_MEDIA_TYPES = ("application/vnd.apache.parquet",)
+
+# Codificações suportadas, por ordem de preferência do servidor
+COMPRESSORS = {
+    **({"br": lambda body: brotli.compress(body, quality=9)} if brotli is not None else {}),
+    "gzip": lambda body: gzip.compress(body, compresslevel=9, mtime=0)
+}
+
+
+class _Validator(NamedTuple):
+    """ETag calculado para um URL e as versões das entradas de cache lidas para o gerar"""
+    etag: str
+    dependencies: Tuple[Tuple[CacheDependency, int], ...]
+    expires_at: float
+    last_modified: str
+    compressible: bool
+
+
+def _base_etag(candidate: str) -> str:
+    """ETag sem o prefixo fraco W/ nem o sufixo da codificação (-gzip, -br)"""
+    if candidate.startswith("W/"):
+        candidate = candidate[2:]
+    for encoding in COMPRESSORS:
+        suffix = f'-{encoding}"'
+        if candidate.endswith(suffix):
+            return candidate[:-len(suffix)] + '"'
+    return candidate
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """Compara o cabeçalho If-None-Match com um ETag, em qualquer das suas codificações (aceita '*')"""
+    candidates = [candidate.strip() for candidate in if_none_match.split(',')]
+    if "*" in candidates:
+        return True
+    return _base_etag(etag) in (_base_etag(candidate) for candidate in candidates)
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """Escolhe a codificação preferida pelo servidor entre as aceites pelo cliente (q > 0)"""
+    if not accept_encoding:
+        return None
+
+    accepted = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.strip().partition(';')
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip().lower()] = quality
+
+    for encoding in COMPRESSORS:
+        if accepted.get(encoding, accepted.get("*", 0.0)) > 0:
+            return encoding
+    return None
+
+
+class HTTPCacheMiddleware:
+    """
+    Semântica de cache HTTP para os pedidos GET dos conjuntos de dados do IPMA
+
+    Cada resposta 200 recebe um ETag forte (hash do corpo), Cache-Control com o
+    TTL do conjunto e Last-Modified. O ETag de cada URL fica guardado com as
+    versões das entradas de cache que o endpoint leu (registadas depois de o
+    endpoint terminar); enquanto nenhuma for renovada e o TTL não expirar, um
+    If-None-Match igual é respondido com 304 sem executar o endpoint. A
+    renovação da previsão de uma localidade não invalida as restantes.
+    Respostas em streaming (SSE, NDJSON) passam sem alterações.
+
+    As variantes comprimidas (gzip e, se instalado, brotli) são geradas uma vez
+    por versão do corpo e guardadas por ETag até max_compressed_bytes; a
+    escolhida depende de Accept-Encoding.
+    """
+
+    def __init__(self, app, routes: Sequence[Tuple[str, Tuple[str, ...]]] = ROUTE_DATASETS, max_entries: int = 4096,
+                 max_compressed_bytes: int = 64 * 1024 * 1024):
+        self.app = app
+        self.routes = routes
+        self.max_entries = max_entries
+        self.max_compressed_bytes = max_compressed_bytes
+        self._validators: "OrderedDict[str, _Validator]" = OrderedDict()
+        self._compressed: "OrderedDict[Tuple[str, str], bytes]" = OrderedDict()
+        self._compressed_bytes = 0
+        self._lock = threading.Lock()
+
+    def _datasets_for(self, path: str) -> Optional[Tuple[str, ...]]:
+        for prefix, datasets in self.routes:
+            if path == prefix or path.startswith(prefix + "/"):
+                return datasets
+        return None
+
+    def _remember(self, key: str, validator: _Validator) -> None:
+        with self._lock:
+            self._validators[key] = validator
+            self._validators.move_to_end(key)
+            while len(self._validators) > self.max_entries:
+                self._validators.popitem(last=False)
+
+    def _compress(self, etag: str, body: bytes, encoding: str) -> bytes:
+        """Variante comprimida do corpo com este ETag, gerada apenas na primeira vez"""
+        key = (etag, encoding)
+        with self._lock:
+            encoded = self._compressed.get(key)
+            if encoded is not None:
+                self._compressed.move_to_end(key)
+                return encoded
+
+        encoded = COMPRESSORS[encoding](body)
+
+        with self._lock:
+            if key not in self._compressed:
+                self._compressed[key] = encoded
+                self._compressed_bytes += len(encoded)
+            while self._compressed_bytes > self.max_compressed_bytes and self._compressed:
+                _, evicted = self._compressed.popitem(last=False)
+                self._compressed_bytes -= len(evicted)
+
+        return encoded
+
+    @staticmethod
+    def _cache_headers(etag: str, max_age: int, last_modified: str, encoding: Optional[str] = None) -> Dict[str, str]:
+        return {
+            "etag": f'{etag[:-1]}-{encoding}"' if encoding else etag,
+            "cache-control": f"public, max-age={max_age}",
+            "last-modified": last_modified,
+            "vary": "Accept-Encoding, Accept"
+        }
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+
+        datasets = self._datasets_for(scope["path"])
+        if datasets is None:
+            await self.app(scope, receive, send)
+            return
+
+        key = f"{scope['path']}?{scope['query_string'].decode('latin-1')}"
+        max_age = min(DATASET_TTLS[name] for name in datasets)
+        request_headers = Headers(scope=scope)
+        if_none_match = request_headers.get("if-none-match")
+        accepted_encoding = negotiate_encoding(request_headers.get("accept-encoding"))
+        now = time.monotonic()
+
+        if "application/x-ndjson" in request_headers.get("accept", ""):
+            # Pedido de NDJSON pelo Accept: mesmo URL, outra representação (sem validadores guardados)
+            await self.app(scope, receive, send)
+            return
+
+        validator = self._validators.get(key)
+        if (if_none_match and validator is not None and validator.dependencies and validator.expires_at > now
+                and etag_matches(if_none_match, validator.etag) and dependencies_current(validator.dependencies)):
+            headers = self._cache_headers(
+                validator.etag, int(validator.expires_at - now), validator.last_modified,
+                accepted_encoding if validator.compressible else None
+            )
+            await send({
+                "type": "http.response.start",
+                "status": 304,
+                "headers": [(name.encode("latin-1"), value.encode("latin-1")) for name, value in headers.items()]
+            })
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        start_message = None
+        passthrough = False
+        chunks = []
+
+        async def send_with_validators(message):
+            nonlocal start_message, passthrough
+
+            if message["type"] == "http.response.start":
+                content_type = Headers(raw=message["headers"]).get("content-type", "")
+                if message["status"] != 200 or content_type.startswith(STREAMING_MEDIA_TYPES):
+                    passthrough = True
+                    await send(message)
+                else:
+                    start_message = message
+                return
+
+            if passthrough or message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+
+            body = b"".join(chunks)
+            etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+            previous = self._validators.get(key)
+            last_modified = (
+                previous.last_modified if previous is not None and previous.etag == etag
+                else formatdate(time.time(), usegmt=True)
+            )
+            headers = MutableHeaders(raw=list(start_message["headers"]))
+            compressible = (
+                "content-encoding" not in headers and len(body) >= MIN_COMPRESS_SIZE
+                and not headers.get("content-type", "").startswith(PRECOMPRESSED_MEDIA_TYPES)
+            )
+            encoding = accepted_encoding if compressible else None
+            # Com o corpo completo o endpoint já terminou: as entradas lidas (e renovadas) estão todas registadas
+            self._remember(key, _Validator(
+                etag, tuple(dependencies.items()), now + max_age, last_modified, compressible
+            ))
+
+            for name, value in self._cache_headers(etag, max_age, last_modified, encoding).items():
+                headers[name] = value
+
+            if if_none_match and etag_matches(if_none_match, etag):
+                del headers["content-length"]
+                await send({**start_message, "status": 304, "headers": headers.raw})
+                await send({"type": "http.response.body", "body": b""})
+                return
+
+            if encoding:
+                body = self._compress(etag, body, encoding)
+                headers["content-encoding"] = encoding
+                headers["content-length"] = str(len(body))
+
+            await send({**start_message, "headers": headers.raw})
+            await send({"type": "http.response.body", "body": body})
+
+        with track_dependencies() as dependencies:
+            await self.app(scope, receive, send_with_validators)
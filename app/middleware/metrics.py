@@ -0,0 +1,62 @@
+import time
+from typing import Any, Dict, Sequence
+from app.services.metrics import HTTP_REQUEST_DURATION, HTTP_REQUESTS_IN_FLIGHT
+
+# Primeiro segmento do caminho -> grupo do indicador de pedidos em curso
+ROUTE_GROUPS: Sequence[str] = ("forecast", "warnings", "seismic", "marine", "stations", "agriculture", "locations")
+
+
+def route_template(path: str, path_params: Dict[str, Any]) -> str:
+    """Caminho com os parâmetros substituídos pelos seus nomes (ex: /forecast/{distrito}/{localidade})"""
+    remaining = {name: str(value) for name, value in path_params.items()}
+    segments = []
+    for segment in path.split("/"):
+        name = next((name for name, value in remaining.items() if value == segment), None)
+        if name is not None:
+            del remaining[name]
+            segments.append(f"{{{name}}}")
+        else:
+            segments.append(segment)
+    return "/".join(segments)
+
+
+class MetricsMiddleware:
+    """
+    Latência por rota e pedidos em curso por grupo, para o endpoint /metrics
+
+    A rota é identificada pelo modelo do caminho (parâmetros pelo nome), para
+    que /forecast/lisboa/lisboa e /forecast/porto/porto partilhem a série.
+    Pedidos que não correspondem a nenhuma rota ficam em route="unmatched".
+    """
+
+    def __init__(self, app, groups: Sequence[str] = ROUTE_GROUPS):
+        self.app = app
+        self.groups = frozenset(groups)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        first_segment = scope["path"].strip("/").split("/", 1)[0]
+        group = first_segment if first_segment in self.groups else "other"
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        start = time.perf_counter()
+        with HTTP_REQUESTS_IN_FLIGHT.track_inprogress(group=group):
+            try:
+                await self.app(scope, receive, send_with_status)
+            finally:
+                route = (
+                    route_template(scope["path"], scope.get("path_params", {}))
+                    if "endpoint" in scope else "unmatched"
+                )
+                HTTP_REQUEST_DURATION.observe(
+                    time.perf_counter() - start, method=scope["method"], route=route, status=str(status)
+                )
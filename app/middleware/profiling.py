@@ -0,0 +1,80 @@
+import hmac
+import random
+from typing import Optional, Sequence
+from starlette.datastructures import Headers, MutableHeaders
+from app.services import profiling
+from app.services.profiling import ProfileStore, RequestProfiler, StoredProfile
+
+
+class ProfilingMiddleware:
+    """
+    Perfilamento cProfile opcional de pedidos individuais
+
+    Um pedido é perfilado quando traz o token de administração (cabeçalho
+    X-Profile; nunca na query, que ficaria nos logs de acesso) ou, por amostragem, numa fração sample_rate do
+    tráfego. O perfil fica guardado (ver /admin/profiles); nos pedidos com
+    token a resposta leva ainda X-Profile-Id e Server-Timing com o tempo por
+    etapa (upstream, json_decode, model_build, serialization, other).
+
+    O perfil termina quando a resposta começa a ser enviada, pelo que o corpo
+    de respostas em streaming não é incluído. Apenas um pedido é perfilado de
+    cada vez; os restantes seguem sem perfil enquanto esse decorre.
+    """
+
+    def __init__(self, app, token: Optional[str] = None, sample_rate: Optional[float] = None,
+                 store: Optional[ProfileStore] = None, excluded: Sequence[str] = ("/admin",)):
+        self.app = app
+        self.token = token if token is not None else profiling.PROFILING_TOKEN
+        self.sample_rate = sample_rate if sample_rate is not None else profiling.PROFILING_SAMPLE_RATE
+        self.store = store if store is not None else profiling.PROFILE_STORE
+        self.excluded = tuple(excluded)
+
+    def _requested(self, scope) -> bool:
+        if not self.token:
+            return False
+
+        supplied = Headers(scope=scope).get("x-profile")
+        return supplied is not None and hmac.compare_digest(supplied, self.token)
+
+    @staticmethod
+    def _server_timing(profile: StoredProfile) -> str:
+        stages = [f"{stage};dur={milliseconds}" for stage, milliseconds in profile.breakdown.items()]
+        return ", ".join(stages + [f"total;dur={profile.duration_ms}"])
+
+    async def __call__(self, scope, receive, send):
+        if (scope["type"] != "http" or (not self.token and self.sample_rate <= 0)
+                or scope["path"].startswith(self.excluded)):
+            await self.app(scope, receive, send)
+            return
+
+        requested = self._requested(scope)
+        sampled = not requested and self.sample_rate > 0 and random.random() < self.sample_rate
+        if not (requested or sampled) or not RequestProfiler.acquire():
+            await self.app(scope, receive, send)
+            return
+
+        profiler = RequestProfiler()
+        profile: Optional[StoredProfile] = None
+
+        def finish(status: int) -> StoredProfile:
+            result = profiler.stop(scope["method"], scope["path"], status, sampled)
+            self.store.add(result)
+            return result
+
+        async def send_with_profile(message):
+            nonlocal profile
+            if message["type"] == "http.response.start" and profile is None:
+                profile = finish(message["status"])
+                if requested:
+                    headers = MutableHeaders(raw=list(message["headers"]))
+                    headers["x-profile-id"] = profile.id
+                    headers["server-timing"] = self._server_timing(profile)
+                    message = {**message, "headers": headers.raw}
+            await send(message)
+
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_with_profile)
+        finally:
+            if profile is None:
+                profile = finish(500)
@@ -0,0 +1,75 @@
+import asyncio
+import time
+from functools import wraps
+from typing import Callable
+from fastapi.routing import APIRoute
+from app.middleware.metrics import route_template
+from app.services.tracing import SPAN_KIND_SERVER, record_span, span, tracing_enabled
+
+
+class TracingMiddleware:
+    """
+    Span raiz de cada pedido HTTP (http.request), pai dos spans do endpoint,
+    da cache, dos pedidos ao IPMA e da codificação da resposta
+
+    A resposta leva o cabeçalho X-Trace-Id para cruzar o pedido com o exportador.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracing_enabled():
+            await self.app(scope, receive, send)
+            return
+
+        attributes = {"http.method": scope["method"], "http.path": scope["path"]}
+        with span("http.request", kind=SPAN_KIND_SERVER, **attributes) as root:
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    root.set_attribute("http.status_code", message["status"])
+                    headers = list(message.get("headers", [])) + [(b"x-trace-id", root.trace_id.encode())]
+                    message = {**message, "headers": headers}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_trace)
+            finally:
+                if "endpoint" in scope:
+                    root.set_attribute("http.route", route_template(scope["path"], scope.get("path_params", {})))
+
+
+class TracedRoute(APIRoute):
+    """
+    APIRoute que separa o tempo do endpoint (span endpoint) do tempo de
+    validação e codificação da resposta (span response.encode)
+    """
+
+    def get_route_handler(self) -> Callable:
+        endpoint_call = self.dependant.call
+        route_path = self.path
+
+        if asyncio.iscoroutinefunction(endpoint_call):
+            @wraps(endpoint_call)
+            async def traced_endpoint(*args, **kwargs):
+                with span("endpoint", **{"http.route": route_path, "code.function": endpoint_call.__name__}):
+                    return await endpoint_call(*args, **kwargs)
+
+            self.dependant.call = traced_endpoint
+
+        handler = super().get_route_handler()
+
+        async def traced_handler(request):
+            if not tracing_enabled():
+                return await handler(request)
+
+            with span("http.route", **{"http.route": route_path}) as route_span:
+                response = await handler(request)
+                # Do fim do endpoint até à resposta construída: validação do response_model e JSON
+                if route_span.last_child_end_ns is not None:
+                    body = getattr(response, "body", None) or b""
+                    record_span("response.encode", route_span.last_child_end_ns, time.time_ns(),
+                                **{"http.route": route_path, "response.bytes": len(body)})
+            return response
+
+        return traced_handler
@@ -34,6 +34,9 @@ class Location(BaseModel):
     id: int
     name: str
     district: str
+    latitude: Optional[float] = None
+    longitude: Optional[float] = None
+    warning_area: Optional[str] = None  # idAreaAviso (ex: LSB)
 
 
 # Novos modelos para recursos expandidos
@@ -59,6 +62,39 @@ class SeismicData(BaseModel):
     time: str
     coordinates: Dict[str, float]
     intensity: Optional[str] = None
+    region: Optional[str] = None  # continente, acores, madeira
+
+
+class MagnitudeFrequencyBin(BaseModel):
+    """Classe de magnitude da distribuição de Gutenberg-Richter"""
+    magnitude: float
+    count: int
+    cumulative: int  # eventos com magnitude >= magnitude
+
+
+class DailyEventCount(BaseModel):
+    """Número de eventos sísmicos num dia"""
+    date: str
+    count: int
+
+
+class DepthBin(BaseModel):
+    """Classe do histograma de profundidades (km)"""
+    min_depth: float
+    max_depth: float
+    count: int
+
+
+class SeismicStats(BaseModel):
+    """Modelo para estatísticas de um catálogo sísmico"""
+    region: str
+    total_events: int
+    max_magnitude: Optional[float] = None
+    completeness_magnitude: Optional[float] = None  # Mc pelo método da curvatura máxima
+    b_value: Optional[float] = None  # estimativa de máxima verosimilhança (Aki-Utsu)
+    magnitude_frequency: List[MagnitudeFrequencyBin]
+    daily_counts: List[DailyEventCount]
+    depth_histogram: List[DepthBin]
 
 
 class SeaState(BaseModel):
@@ -100,6 +136,12 @@ class WeatherStation(BaseModel):
     altitude: Optional[float] = None
 
 
+class NearbyStation(BaseModel):
+    """Modelo para estação com distância a um ponto de referência"""
+    station: WeatherStation
+    distance_km: float
+
+
 class StationObservation(BaseModel):
     """Modelo para observação de estação"""
     station_id: str
@@ -125,6 +167,18 @@ class AgriculturalData(BaseModel):
     pdsi_index: Optional[float] = None  # Palmer Drought Severity Index
 
 
+class AgriculturalAggregate(BaseModel):
+    """Modelo para agregados de séries agrícolas (semana, mês ou janela móvel)"""
+    municipality: str
+    metric: str
+    period_start: str
+    period_end: str
+    count: int
+    total: float
+    mean: float
+    trend: Optional[float] = None  # variação da média face à janela anterior
+
+
 class WaterQuality(BaseModel):
     """Modelo para qualidade da água (moluscos bivalves)"""
     zone_id: str
@@ -132,9 +186,21 @@ class WaterQuality(BaseModel):
     status: str  # aberta, fechada, condicional
     restriction_type: Optional[str] = None
     coordinates: Dict[str, float]
+    geometry: Optional[Dict[str, Any]] = None  # Geometria GeoJSON completa da zona
     last_update: str
 
 
+class DatasetChanges(BaseModel):
+    """Diferenças de um conjunto de dados desde uma versão conhecida pelo cliente"""
+    dataset: str
+    version: int
+    since_version: int
+    full_snapshot: bool = False  # True quando a versão pedida já não está no registo de diferenças
+    inserted: List[Any] = []
+    updated: List[Any] = []
+    removed: List[Any] = []
+
+
 # Modelos de resposta expandidos
 
 class WeatherWarningsResponse(BaseModel):
@@ -142,6 +208,14 @@ class WeatherWarningsResponse(BaseModel):
     success: bool
     data: Optional[List[WeatherWarning]] = None
     message: Optional[str] = None
+    version: Optional[int] = None
+
+
+class DatasetChangesResponse(BaseModel):
+    """Resposta da API de diferenças entre versões"""
+    success: bool
+    data: Optional[DatasetChanges] = None
+    message: Optional[str] = None
 
 
 class SeismicResponse(BaseModel):
@@ -149,6 +223,14 @@ class SeismicResponse(BaseModel):
     success: bool
     data: Optional[List[SeismicData]] = None
     message: Optional[str] = None
+    next_cursor: Optional[str] = None
+
+
+class SeismicStatsResponse(BaseModel):
+    """Resposta da API de estatísticas sísmicas"""
+    success: bool
+    data: Optional[SeismicStats] = None
+    message: Optional[str] = None
 
 
 class SeaStateResponse(BaseModel):
@@ -163,6 +245,8 @@ class FireRiskResponse(BaseModel):
     success: bool
     data: Optional[List[FireRisk]] = None
     message: Optional[str] = None
+    version: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class UVIndexResponse(BaseModel):
@@ -170,6 +254,7 @@ class UVIndexResponse(BaseModel):
     success: bool
     data: Optional[List[UVIndex]] = None
     message: Optional[str] = None
+    version: Optional[int] = None
 
 
 class StationsResponse(BaseModel):
@@ -179,11 +264,20 @@ class StationsResponse(BaseModel):
     message: Optional[str] = None
 
 
+class NearbyStationsResponse(BaseModel):
+    """Resposta da API de estações mais próximas"""
+    success: bool
+    data: Optional[List[NearbyStation]] = None
+    message: Optional[str] = None
+
+
 class ObservationsResponse(BaseModel):
     """Resposta da API de observações"""
     success: bool
     data: Optional[List[StationObservation]] = None
     message: Optional[str] = None
+    version: Optional[int] = None
+    next_cursor: Optional[str] = None
 
 
 class AgriculturalResponse(BaseModel):
@@ -191,6 +285,87 @@ class AgriculturalResponse(BaseModel):
     success: bool
     data: Optional[List[AgriculturalData]] = None
     message: Optional[str] = None
+    next_cursor: Optional[str] = None
+
+
+class AgriculturalAggregateResponse(BaseModel):
+    """Resposta da API de agregados agrícolas"""
+    success: bool
+    data: Optional[List[AgriculturalAggregate]] = None
+    message: Optional[str] = None
+
+
+class ForecastCell(BaseModel):
+    """Valor de uma variável de previsão numa localidade e data"""
+    location_id: int
+    location: str
+    district: str
+    date: str
+    value: float
+
+
+class ForecastDistrictGroup(BaseModel):
+    """Estatísticas de uma variável de previsão num distrito"""
+    district: str
+    count: int
+    min: float
+    max: float
+    mean: float
+
+
+class ForecastQueryResult(BaseModel):
+    """Resultado de uma consulta sobre as previsões de todas as localidades"""
+    variable: str
+    dates: List[str]
+    matches: Optional[List[ForecastCell]] = None
+    groups: Optional[List[ForecastDistrictGroup]] = None
+
+
+class ForecastQueryResponse(BaseModel):
+    """Resposta da API de consulta de previsões"""
+    success: bool
+    data: Optional[ForecastQueryResult] = None
+    message: Optional[str] = None
+
+
+class DistrictDailySummary(BaseModel):
+    """Resumo diário da previsão das localidades de um distrito"""
+    date: str
+    locations: int  # localidades com previsão nesse dia
+    min_temperature: Optional[float] = None
+    max_temperature: Optional[float] = None
+    dominant_weather: Optional[WeatherCondition] = None
+    max_precipitation_probability: Optional[float] = None
+
+
+class DistrictForecastSummary(BaseModel):
+    """Resumo da previsão de um distrito por dia"""
+    district: str
+    days: List[DistrictDailySummary]
+
+
+class DistrictSummaryResponse(BaseModel):
+    """Resposta da API de resumos de previsão por distrito"""
+    success: bool
+    data: Optional[List[DistrictForecastSummary]] = None
+    message: Optional[str] = None
+
+
+class LocationBundle(BaseModel):
+    """Dados de uma localidade reunidos num só pedido"""
+    location: Location
+    forecast: Optional[DailyForecast] = None
+    warnings: List[WeatherWarning] = []
+    fire_risk: List[FireRisk] = []
+    uv_index: List[UVIndex] = []
+    sea_state: List[SeaState] = []
+
+
+class LocationBundleResponse(BaseModel):
+    """Resposta da API de dados agregados por localidade"""
+    success: bool
+    data: Optional[LocationBundle] = None
+    message: Optional[str] = None
 
 
 class WaterQualityResponse(BaseModel):
@@ -198,6 +373,38 @@ class WaterQualityResponse(BaseModel):
     success: bool
     data: Optional[List[WaterQuality]] = None
     message: Optional[str] = None
+    next_cursor: Optional[str] = None
+
+
+class ProfileSummary(BaseModel):
+    """Perfil cProfile de um pedido: tempos por etapa em milissegundos"""
+    id: str
+    method: str
+    path: str
+    status: int
+    started_at: str
+    duration_ms: float
+    breakdown: Dict[str, float]  # upstream, json_decode, model_build, serialization, other
+    sampled: bool
+
+
+class ProfileDetail(ProfileSummary):
+    """Perfil com o relatório pstats das funções de maior tempo"""
+    report: str
+
+
+class ProfileListResponse(BaseModel):
+    """Resposta da API de perfis guardados"""
+    success: bool
+    data: Optional[List[ProfileSummary]] = None
+    message: Optional[str] = None
+
+
+class ProfileDetailResponse(BaseModel):
+    """Resposta da API de detalhe de um perfil"""
+    success: bool
+    data: Optional[ProfileDetail] = None
+    message: Optional[str] = None
 
 
 # Respostas originais
@@ -0,0 +1,125 @@
+import hmac
+from datetime import datetime, timezone
+from typing import Optional
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import Response
+from app.services import profiling
+from app.services.profiling import StoredProfile, stats_report
+from app.models import ProfileSummary, ProfileDetail, ProfileListResponse, ProfileDetailResponse
+import logging
+
+logger = logging.getLogger(__name__)
+
+
+def require_profiling_token(
+    x_profile: Optional[str] = Header(None, description="Token de administração (PROFILING_TOKEN)")
+) -> None:
+    """Restringe as rotas de administração a quem tem o token; sem token configurado não existem"""
+    if not profiling.PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Perfilamento desativado (defina PROFILING_TOKEN)")
+
+    if x_profile is None or not hmac.compare_digest(x_profile, profiling.PROFILING_TOKEN):
+        raise HTTPException(status_code=403, detail="Token de administração inválido")
+
+
+router = APIRouter(prefix="/admin", tags=["admin"], dependencies=[Depends(require_profiling_token)])
+
+
+def _summary(profile: StoredProfile) -> dict:
+    return {
+        "id": profile.id,
+        "method": profile.method,
+        "path": profile.path,
+        "status": profile.status,
+        "started_at": datetime.fromtimestamp(profile.started_at, timezone.utc).isoformat(),
+        "duration_ms": profile.duration_ms,
+        "breakdown": profile.breakdown,
+        "sampled": profile.sampled
+    }
+
+
+def _get_profile(profile_id: str) -> StoredProfile:
+    profile = profiling.PROFILE_STORE.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Perfil '{profile_id}' não encontrado")
+    return profile
+
+
+@router.get("/profiles", response_model=ProfileListResponse)
+async def list_profiles(path: Optional[str] = Query(None, description="Apenas perfis de caminhos com este prefixo")):
+    """
+    Lista os perfis guardados, do mais recente para o mais antigo
+
+    Args:
+        path: Prefixo do caminho (opcional, ex: /stations)
+
+    Returns:
+        Duração total e tempo por etapa de cada pedido perfilado
+    """
+    try:
+        profiles = [
+            ProfileSummary(**_summary(profile)) for profile in profiling.PROFILE_STORE.list()
+            if path is None or profile.path.startswith(path)
+        ]
+
+        return ProfileListResponse(
+            success=True,
+            data=profiles,
+            message=f"Perfis guardados: {len(profiles)}"
+        )
+
+    except Exception as e:
+        logger.error(f"Erro ao listar perfis: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/profiles/{profile_id}", response_model=ProfileDetailResponse)
+async def get_profile(
+    profile_id: str,
+    sort: str = Query("cumulative", pattern="^(cumulative|tottime|ncalls)$", description="Ordenação do relatório"),
+    limit: int = Query(40, ge=1, le=500, description="Número de funções no relatório")
+):
+    """
+    Obtém um perfil com o relatório pstats das funções de maior tempo
+
+    Args:
+        profile_id: ID do perfil (cabeçalho X-Profile-Id da resposta perfilada)
+        sort: cumulative, tottime ou ncalls
+        limit: Número de funções listadas
+
+    Returns:
+        Tempo por etapa e relatório de texto do pstats
+    """
+    try:
+        profile = _get_profile(profile_id)
+
+        return ProfileDetailResponse(
+            success=True,
+            data=ProfileDetail(**_summary(profile), report=stats_report(profile, limit, sort)),
+            message=f"{profile.method} {profile.path}: {profile.duration_ms} ms"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter perfil {profile_id}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/profiles/{profile_id}/pstats")
+async def download_profile(profile_id: str):
+    """
+    Descarrega as estatísticas em bruto, para abrir com pstats, snakeviz ou gprof2dot
+
+    Args:
+        profile_id: ID do perfil
+
+    Returns:
+        Ficheiro .prof (marshal das estatísticas do cProfile)
+    """
+    profile = _get_profile(profile_id)
+    return Response(
+        content=profile.stats,
+        media_type="application/octet-stream",
+        headers={"Content-Disposition": f'attachment; filename="{profile.id}.prof"'}
+    )
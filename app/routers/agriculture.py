@@ -1,22 +1,29 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import Optional
 from app.services.ipma_service import IPMAService
-from app.models import AgriculturalResponse, WaterQualityResponse
+from app.middleware import TracedRoute
+from app.routers.pagination import PageParams, paginated_response
+from app.routers.export import export_format, export_response
+from app.models import AgriculturalResponse, AgriculturalAggregateResponse, WaterQualityResponse
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/agriculture", tags=["agriculture"])
+router = APIRouter(prefix="/agriculture", tags=["agriculture"], route_class=TracedRoute)
 ipma_service = IPMAService()
 
 
 @router.get("/evapotranspiration", response_model=AgriculturalResponse)
-async def get_evapotranspiration(municipality: Optional[str] = Query(None, description="Município específico")):
+async def get_evapotranspiration(
+    municipality: Optional[str] = Query(None, description="Município específico"),
+    page: PageParams = Depends()
+):
     """
     Obtém dados de evapotranspiração de referência diária por concelho
 
     Args:
         municipality: Nome do município (opcional)
+        page: limit/cursor/fields para paginação e projeção (opcional)
 
     Returns:
         Dados de evapotranspiração em formato CSV processado
@@ -26,30 +33,34 @@ async def get_evapotranspiration(municipality: Optional[str] = Query(None, descr
 
         if not data:
             message = f"Nenhum dado de evapotranspiração encontrado para {municipality}" if municipality else "Dados de evapotranspiração indisponíveis"
-            return AgriculturalResponse(
-                success=True,
-                data=[],
+            return paginated_response(
+                AgriculturalResponse, [], page,
                 message=message
             )
 
-        return AgriculturalResponse(
-            success=True,
-            data=data,
+        return paginated_response(
+            AgriculturalResponse, data, page,
             message=f"Dados de evapotranspiração: {len(data)} registos"
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao obter dados de evapotranspiração: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
 @router.get("/precipitation", response_model=AgriculturalResponse)
-async def get_precipitation_data(municipality: Optional[str] = Query(None, description="Município específico")):
+async def get_precipitation_data(
+    municipality: Optional[str] = Query(None, description="Município específico"),
+    page: PageParams = Depends()
+):
     """
     Obtém dados de precipitação total diária por concelho
 
     Args:
         municipality: Nome do município (opcional)
+        page: limit/cursor/fields para paginação e projeção (opcional)
 
     Returns:
         Dados de precipitação em formato CSV processado
@@ -59,30 +70,34 @@ async def get_precipitation_data(municipality: Optional[str] = Query(None, descr
 
         if not data:
             message = f"Nenhum dado de precipitação encontrado para {municipality}" if municipality else "Dados de precipitação indisponíveis"
-            return AgriculturalResponse(
-                success=True,
-                data=[],
+            return paginated_response(
+                AgriculturalResponse, [], page,
                 message=message
             )
 
-        return AgriculturalResponse(
-            success=True,
-            data=data,
+        return paginated_response(
+            AgriculturalResponse, data, page,
             message=f"Dados de precipitação: {len(data)} registos"
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao obter dados de precipitação: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
 @router.get("/temperature-min", response_model=AgriculturalResponse)
-async def get_min_temperature(municipality: Optional[str] = Query(None, description="Município específico")):
+async def get_min_temperature(
+    municipality: Optional[str] = Query(None, description="Município específico"),
+    page: PageParams = Depends()
+):
     """
     Obtém dados de temperatura mínima diária por concelho
 
     Args:
         municipality: Nome do município (opcional)
+        page: limit/cursor/fields para paginação e projeção (opcional)
 
     Returns:
         Dados de temperatura mínima em formato CSV processado
@@ -92,30 +107,34 @@ async def get_min_temperature(municipality: Optional[str] = Query(None, descript
 
         if not data:
             message = f"Nenhum dado de temperatura mínima encontrado para {municipality}" if municipality else "Dados de temperatura mínima indisponíveis"
-            return AgriculturalResponse(
-                success=True,
-                data=[],
+            return paginated_response(
+                AgriculturalResponse, [], page,
                 message=message
             )
 
-        return AgriculturalResponse(
-            success=True,
-            data=data,
+        return paginated_response(
+            AgriculturalResponse, data, page,
             message=f"Dados de temperatura mínima: {len(data)} registos"
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao obter dados de temperatura mínima: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
 @router.get("/temperature-max", response_model=AgriculturalResponse)
-async def get_max_temperature(municipality: Optional[str] = Query(None, description="Município específico")):
+async def get_max_temperature(
+    municipality: Optional[str] = Query(None, description="Município específico"),
+    page: PageParams = Depends()
+):
     """
     Obtém dados de temperatura máxima diária por concelho
 
     Args:
         municipality: Nome do município (opcional)
+        page: limit/cursor/fields para paginação e projeção (opcional)
 
     Returns:
         Dados de temperatura máxima em formato CSV processado
@@ -125,30 +144,34 @@ async def get_max_temperature(municipality: Optional[str] = Query(None, descript
 
         if not data:
             message = f"Nenhum dado de temperatura máxima encontrado para {municipality}" if municipality else "Dados de temperatura máxima indisponíveis"
-            return AgriculturalResponse(
-                success=True,
-                data=[],
+            return paginated_response(
+                AgriculturalResponse, [], page,
                 message=message
             )
 
-        return AgriculturalResponse(
-            success=True,
-            data=data,
+        return paginated_response(
+            AgriculturalResponse, data, page,
             message=f"Dados de temperatura máxima: {len(data)} registos"
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao obter dados de temperatura máxima: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
 @router.get("/pdsi", response_model=AgriculturalResponse)
-async def get_pdsi_index(municipality: Optional[str] = Query(None, description="Município específico")):
+async def get_pdsi_index(
+    municipality: Optional[str] = Query(None, description="Município específico"),
+    page: PageParams = Depends()
+):
     """
     Obtém índice PDSI (Palmer Drought Severity Index) mensal por concelho
 
     Args:
         municipality: Nome do município (opcional)
+        page: limit/cursor/fields para paginação e projeção (opcional)
 
     Returns:
         Dados do índice PDSI que indica severidade da seca
@@ -158,28 +181,152 @@ async def get_pdsi_index(municipality: Optional[str] = Query(None, description="
 
         if not data:
             message = f"Nenhum dado PDSI encontrado para {municipality}" if municipality else "Dados PDSI indisponíveis"
-            return AgriculturalResponse(
-                success=True,
-                data=[],
+            return paginated_response(
+                AgriculturalResponse, [], page,
                 message=message
             )
 
-        return AgriculturalResponse(
-            success=True,
-            data=data,
+        return paginated_response(
+            AgriculturalResponse, data, page,
             message=f"Dados PDSI (índice de seca): {len(data)} registos"
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao obter dados PDSI: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
+@router.get("/combined", response_model=AgriculturalResponse)
+async def get_combined_agricultural_data(
+    municipality: Optional[str] = Query(None, description="Município específico"),
+    page: PageParams = Depends()
+):
+    """
+    Obtém todas as variáveis agrícolas unidas por data e concelho
+
+    Os cinco conjuntos (evapotranspiração, precipitação, temperaturas e PDSI)
+    são obtidos em paralelo e combinados numa linha por (data, concelho).
+
+    Args:
+        municipality: Nome do município (opcional)
+        page: limit/cursor/fields para paginação e projeção (opcional)
+
+    Returns:
+        Dados agrícolas com todas as variáveis preenchidas
+    """
+    try:
+        data = ipma_service.get_combined_agricultural_data(municipality)
+
+        if not data:
+            message = f"Nenhum dado agrícola encontrado para {municipality}" if municipality else "Dados agrícolas indisponíveis"
+            return paginated_response(
+                AgriculturalResponse, [], page,
+                message=message
+            )
+
+        return paginated_response(
+            AgriculturalResponse, data, page,
+            message=f"Dados agrícolas combinados: {len(data)} registos"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter dados agrícolas combinados: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/export/{data_type}")
+async def export_agricultural_data(data_type: str, fmt: str = Depends(export_format)):
+    """
+    Exporta um conjunto agrícola completo em colunas (Arrow IPC, Parquet ou CSV)
+
+    O ficheiro é gerado uma vez por renovação dos dados em cache e servido
+    tal como está, para carregamento direto em ferramentas de análise.
+
+    Args:
+        data_type: evapotranspiration, precipitation, temperature-min, temperature-max, pdsi ou combined
+        fmt: Formato (?format=arrow|parquet|csv; por omissão Arrow, ou CSV sem pyarrow)
+
+    Returns:
+        Ficheiro com uma linha por (data, concelho)
+    """
+    try:
+        content = ipma_service.export_agricultural_data(data_type.replace("-", "_"), fmt)
+
+        if content is None:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Conjunto agrícola '{data_type}' não encontrado"
+            )
+
+        return export_response(content, fmt, f"agriculture-{data_type}")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao exportar dados agrícolas {data_type}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/aggregate/{metric}", response_model=AgriculturalAggregateResponse)
+async def get_agricultural_aggregates(
+    metric: str,
+    period: str = Query("week", description="Período: week, month, rolling"),
+    window: int = Query(7, ge=1, le=366, description="Número de registos da janela móvel (period=rolling)"),
+    municipality: Optional[str] = Query(None, description="Município específico")
+):
+    """
+    Obtém agregados de uma série agrícola por concelho
+
+    Precipitação, evapotranspiração e graus-dia (gdd, base 10°C) são somados;
+    temperaturas e PDSI devem ser lidos pela média. Em janelas móveis, o campo
+    trend indica a variação da média face à janela anterior.
+
+    Args:
+        metric: evapotranspiration, precipitation, temperature_min, temperature_max, pdsi, gdd
+        period: Agregação semanal, mensal ou móvel
+        window: Tamanho da janela móvel
+        municipality: Nome do município (opcional)
+
+    Returns:
+        Somas, médias e tendências por período e concelho
+    """
+    try:
+        if metric not in ipma_service.AGRICULTURAL_AGGREGATES:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Métrica deve ser: {', '.join(ipma_service.AGRICULTURAL_AGGREGATES)}"
+            )
+
+        if period not in ipma_service.AGGREGATION_PERIODS:
+            raise HTTPException(status_code=400, detail="Período deve ser: week, month, rolling")
+
+        data = ipma_service.get_agricultural_aggregates(metric, period, window, municipality)
+
+        return AgriculturalAggregateResponse(
+            success=True,
+            data=data,
+            message=f"Agregados de {metric} ({period}): {len(data)} registos"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao agregar dados agrícolas de {metric}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
 @router.get("/water-quality", response_model=WaterQualityResponse)
-async def get_water_quality():
+async def get_water_quality(page: PageParams = Depends()):
     """
     Obtém interdições à apanha nas zonas de produção de moluscos bivalves
 
+    Args:
+        page: limit/cursor/fields para paginação e projeção (opcional)
+
     Returns:
         Estado das zonas de produção de moluscos (abertas/fechadas)
     """
@@ -187,18 +334,18 @@ async def get_water_quality():
         water_data = ipma_service.get_water_quality()
 
         if not water_data:
-            return WaterQualityResponse(
-                success=True,
-                data=[],
+            return paginated_response(
+                WaterQualityResponse, [], page,
                 message="Dados de qualidade da água indisponíveis"
             )
 
-        return WaterQualityResponse(
-            success=True,
-            data=water_data,
+        return paginated_response(
+            WaterQualityResponse, water_data, page,
             message=f"Zonas de moluscos bivalves: {len(water_data)} registos"
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao obter qualidade da água: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
@@ -216,8 +363,7 @@ async def get_water_quality_by_status(status: str):
         Zonas filtradas pelo estado especificado
     """
     try:
-        all_zones = ipma_service.get_water_quality()
-        filtered_zones = [zone for zone in all_zones if zone.status.lower() == status.lower()]
+        filtered_zones = ipma_service.get_water_quality_by_status(status)
 
         return WaterQualityResponse(
             success=True,
@@ -228,3 +374,40 @@ async def get_water_quality_by_status(status: str):
     except Exception as e:
         logger.error(f"Erro ao filtrar qualidade da água por estado: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/water-quality/at", response_model=WaterQualityResponse)
+async def get_water_quality_at(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude do ponto"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude do ponto")
+):
+    """
+    Indica em que zona(s) de produção de moluscos bivalves se encontra um ponto
+
+    Args:
+        lat: Latitude
+        lon: Longitude
+
+    Returns:
+        Zonas cujo polígono contém o ponto, com o respetivo estado (aberta/fechada)
+    """
+    try:
+        zones = ipma_service.find_water_quality_zones(lat, lon)
+
+        if not zones:
+            return WaterQualityResponse(
+                success=True,
+                data=[],
+                message=f"O ponto ({lat}, {lon}) não pertence a nenhuma zona de produção de moluscos bivalves"
+            )
+
+        statuses = ", ".join(f"{zone.zone_name}: {zone.status}" for zone in zones)
+        return WaterQualityResponse(
+            success=True,
+            data=zones,
+            message=f"Zonas que contêm o ponto ({lat}, {lon}): {statuses}"
+        )
+
+    except Exception as e:
+        logger.error(f"Erro ao localizar zona de moluscos bivalves: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
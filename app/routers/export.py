@@ -0,0 +1,29 @@
+from typing import Optional
+from fastapi import HTTPException, Query
+from fastapi.responses import Response
+from app.services.export import EXPORT_FORMATS, resolve_format
+
+
+def export_format(
+    format: Optional[str] = Query(
+        None, description="arrow (Arrow IPC), parquet ou csv; por omissão Arrow se o pyarrow estiver instalado, senão CSV"
+    )
+) -> str:
+    """Dependência que valida o formato de exportação pedido"""
+    if format is not None and format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format deve ser um de: {', '.join(EXPORT_FORMATS)}")
+
+    try:
+        return resolve_format(format)
+    except ValueError as e:
+        raise HTTPException(status_code=406, detail=str(e))
+
+
+def export_response(content: bytes, fmt: str, filename: str) -> Response:
+    """Resposta binária com o ficheiro exportado, para descarregar ou ler diretamente (ex: pandas, DuckDB)"""
+    spec = EXPORT_FORMATS[fmt]
+    return Response(
+        content=content,
+        media_type=spec.media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}.{spec.extension}"'}
+    )
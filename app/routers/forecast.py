@@ -1,15 +1,190 @@
 from fastapi import APIRouter, HTTPException, Query
 from typing import Optional
+from datetime import date, timedelta
 from app.services.ipma_service import IPMAService
-from app.models import ForecastResponse, LocationsResponse, DailyForecast, Location
+from app.middleware import TracedRoute
+from app.services.forecast_grid import COMPARATORS, FORECAST_VARIABLES
+from app.models import (
+    ForecastResponse, ForecastQueryResponse, DistrictSummaryResponse, LocationsResponse, DailyForecast, Location
+)
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/forecast", tags=["forecast"])
+router = APIRouter(prefix="/forecast", tags=["forecast"], route_class=TracedRoute)
 ipma_service = IPMAService()
 
 
+@router.get("/by-coords", response_model=ForecastResponse)
+async def get_forecast_by_coordinates(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude do ponto"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude do ponto"),
+    day: Optional[str] = Query(None, description="Data no formato YYYY-MM-DD", pattern=r"^\d{4}-\d{2}-\d{2}$")
+):
+    """
+    Obtém a previsão meteorológica da localidade IPMA mais próxima de um ponto
+
+    Args:
+        lat: Latitude em graus decimais
+        lon: Longitude em graus decimais
+        day: Data da previsão (opcional, por omissão hoje)
+
+    Returns:
+        Previsão meteorológica da localidade mais próxima
+    """
+    try:
+        result = ipma_service.get_forecast_for_coordinates(lat, lon, day)
+
+        if not result:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Nenhuma localidade de previsão encontrada para ({lat}, {lon})"
+            )
+
+        forecast, location, distance = result
+        if not forecast:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Dados meteorológicos não disponíveis para {location.name}"
+            )
+
+        return ForecastResponse(
+            success=True,
+            data=forecast,
+            message=f"Localidade mais próxima: {location.name} ({location.district}) a {distance:.1f} km"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter previsão para ({lat}, {lon}): {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/query", response_model=ForecastQueryResponse, response_model_exclude_none=True)
+async def query_forecasts(
+    variable: str = Query(..., description="max_temperature, min_temperature, precipitation_probability ou weather_type"),
+    op: Optional[str] = Query(None, description="Comparação do limiar: gt, ge, lt, le"),
+    value: Optional[float] = Query(None, description="Valor do limiar"),
+    day: Optional[str] = Query(None, description="Data no formato YYYY-MM-DD", pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    days: Optional[int] = Query(None, ge=1, le=10, description="Próximos N dias a partir de hoje (ex: 2 para 48h)"),
+    top: Optional[int] = Query(None, ge=1, le=1000, description="Devolver apenas os N maiores (ou menores) valores"),
+    order: str = Query("desc", description="Ordem do top: desc ou asc"),
+    group_by: Optional[str] = Query(None, description="Agregar por 'district'")
+):
+    """
+    Consulta as previsões de todas as localidades de uma só vez
+
+    Exemplos:
+        /forecast/query?variable=max_temperature&op=gt&value=35&day=2025-10-05
+        /forecast/query?variable=precipitation_probability&op=ge&value=80&days=2
+        /forecast/query?variable=max_temperature&top=10
+        /forecast/query?variable=max_temperature&days=1&group_by=district
+
+    Returns:
+        Localidades/datas que satisfazem o limiar (ou o top), ou estatísticas por distrito
+    """
+    if variable not in FORECAST_VARIABLES:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Variável inválida. Use: {', '.join(FORECAST_VARIABLES)}"
+        )
+    if op is not None and op not in COMPARATORS:
+        raise HTTPException(status_code=400, detail=f"Operador inválido. Use: {', '.join(COMPARATORS)}")
+    if (op is None) != (value is None):
+        raise HTTPException(status_code=400, detail="op e value devem ser indicados em conjunto")
+    if order not in ("desc", "asc"):
+        raise HTTPException(status_code=400, detail="order deve ser 'desc' ou 'asc'")
+    if group_by not in (None, "district"):
+        raise HTTPException(status_code=400, detail="group_by só aceita 'district'")
+    if day and days:
+        raise HTTPException(status_code=400, detail="Indique day ou days, não ambos")
+
+    try:
+        dates = None
+        if day:
+            dates = [day]
+        elif days:
+            today = date.today()
+            dates = [(today + timedelta(days=offset)).isoformat() for offset in range(days)]
+
+        result = ipma_service.query_forecasts(
+            variable, dates, op, value, top,
+            largest=order == "desc",
+            group_by_district=group_by == "district"
+        )
+
+        count = len(result.groups) if result.groups is not None else len(result.matches)
+        return ForecastQueryResponse(
+            success=True,
+            data=result,
+            message=f"{count} {'distritos' if result.groups is not None else 'resultados'} em {len(result.dates)} datas"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao consultar previsões: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/summary", response_model=DistrictSummaryResponse)
+async def get_all_district_summaries():
+    """
+    Obtém o resumo diário da previsão de todos os distritos
+
+    Returns:
+        Por distrito e dia: temperaturas mínima e máxima, tempo dominante e
+        probabilidade máxima de precipitação entre as suas localidades
+    """
+    try:
+        summaries = list(ipma_service.get_district_forecast_summaries().values())
+
+        return DistrictSummaryResponse(
+            success=True,
+            data=summaries,
+            message=f"Resumos de {len(summaries)} distritos"
+        )
+
+    except Exception as e:
+        logger.error(f"Erro ao obter resumos de previsão por distrito: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/{distrito}/summary", response_model=DistrictSummaryResponse)
+async def get_district_summary(distrito: str):
+    """
+    Obtém o resumo diário da previsão de um distrito
+
+    Args:
+        distrito: Nome do distrito (ex: "lisboa", "beja")
+
+    Returns:
+        Temperaturas mínima e máxima, tempo dominante e probabilidade máxima
+        de precipitação por dia entre as localidades do distrito
+    """
+    try:
+        summary = ipma_service.get_district_forecast_summaries().get(distrito.lower().strip())
+
+        if not summary:
+            raise HTTPException(
+                status_code=404,
+                detail=f"Distrito '{distrito}' não encontrado ou sem previsões disponíveis"
+            )
+
+        return DistrictSummaryResponse(
+            success=True,
+            data=[summary],
+            message=f"Resumo de {summary.district}: {len(summary.days)} dias"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter resumo de previsão para {distrito}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
 @router.get("/{distrito}/{localidade}", response_model=ForecastResponse)
 async def get_forecast_current(
     distrito: str,
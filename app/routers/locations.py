@@ -0,0 +1,57 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from app.services.ipma_service import IPMAService
+from app.middleware import TracedRoute
+from app.models import LocationBundleResponse
+import logging
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/locations", tags=["locations"], route_class=TracedRoute)
+ipma_service = IPMAService()
+
+
+@router.get("/{distrito}/{localidade}/bundle", response_model=LocationBundleResponse, response_model_exclude_none=True)
+async def get_location_bundle(
+    distrito: str,
+    localidade: str,
+    day: Optional[str] = Query(None, description="Data no formato YYYY-MM-DD", pattern=r"^\d{4}-\d{2}-\d{2}$")
+):
+    """
+    Obtém num só pedido todos os dados de uma localidade
+
+    Args:
+        distrito: Nome do distrito (ex: "lisboa", "faro")
+        localidade: Nome da localidade (ex: "lisboa", "lagos")
+        day: Data (opcional); restringe previsão, risco de incêndio, UV e estado do mar a esse dia
+
+    Returns:
+        Previsão, avisos em vigor da área de aviso, risco de incêndio, índice UV e estado do mar
+    """
+    try:
+        bundle = ipma_service.get_location_bundle(distrito, localidade, day)
+
+        if not bundle:
+            locations = ipma_service.get_locations_by_district(distrito)
+            if not locations:
+                raise HTTPException(
+                    status_code=404,
+                    detail=f"Distrito '{distrito}' não encontrado"
+                )
+
+            raise HTTPException(
+                status_code=404,
+                detail=f"Localidade '{localidade}' não encontrada no distrito '{distrito}'"
+            )
+
+        return LocationBundleResponse(
+            success=True,
+            data=bundle,
+            message=f"{bundle.location.name}: {len(bundle.warnings)} avisos em vigor"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter dados agregados para {distrito}/{localidade}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
@@ -1,11 +1,16 @@
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from typing import Optional
 from app.services.ipma_service import IPMAService
+from app.middleware import TracedRoute
+from app.routers.pagination import PageParams, paginated_response
 from app.models import SeaStateResponse, FireRiskResponse, UVIndexResponse
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/marine", tags=["marine"])
+router = APIRouter(prefix="/marine", tags=["marine"], route_class=TracedRoute)
 ipma_service = IPMAService()
 
 
@@ -35,37 +40,57 @@ async def get_sea_state():
 
 
 @router.get("/fire-risk", response_model=FireRiskResponse)
-async def get_fire_risk():
+async def get_fire_risk(
+    since_version: Optional[int] = Query(None, ge=0, description="Devolver apenas as alterações desde esta versão"),
+    page: PageParams = Depends()
+):
     """
     Obtém previsão do risco de incêndio até 2 dias
 
+    Args:
+        since_version: Última versão conhecida pelo cliente (opcional)
+        page: limit/cursor/fields para paginação e projeção (opcional)
+
     Returns:
-        Previsões do risco de incêndio por localidade
+        Previsões do risco de incêndio por localidade, ou as alterações desde since_version
     """
     try:
         fire_risks = ipma_service.get_fire_risk()
 
+        if since_version is not None:
+            return JSONResponse(jsonable_encoder(ipma_service.get_dataset_changes("fire_risk", since_version, fire_risks)))
+
+        version = ipma_service.track_dataset_version("fire_risk", fire_risks)
+
         if not fire_risks:
-            return FireRiskResponse(
-                success=True,
-                data=[],
-                message="Dados de risco de incêndio indisponíveis"
+            return paginated_response(
+                FireRiskResponse, [], page,
+                message="Dados de risco de incêndio indisponíveis",
+                version=version
             )
 
-        return FireRiskResponse(success=True, data=fire_risks)
+        return paginated_response(FireRiskResponse, fire_risks, page, version=version)
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao obter risco de incêndio: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
 @router.get("/fire-risk/level/{min_level}")
-async def get_fire_risk_by_level(min_level: int):
+async def get_fire_risk_by_level(
+    min_level: int,
+    date: Optional[str] = Query(None, description="Data no formato YYYY-MM-DD", pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    location: Optional[str] = Query(None, description="Localidade específica")
+):
     """
     Obtém localidades com risco de incêndio acima de um nível mínimo
 
     Args:
         min_level: Nível mínimo de risco (1-5)
+        date: Data da previsão (opcional)
+        location: Localidade (opcional)
 
     Returns:
         Localidades com risco igual ou superior ao especificado
@@ -74,8 +99,7 @@ async def get_fire_risk_by_level(min_level: int):
         if min_level < 1 or min_level > 5:
             raise HTTPException(status_code=400, detail="Nível deve estar entre 1 e 5")
 
-        all_risks = ipma_service.get_fire_risk()
-        filtered_risks = [risk for risk in all_risks if risk.risk_level >= min_level]
+        filtered_risks = ipma_service.get_fire_risk_index().query(min_level=min_level, date=date, location=location)
 
         return FireRiskResponse(
             success=True,
@@ -91,24 +115,35 @@ async def get_fire_risk_by_level(min_level: int):
 
 
 @router.get("/uv-index", response_model=UVIndexResponse)
-async def get_uv_index():
+async def get_uv_index(
+    since_version: Optional[int] = Query(None, ge=0, description="Devolver apenas as alterações desde esta versão")
+):
     """
     Obtém previsão do índice UV até 3 dias
 
+    Args:
+        since_version: Última versão conhecida pelo cliente (opcional)
+
     Returns:
-        Índices ultravioleta por localidade
+        Índices ultravioleta por localidade, ou as alterações desde since_version
     """
     try:
         uv_data = ipma_service.get_uv_index()
 
+        if since_version is not None:
+            return JSONResponse(jsonable_encoder(ipma_service.get_dataset_changes("uv_index", since_version, uv_data)))
+
+        version = ipma_service.track_dataset_version("uv_index", uv_data)
+
         if not uv_data:
             return UVIndexResponse(
                 success=True,
                 data=[],
-                message="Dados de índice UV indisponíveis"
+                message="Dados de índice UV indisponíveis",
+                version=version
             )
 
-        return UVIndexResponse(success=True, data=uv_data)
+        return UVIndexResponse(success=True, data=uv_data, version=version)
 
     except Exception as e:
         logger.error(f"Erro ao obter índice UV: {e}")
@@ -116,24 +151,24 @@ async def get_uv_index():
 
 
 @router.get("/uv-index/level/{level}")
-async def get_uv_by_level(level: str):
+async def get_uv_by_level(
+    level: str,
+    date: Optional[str] = Query(None, description="Data no formato YYYY-MM-DD", pattern=r"^\d{4}-\d{2}-\d{2}$"),
+    location: Optional[str] = Query(None, description="Localidade específica")
+):
     """
     Obtém localidades com determinado nível de índice UV
 
     Args:
         level: Nível UV (baixo, moderado, alto, muito_alto, extremo)
+        date: Data da previsão (opcional)
+        location: Localidade (opcional)
 
     Returns:
         Localidades com o nível UV especificado
     """
     try:
-        level_map = {
-            "baixo": "Baixo",
-            "moderado": "Moderado",
-            "alto": "Alto",
-            "muito_alto": "Muito Alto",
-            "extremo": "Extremo"
-        }
+        level_map = ipma_service.UV_LEVELS
 
         if level.lower() not in level_map:
             raise HTTPException(
@@ -141,8 +176,9 @@ async def get_uv_by_level(level: str):
                 detail="Nível deve ser: baixo, moderado, alto, muito_alto, extremo"
             )
 
-        all_uv = ipma_service.get_uv_index()
-        filtered_uv = [uv for uv in all_uv if uv.uv_level == level_map[level.lower()]]
+        filtered_uv = ipma_service.get_uv_level_index().query(
+            level=level_map[level.lower()], date=date, location=location
+        )
 
         return UVIndexResponse(
             success=True,
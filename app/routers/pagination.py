@@ -0,0 +1,148 @@
+import base64
+import binascii
+import hashlib
+from typing import Any, Iterator, List, Optional, Set, Tuple, Type, get_args, get_origin
+from fastapi import HTTPException, Query, Request
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
+
+MAX_PAGE_SIZE = 10000
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+# Registos codificados por bloco enviado no modo NDJSON
+NDJSON_BATCH_SIZE = 256
+
+
+class PageParams:
+    """
+    Parâmetros comuns das listas grandes: paginação (limit/cursor), projeção
+    (fields) e formato (JSON ou NDJSON, por ?format=ndjson ou Accept)
+    """
+
+    def __init__(
+        self,
+        request: Request,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Número máximo de registos por página"),
+        cursor: Optional[str] = Query(None, description="Cursor devolvido em next_cursor pela página anterior"),
+        fields: Optional[str] = Query(None, description="Atributos a devolver, separados por vírgulas (ex: date,municipality)"),
+        format: Optional[str] = Query(None, description="json (por omissão) ou ndjson (um registo por linha, em streaming)")
+    ):
+        if format not in (None, "json", "ndjson"):
+            raise HTTPException(status_code=400, detail="format deve ser 'json' ou 'ndjson'")
+
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = fields
+        self.ndjson = format == "ndjson" or (format is None and NDJSON_MEDIA_TYPE in request.headers.get("accept", ""))
+
+
+def _record_fingerprint(record: BaseModel) -> str:
+    return hashlib.sha256(record.model_dump_json().encode()).hexdigest()[:16]
+
+
+def encode_cursor(offset: int, last_record: BaseModel) -> str:
+    """
+    Cursor opaco para a posição offset da lista, ligado ao último registo já
+    devolvido (o que está em offset - 1)
+    """
+    token = f"offset:{offset}:{_record_fingerprint(last_record)}"
+    return base64.urlsafe_b64encode(token.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: Optional[str]) -> Tuple[int, Optional[str]]:
+    """Posição e impressão digital do último registo codificadas no cursor ((0, None) se não houver cursor)"""
+    if not cursor:
+        return 0, None
+
+    try:
+        decoded = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        prefix, offset, fingerprint = decoded.split(":")
+        if prefix != "offset" or not offset.isdigit() or int(offset) < 1 or not fingerprint:
+            raise ValueError(decoded)
+        return int(offset), fingerprint
+    except (ValueError, binascii.Error, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="cursor inválido")
+
+
+def resolve_cursor(cursor: Optional[str], records: List[BaseModel]) -> int:
+    """
+    Posição onde continuar na lista atual
+
+    Se os dados foram renovados e o registo antes dessa posição já não é o que
+    terminou a página anterior, continuar saltaria ou repetiria registos: o
+    cursor é recusado com 409 e o cliente recomeça sem cursor. Registos novos
+    acrescentados depois da posição não invalidam o cursor.
+    """
+    offset, fingerprint = decode_cursor(cursor)
+    if offset and (offset > len(records) or _record_fingerprint(records[offset - 1]) != fingerprint):
+        raise HTTPException(
+            status_code=409,
+            detail="Cursor expirado: os dados foram renovados desde a página anterior; recomece sem cursor"
+        )
+    return offset
+
+
+def _item_model(response_model: Type[BaseModel]) -> Type[BaseModel]:
+    """Modelo dos elementos de data: Optional[List[X]] -> X"""
+    annotation = response_model.model_fields["data"].annotation
+    for arg in get_args(annotation):
+        if get_origin(arg) is list:
+            return get_args(arg)[0]
+    raise TypeError(f"{response_model.__name__}.data não é uma lista")
+
+
+def parse_fields(fields: Optional[str], model: Type[BaseModel]) -> Optional[Set[str]]:
+    """Valida a lista fields= contra os atributos do modelo"""
+    if fields is None:
+        return None
+
+    selected = {field.strip() for field in fields.split(",") if field.strip()}
+    unknown = selected - set(model.model_fields)
+    if not selected or unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Campos inválidos: {', '.join(sorted(unknown)) or fields}. "
+                   f"Disponíveis: {', '.join(model.model_fields)}"
+        )
+    return selected
+
+
+def _ndjson_lines(records: List[BaseModel], include: Optional[Set[str]]) -> Iterator[bytes]:
+    """Codifica os registos à medida que são enviados, um objeto JSON por linha"""
+    for start in range(0, len(records), NDJSON_BATCH_SIZE):
+        batch = records[start:start + NDJSON_BATCH_SIZE]
+        yield "".join(record.model_dump_json(include=include) + "\n" for record in batch).encode()
+
+
+def paginated_response(response_model: Type[BaseModel], records: List[BaseModel], page: PageParams, **extra: Any):
+    """
+    Aplica limit/cursor e a projeção fields= a uma lista de registos em cache
+
+    Sem projeção devolve response_model com next_cursor; com projeção devolve
+    um JSONResponse com a mesma estrutura e apenas os atributos pedidos, pois
+    o modelo de resposta exige todos os campos obrigatórios. No modo NDJSON
+    os registos são enviados em streaming e o cursor seguinte vai no
+    cabeçalho X-Next-Cursor.
+    """
+    include = parse_fields(page.fields, _item_model(response_model))
+    offset = resolve_cursor(page.cursor, records)
+
+    end = len(records) if page.limit is None else min(len(records), offset + page.limit)
+    selected = records[offset:end]
+    next_cursor = encode_cursor(end, records[end - 1]) if end < len(records) else None
+
+    if page.ndjson:
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+        return StreamingResponse(_ndjson_lines(selected, include), media_type=NDJSON_MEDIA_TYPE, headers=headers)
+
+    if include is None:
+        return response_model(success=True, data=selected, next_cursor=next_cursor, **extra)
+
+    return JSONResponse(jsonable_encoder({
+        "success": True,
+        "data": [record.model_dump(include=include) for record in selected],
+        "next_cursor": next_cursor,
+        **extra
+    }))
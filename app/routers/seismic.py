@@ -1,44 +1,236 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
 from typing import List, Optional
 from app.services.ipma_service import IPMAService
-from app.models import SeismicResponse, SeismicData
+from app.middleware import TracedRoute
+from app.routers.pagination import PageParams, paginated_response
+from app.routers.export import export_format, export_response
+from app.services.indexes import parse_timestamp
+from app.services.spatial import parse_bbox
+from app.models import SeismicResponse, SeismicData, SeismicStatsResponse
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/seismic", tags=["seismic"])
+router = APIRouter(prefix="/seismic", tags=["seismic"], route_class=TracedRoute)
 ipma_service = IPMAService()
 
 
 @router.get("/", response_model=SeismicResponse)
-async def get_seismic_data(region: str = Query("continente", description="Região: continente, acores, madeira")):
+async def get_seismic_data(
+    region: str = Query("continente", description="Região: continente, acores, madeira"),
+    min_mag: Optional[float] = Query(None, description="Magnitude mínima"),
+    since: Optional[str] = Query(None, description="Apenas eventos a partir desta data/hora ISO 8601 (UTC)"),
+    lat: Optional[float] = Query(None, ge=-90, le=90, description="Latitude do centro da pesquisa por raio"),
+    lon: Optional[float] = Query(None, ge=-180, le=180, description="Longitude do centro da pesquisa por raio"),
+    radius_km: Optional[float] = Query(None, gt=0, description="Raio da pesquisa em km"),
+    bbox: Optional[str] = Query(None, description="Retângulo min_lon,min_lat,max_lon,max_lat"),
+    page: PageParams = Depends()
+):
     """
     Obtém dados sísmicos dos últimos 30 dias
 
     Args:
         region: Região para consulta (continente, acores, madeira)
+        min_mag: Magnitude mínima (opcional)
+        since: Data/hora mínima (opcional)
+        lat, lon, radius_km: Eventos a até radius_km do ponto (opcional, os três em conjunto)
+        bbox: Eventos dentro do retângulo (opcional)
+        page: limit/cursor/fields para paginação e projeção (opcional)
 
     Returns:
         Lista de eventos sísmicos
     """
     try:
-        seismic_events = ipma_service.get_seismic_data(region)
+        near = None
+        if lat is not None or lon is not None or radius_km is not None:
+            if lat is None or lon is None or radius_km is None:
+                raise HTTPException(status_code=400, detail="Pesquisa por raio requer lat, lon e radius_km")
+            near = (lat, lon, radius_km)
+
+        since_time = None
+        if since is not None:
+            since_time = parse_timestamp(since)
+            if since_time is None:
+                raise HTTPException(status_code=400, detail="since deve estar no formato ISO 8601")
+
+        bounds = None
+        if bbox is not None:
+            try:
+                bounds = parse_bbox(bbox)
+            except ValueError as e:
+                raise HTTPException(status_code=400, detail=f"bbox inválida: {e}")
+
+        seismic_index = ipma_service.get_seismic_index(region)
+        seismic_events = seismic_index.query(min_magnitude=min_mag, since=since_time, near=near, bbox=bounds)
 
         if not seismic_events:
-            return SeismicResponse(
-                success=True,
-                data=[],
+            return paginated_response(
+                SeismicResponse, [], page,
                 message=f"Nenhum evento sísmico registado na região {region}"
             )
 
+        return paginated_response(
+            SeismicResponse, seismic_events, page,
+            message=f"Eventos sísmicos encontrados: {len(seismic_events)}"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter dados sísmicos para {region}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/all", response_model=SeismicResponse)
+async def get_all_seismic_data(page: PageParams = Depends()):
+    """
+    Obtém os eventos sísmicos das três regiões num único catálogo
+
+    Os catálogos do continente, Açores e Madeira são obtidos em paralelo e
+    fundidos por ordem temporal (mais recentes primeiro), sem duplicados.
+
+    Args:
+        page: limit/cursor/fields para paginação e projeção (opcional)
+
+    Returns:
+        Lista de eventos sísmicos identificados pela região
+    """
+    try:
+        seismic_events = ipma_service.get_all_seismic_data()
+
+        if not seismic_events:
+            return paginated_response(
+                SeismicResponse, [], page,
+                message="Nenhum evento sísmico registado"
+            )
+
+        return paginated_response(
+            SeismicResponse, seismic_events, page,
+            message=f"Eventos sísmicos em todas as regiões: {len(seismic_events)}"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter dados sísmicos de todas as regiões: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/export")
+async def export_seismic_data(
+    region: str = Query("continente", description="Região: continente, acores, madeira ou all"),
+    fmt: str = Depends(export_format)
+):
+    """
+    Exporta o catálogo sísmico dos últimos 30 dias em colunas (Arrow IPC, Parquet ou CSV)
+
+    Args:
+        region: Região (continente, acores, madeira) ou all para as três
+        fmt: Formato (?format=arrow|parquet|csv; por omissão Arrow, ou CSV sem pyarrow)
+
+    Returns:
+        Ficheiro com um evento por linha (coordenadas em coordinates_latitude/longitude)
+    """
+    try:
+        if region.lower() not in ipma_service.SEISMIC_REGIONS + ("all",):
+            raise HTTPException(
+                status_code=400,
+                detail=f"Região inválida. Use: {', '.join(ipma_service.SEISMIC_REGIONS)} ou all"
+            )
+
+        return export_response(ipma_service.export_seismic_data(region, fmt), fmt, f"seismic-{region.lower()}")
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao exportar dados sísmicos para {region}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/stats", response_model=SeismicStatsResponse)
+async def get_seismic_stats(region: str = Query("continente", description="Região: continente, acores, madeira, all")):
+    """
+    Obtém estatísticas pré-calculadas do catálogo sísmico
+
+    Inclui a distribuição magnitude-frequência (Gutenberg-Richter) com a
+    magnitude de completude e o valor b, contagens diárias de eventos e o
+    histograma de profundidades. As estatísticas são recalculadas apenas
+    quando o catálogo é renovado.
+
+    Args:
+        region: Região (continente, acores, madeira) ou all para as três
+
+    Returns:
+        Estatísticas do catálogo
+    """
+    try:
+        if region.lower() not in (*ipma_service.SEISMIC_REGIONS, "all"):
+            raise HTTPException(status_code=400, detail="Região deve ser: continente, acores, madeira, all")
+
+        stats = ipma_service.get_seismic_stats(region)
+
+        return SeismicStatsResponse(
+            success=True,
+            data=stats,
+            message=f"Estatísticas de {stats.total_events} eventos sísmicos"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao calcular estatísticas sísmicas para {region}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/history", response_model=SeismicResponse)
+async def get_seismic_history(
+    region: Optional[str] = Query(None, description="Região: continente, acores, madeira (todas por omissão)"),
+    since: Optional[str] = Query(None, description="Data/hora mínima ISO 8601 (UTC)"),
+    until: Optional[str] = Query(None, description="Data/hora máxima ISO 8601 (UTC)"),
+    min_mag: Optional[float] = Query(None, description="Magnitude mínima"),
+    limit: int = Query(1000, ge=1, le=10000, description="Número máximo de eventos")
+):
+    """
+    Obtém eventos do catálogo sísmico persistente
+
+    O catálogo local acumula os eventos de cada renovação, pelo que cobre
+    períodos superiores aos 30 dias disponibilizados pelo IPMA.
+
+    Args:
+        region: Região (opcional)
+        since: Data/hora mínima (opcional)
+        until: Data/hora máxima (opcional)
+        min_mag: Magnitude mínima (opcional)
+        limit: Número máximo de eventos
+
+    Returns:
+        Eventos históricos, mais recentes primeiro
+    """
+    try:
+        if region is not None and region.lower() not in ipma_service.SEISMIC_REGIONS:
+            raise HTTPException(status_code=400, detail="Região deve ser: continente, acores, madeira")
+
+        bounds = {}
+        for name, value in (("since", since), ("until", until)):
+            if value is not None:
+                bounds[name] = parse_timestamp(value)
+                if bounds[name] is None:
+                    raise HTTPException(status_code=400, detail=f"{name} deve estar no formato ISO 8601")
+
+        seismic_events = ipma_service.get_seismic_history(
+            region, bounds.get("since"), bounds.get("until"), min_mag, limit
+        )
+
         return SeismicResponse(
             success=True,
             data=seismic_events,
-            message=f"Eventos sísmicos encontrados: {len(seismic_events)}"
+            message=f"Eventos no catálogo histórico: {len(seismic_events)}"
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Erro ao obter dados sísmicos para {region}: {e}")
+        logger.error(f"Erro ao obter histórico sísmico: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
@@ -58,8 +250,7 @@ async def get_seismic_by_magnitude(
         Lista de eventos sísmicos filtrados por magnitude
     """
     try:
-        all_events = ipma_service.get_seismic_data(region)
-        filtered_events = [event for event in all_events if event.magnitude >= min_magnitude]
+        filtered_events = ipma_service.get_seismic_index(region).query(min_magnitude=min_magnitude)
 
         return SeismicResponse(
             success=True,
@@ -1,12 +1,18 @@
-from fastapi import APIRouter, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
 from typing import Optional
 from app.services.ipma_service import IPMAService
-from app.models import StationsResponse, ObservationsResponse
+from app.middleware import TracedRoute
+from app.routers.pagination import PageParams, paginated_response
+from app.routers.export import export_format, export_response
+from app.models import StationsResponse, ObservationsResponse, NearbyStation, NearbyStationsResponse
+from app.services.spatial import parse_bbox
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/stations", tags=["stations"])
+router = APIRouter(prefix="/stations", tags=["stations"], route_class=TracedRoute)
 ipma_service = IPMAService()
 
 
@@ -39,39 +45,143 @@ async def get_weather_stations():
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
+@router.get("/nearest", response_model=NearbyStationsResponse)
+async def get_nearest_stations(
+    lat: float = Query(..., ge=-90, le=90, description="Latitude do ponto"),
+    lon: float = Query(..., ge=-180, le=180, description="Longitude do ponto"),
+    k: int = Query(1, ge=1, le=50, description="Número de estações a devolver")
+):
+    """
+    Obtém as estações meteorológicas mais próximas de um ponto
+
+    Args:
+        lat: Latitude em graus decimais
+        lon: Longitude em graus decimais
+        k: Número de estações
+
+    Returns:
+        Estações ordenadas por distância (km)
+    """
+    try:
+        nearest = ipma_service.find_nearest_stations(lat, lon, k)
+        data = [NearbyStation(station=station, distance_km=round(distance, 3)) for station, distance in nearest]
+
+        return NearbyStationsResponse(
+            success=True,
+            data=data,
+            message=f"Estações mais próximas: {len(data)}"
+        )
+
+    except Exception as e:
+        logger.error(f"Erro ao obter estações mais próximas de ({lat}, {lon}): {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/within", response_model=StationsResponse)
+async def get_stations_within(
+    bbox: str = Query(..., description="Retângulo min_lon,min_lat,max_lon,max_lat")
+):
+    """
+    Obtém as estações meteorológicas dentro de um retângulo
+
+    Args:
+        bbox: Limites no formato min_lon,min_lat,max_lon,max_lat
+
+    Returns:
+        Estações contidas no retângulo
+    """
+    try:
+        try:
+            min_lat, min_lon, max_lat, max_lon = parse_bbox(bbox)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=f"bbox inválida: {e}")
+
+        stations = ipma_service.find_stations_within(min_lat, min_lon, max_lat, max_lon)
+
+        return StationsResponse(
+            success=True,
+            data=stations,
+            message=f"Estações na área: {len(stations)}"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter estações na área {bbox}: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
 @router.get("/observations", response_model=ObservationsResponse)
-async def get_station_observations(station_id: Optional[str] = Query(None, description="ID da estação específica")):
+async def get_station_observations(
+    station_id: Optional[str] = Query(None, description="ID da estação específica"),
+    since_version: Optional[int] = Query(None, ge=0, description="Devolver apenas as alterações desde esta versão"),
+    page: PageParams = Depends()
+):
     """
     Obtém observações meteorológicas das últimas 24 horas
 
     Args:
         station_id: ID da estação específica (opcional)
+        since_version: Última versão conhecida pelo cliente (opcional, sem station_id)
+        page: limit/cursor/fields para paginação e projeção (opcional)
 
     Returns:
-        Observações meteorológicas das estações
+        Observações meteorológicas das estações, ou as alterações desde since_version
     """
     try:
+        if station_id and since_version is not None:
+            raise HTTPException(status_code=400, detail="since_version não é suportado com station_id")
+
         observations = ipma_service.get_station_observations(station_id)
 
+        version = None
+        if not station_id:
+            if since_version is not None:
+                return JSONResponse(jsonable_encoder(
+                    ipma_service.get_dataset_changes("observations", since_version, observations)
+                ))
+            version = ipma_service.track_dataset_version("observations", observations)
+
         if not observations:
             message = f"Nenhuma observação encontrada para a estação {station_id}" if station_id else "Nenhuma observação meteorológica disponível"
-            return ObservationsResponse(
-                success=True,
-                data=[],
-                message=message
+            return paginated_response(
+                ObservationsResponse, [], page,
+                message=message,
+                version=version
             )
 
-        return ObservationsResponse(
-            success=True,
-            data=observations,
-            message=f"Observações encontradas: {len(observations)}"
+        return paginated_response(
+            ObservationsResponse, observations, page,
+            message=f"Observações encontradas: {len(observations)}",
+            version=version
         )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Erro ao obter observações meteorológicas: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
 
 
+@router.get("/observations/export")
+async def export_station_observations(fmt: str = Depends(export_format)):
+    """
+    Exporta as observações das últimas 24 horas em colunas (Arrow IPC, Parquet ou CSV)
+
+    Args:
+        fmt: Formato (?format=arrow|parquet|csv; por omissão Arrow, ou CSV sem pyarrow)
+
+    Returns:
+        Ficheiro com uma linha por (estação, hora), gerado uma vez por renovação
+    """
+    try:
+        return export_response(ipma_service.export_station_observations(fmt), fmt, "observations")
+
+    except Exception as e:
+        logger.error(f"Erro ao exportar observações meteorológicas: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
 @router.get("/observations/latest")
 async def get_latest_observations():
     """
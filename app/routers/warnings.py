@@ -1,34 +1,56 @@
-from fastapi import APIRouter, HTTPException
-from typing import List
+from fastapi import APIRouter, HTTPException, Query, Request, WebSocket, WebSocketDisconnect
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, StreamingResponse
+from typing import List, Optional
+from datetime import datetime
+import asyncio
+import json
 from app.services.ipma_service import IPMAService
+from app.middleware import TracedRoute
+from app.services.indexes import parse_timestamp
+from app.services.warning_stream import WarningBroadcaster
 from app.models import WeatherWarningsResponse, WeatherWarning
 import logging
 
 logger = logging.getLogger(__name__)
 
-router = APIRouter(prefix="/warnings", tags=["warnings"])
+router = APIRouter(prefix="/warnings", tags=["warnings"], route_class=TracedRoute)
 ipma_service = IPMAService()
+broadcaster = WarningBroadcaster(ipma_service)
+
+SSE_KEEPALIVE_SECONDS = 15
 
 
 @router.get("/", response_model=WeatherWarningsResponse)
-async def get_weather_warnings():
+async def get_weather_warnings(
+    since_version: Optional[int] = Query(None, ge=0, description="Devolver apenas as alterações desde esta versão")
+):
     """
     Obtém avisos meteorológicos até 3 dias
 
+    Args:
+        since_version: Última versão conhecida pelo cliente (opcional)
+
     Returns:
-        Lista de avisos meteorológicos ativos
+        Lista de avisos meteorológicos ativos, ou as alterações desde since_version
     """
     try:
         warnings = ipma_service.get_weather_warnings()
 
+        if since_version is not None:
+            return JSONResponse(jsonable_encoder(ipma_service.get_dataset_changes("warnings", since_version, warnings)))
+
+        version = ipma_service.track_dataset_version("warnings", warnings)
+
         if not warnings:
             return WeatherWarningsResponse(
                 success=True,
                 data=[],
-                message="Nenhum aviso meteorológico ativo no momento"
+                message="Nenhum aviso meteorológico ativo no momento",
+                version=version
             )
 
-        return WeatherWarningsResponse(success=True, data=warnings)
+        return WeatherWarningsResponse(success=True, data=warnings, version=version)
 
     except Exception as e:
         logger.error(f"Erro ao obter avisos meteorológicos: {e}")
@@ -47,8 +69,7 @@ async def get_warnings_by_level(level: str):
         Lista de avisos do nível especificado
     """
     try:
-        all_warnings = ipma_service.get_weather_warnings()
-        filtered_warnings = [w for w in all_warnings if w.level.lower() == level.lower()]
+        filtered_warnings = ipma_service.get_warning_index().with_level(level)
 
         return WeatherWarningsResponse(
             success=True,
@@ -59,3 +80,125 @@ async def get_warnings_by_level(level: str):
     except Exception as e:
         logger.error(f"Erro ao obter avisos por nível {level}: {e}")
         raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/active", response_model=WeatherWarningsResponse)
+async def get_active_warnings(
+    at: Optional[str] = Query(None, description="Instante ISO 8601 (UTC); por omissão, agora"),
+    area: Optional[str] = Query(None, description="Área de aviso (idAreaAviso, ex: LSB, PTO)"),
+    level: Optional[str] = Query(None, description="Nível: verde, amarelo, laranja, vermelho")
+):
+    """
+    Obtém os avisos em vigor num instante
+
+    Args:
+        at: Instante da consulta (opcional)
+        area: Área de aviso (opcional)
+        level: Nível do aviso (opcional)
+
+    Returns:
+        Avisos cujo período de vigência contém o instante indicado
+    """
+    try:
+        if at is None:
+            instant = datetime.utcnow()
+        else:
+            instant = parse_timestamp(at)
+            if instant is None:
+                raise HTTPException(status_code=400, detail="at deve estar no formato ISO 8601")
+
+        active_warnings = ipma_service.get_warning_index().active_at(instant, area, level)
+
+        return WeatherWarningsResponse(
+            success=True,
+            data=active_warnings,
+            message=f"Avisos em vigor em {instant.isoformat(timespec='minutes')}: {len(active_warnings)}"
+        )
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Erro ao obter avisos em vigor: {e}")
+        raise HTTPException(status_code=500, detail="Erro interno do servidor")
+
+
+@router.get("/stream")
+async def stream_warnings(request: Request):
+    """
+    Difunde alterações dos avisos por Server-Sent Events
+
+    Na ligação é enviado um evento "snapshot" com os avisos em vigor; depois,
+    a cada renovação com diferenças, um evento "changes" com os avisos novos
+    (added), alterados (updated) e expirados (expired). O id de cada evento é
+    a versão do conjunto de avisos: após uma desconexão, GET /warnings/?since_version=<id>
+    devolve o que mudou entretanto. Um cliente que não acompanhe as alterações
+    recebe um novo "snapshot" no lugar das que ficaram pendentes.
+
+    Returns:
+        Fluxo text/event-stream
+    """
+    # Subscrever antes do snapshot: o que for difundido depois dele chega pela fila
+    queue = broadcaster.subscribe()
+    try:
+        snapshot = await broadcaster.snapshot(queue)
+    except Exception:
+        broadcaster.unsubscribe(queue)
+        raise
+
+    async def events():
+        try:
+            yield f"event: snapshot\nid: {snapshot['version']}\ndata: {json.dumps(snapshot)}\n\n"
+            while not await request.is_disconnected():
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=SSE_KEEPALIVE_SECONDS)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield f"event: {event['type']}\nid: {event['version']}\ndata: {json.dumps(event)}\n\n"
+        finally:
+            broadcaster.unsubscribe(queue)
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
+
+
+@router.websocket("/ws")
+async def warnings_websocket(websocket: WebSocket):
+    """
+    Difunde alterações dos avisos por WebSocket
+
+    Envia primeiro um "snapshot" e depois eventos "changes" com as diferenças.
+    """
+    await websocket.accept()
+    queue = broadcaster.subscribe()
+
+    async def forward():
+        await websocket.send_json(await broadcaster.snapshot(queue))
+        while True:
+            await websocket.send_json(await queue.get())
+
+    async def receive():
+        # As mensagens do cliente são ignoradas; a leitura serve para detetar o fim da ligação
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    sender = asyncio.create_task(forward())
+    receiver = asyncio.create_task(receive())
+    try:
+        done, _ = await asyncio.wait({sender, receiver}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        sender.cancel()
+        receiver.cancel()
+        broadcaster.unsubscribe(queue)
+
+    error, _ = await asyncio.gather(sender, receiver, return_exceptions=True)
+    if isinstance(error, Exception):
+        logger.error(f"Erro ao difundir avisos por WebSocket: {error}")
+        if receiver not in done:
+            await websocket.close(code=1011)
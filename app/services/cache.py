@@ -0,0 +1,152 @@
+import contextvars
+import itertools
+import os
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from app.services.tracing import span
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "stale", "evictions", "maxsize", "currsize"])
+
+# Tempo de vida (segundos) em cache de cada conjunto de dados do IPMA;
+# pode ser ajustado com CACHE_TTL_<CONJUNTO> (ex: CACHE_TTL_FORECASTS=300)
+DEFAULT_DATASET_TTLS: Dict[str, int] = {
+    "locations": 24 * 3600,
+    "reference": 24 * 3600,     # tipos de tempo, classes de vento e precipitação
+    "forecasts": 5 * 60,
+    "warnings": 60,
+    "seismic": 30 * 60,
+    "sea_state": 60 * 60,
+    "fire_risk": 60 * 60,
+    "uv_index": 60 * 60,
+    "stations": 15 * 60,
+    "observations": 15 * 60,
+    "agriculture": 24 * 3600,
+    "water_quality": 60 * 60
+}
+
+DATASET_TTLS: Dict[str, int] = {
+    name: int(os.getenv(f"CACHE_TTL_{name.upper()}", ttl)) for name, ttl in DEFAULT_DATASET_TTLS.items()
+}
+
+# Entrada de uma cache: (função decorada, chave)
+CacheDependency = Tuple[Callable, Tuple[Any, ...]]
+
+_caches: List[Callable] = []
+_versions = itertools.count(1)
+_dependencies: contextvars.ContextVar[Optional[Dict[CacheDependency, int]]] = \
+    contextvars.ContextVar("cache_dependencies", default=None)
+
+
+def registered_caches() -> List[Callable]:
+    """Funções decoradas com ttl_cache, para recolha de estatísticas (cache_info)"""
+    return list(_caches)
+
+
+@contextmanager
+def track_dependencies() -> Iterator[Dict[CacheDependency, int]]:
+    """
+    Regista as entradas de cache lidas durante o bloco, incluindo as obtidas em
+    threads com o contexto copiado: (função em cache, chave) -> versão da entrada
+    """
+    dependencies: Dict[CacheDependency, int] = {}
+    token = _dependencies.set(dependencies)
+    try:
+        yield dependencies
+    finally:
+        _dependencies.reset(token)
+
+
+def dependencies_current(dependencies: Iterable[Tuple[CacheDependency, int]]) -> bool:
+    """Indica se nenhuma das entradas registadas foi renovada, descartada ou expirou entretanto"""
+    return all(cache.entry_version(key) == version for (cache, key), version in dependencies)
+
+
+def _record_dependency(cache: Callable, key: Tuple[Any, ...], version: int) -> None:
+    dependencies = _dependencies.get()
+    if dependencies is not None:
+        dependencies[(cache, key)] = version
+
+
+def _make_key(args: tuple, kwargs: dict, typed: bool) -> Tuple[Any, ...]:
+    key = args
+    if kwargs:
+        key += (object,) + tuple(sorted(kwargs.items()))
+    if typed:
+        key += tuple(type(value) for value in args)
+        key += tuple(type(value) for value in kwargs.values())
+    return key
+
+
+def ttl_cache(dataset: str, maxsize: int = 128, typed: bool = False, ttl: Optional[float] = None) -> Callable:
+    """
+    Substituto de functools.lru_cache em que cada entrada expira ao fim do TTL
+    do conjunto de dados (DATASET_TTLS)
+
+    Mantém cache_clear() e cache_info(); cada entrada guardada recebe uma versão
+    nova, o que permite validar respostas HTTP sem recalcular o corpo enquanto
+    as entradas de que dependem (track_dependencies) não forem renovadas.
+    """
+    lifetime = ttl if ttl is not None else DATASET_TTLS[dataset]
+    DATASET_TTLS.setdefault(dataset, int(lifetime))
+
+    def decorator(func: Callable) -> Callable:
+        entries: "OrderedDict[Tuple[Any, ...], Tuple[float, Any, int]]" = OrderedDict()
+        lock = threading.Lock()
+        stats = {"hits": 0, "misses": 0, "stale": 0, "evictions": 0}
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            key = _make_key(args, kwargs, typed)
+
+            with span("cache.get", **{"cache.dataset": dataset, "code.function": func.__name__}) as current:
+                with lock:
+                    entry = entries.get(key)
+                    if entry is not None and entry[0] > time.monotonic():
+                        entries.move_to_end(key)
+                        stats["hits"] += 1
+                        current.set_attribute("cache.result", "hit")
+                        _record_dependency(wrapper, key, entry[2])
+                        return entry[1]
+                    stats["stale" if entry is not None else "misses"] += 1
+                    current.set_attribute("cache.result", "stale" if entry is not None else "miss")
+
+                value = func(*args, **kwargs)
+                version = next(_versions)
+
+                with lock:
+                    entries[key] = (time.monotonic() + lifetime, value, version)
+                    entries.move_to_end(key)
+                    while len(entries) > maxsize:
+                        entries.popitem(last=False)
+                        stats["evictions"] += 1
+
+                _record_dependency(wrapper, key, version)
+                return value
+
+        def cache_clear() -> None:
+            with lock:
+                entries.clear()
+
+        def entry_version(key: Tuple[Any, ...]) -> Optional[int]:
+            """Versão da entrada com esta chave (None se não existir ou tiver expirado)"""
+            with lock:
+                entry = entries.get(key)
+            return entry[2] if entry is not None and entry[0] > time.monotonic() else None
+
+        def cache_info() -> CacheInfo:
+            with lock:
+                return CacheInfo(maxsize=maxsize, currsize=len(entries), **stats)
+
+        wrapper.cache_clear = cache_clear
+        wrapper.cache_info = cache_info
+        wrapper.entry_version = entry_version
+        wrapper.dataset = dataset
+        wrapper.ttl = lifetime
+        _caches.append(wrapper)
+        return wrapper
+
+    return decorator
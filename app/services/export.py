@@ -0,0 +1,98 @@
+import csv
+import io
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Type
+from pydantic import BaseModel
+
+try:
+    import pyarrow
+    import pyarrow.ipc
+    import pyarrow.parquet
+except ImportError:  # pyarrow é opcional; sem ele só se exporta CSV
+    pyarrow = None
+
+
+class ExportFormat(NamedTuple):
+    """Formato de exportação em colunas"""
+    media_type: str
+    extension: str
+    requires_pyarrow: bool
+
+
+EXPORT_FORMATS: Dict[str, ExportFormat] = {
+    "arrow": ExportFormat("application/vnd.apache.arrow.file", "arrow", True),
+    "parquet": ExportFormat("application/vnd.apache.parquet", "parquet", True),
+    "csv": ExportFormat("text/csv; charset=utf-8", "csv", False)
+}
+
+
+def available_formats() -> List[str]:
+    """Formatos que é possível gerar neste ambiente, do preferido para o de recurso"""
+    return [name for name, spec in EXPORT_FORMATS.items() if pyarrow is not None or not spec.requires_pyarrow]
+
+
+def resolve_format(requested: Optional[str]) -> str:
+    """Formato pedido ou, se omitido, o melhor disponível (Arrow com pyarrow, senão CSV)"""
+    available = available_formats()
+    if requested is None:
+        return available[0]
+
+    if requested not in available:
+        raise ValueError(
+            f"Formato '{requested}' indisponível. Disponíveis: {', '.join(available)}"
+        )
+    return requested
+
+
+def record_columns(records: Sequence[BaseModel], model: Type[BaseModel]) -> Dict[str, List[Any]]:
+    """
+    Colunas (nome -> valores) dos registos, pela ordem dos campos do modelo
+
+    Campos dicionário (ex: coordinates) são achatados em <campo>_<chave>.
+    """
+    columns: Dict[str, List[Any]] = {}
+
+    for field, info in model.model_fields.items():
+        values = [getattr(record, field) for record in records]
+
+        if getattr(info.annotation, "__origin__", None) is dict:
+            keys = list(dict.fromkeys(key for value in values if value for key in value))
+            for key in keys:
+                columns[f"{field}_{key}"] = [value.get(key) if value else None for value in values]
+        else:
+            columns[field] = values
+
+    return columns
+
+
+def _encode_csv(columns: Dict[str, List[Any]]) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator="\n")
+    writer.writerow(columns)
+    writer.writerows(zip(*columns.values()))
+    return buffer.getvalue().encode("utf-8")
+
+
+def _encode_arrow(columns: Dict[str, List[Any]]) -> bytes:
+    table = pyarrow.table(columns)
+    sink = pyarrow.BufferOutputStream()
+    with pyarrow.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+def _encode_parquet(columns: Dict[str, List[Any]]) -> bytes:
+    sink = pyarrow.BufferOutputStream()
+    pyarrow.parquet.write_table(pyarrow.table(columns), sink)
+    return sink.getvalue().to_pybytes()
+
+
+_ENCODERS = {
+    "arrow": _encode_arrow,
+    "parquet": _encode_parquet,
+    "csv": _encode_csv
+}
+
+
+def encode_records(records: Sequence[BaseModel], model: Type[BaseModel], fmt: str) -> bytes:
+    """Serializa os registos em colunas no formato indicado (um de available_formats())"""
+    return _ENCODERS[fmt](record_columns(records, model))
@@ -0,0 +1,156 @@
+import heapq
+import math
+import operator
+from array import array
+from collections import Counter
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from app.models import Location
+
+# Variável exposta -> campos do payload diário do IPMA (por ordem de preferência)
+FORECAST_VARIABLES: Dict[str, Tuple[str, ...]] = {
+    "max_temperature": ("tMax",),
+    "min_temperature": ("tMin",),
+    "precipitation_probability": ("precipitaProb", "probabilityOfPrecipitation"),
+    "weather_type": ("idWeatherType",)
+}
+
+COMPARATORS: Dict[str, Callable[[float, float], bool]] = {
+    "gt": operator.gt,
+    "ge": operator.ge,
+    "lt": operator.lt,
+    "le": operator.le
+}
+
+# (posição da localidade, posição da data, valor)
+Cell = Tuple[int, int, float]
+
+
+class ForecastGrid:
+    """
+    Previsões diárias de todas as localidades em colunas contíguas
+
+    Cada variável é um array('d') com um bloco de len(locations) valores por
+    data (layout data x localidade); valores em falta são NaN. As consultas
+    percorrem apenas os blocos das datas pedidas.
+    """
+
+    def __init__(self, locations: Sequence[Location], payloads: Dict[int, Optional[Dict[str, Any]]]):
+        self.locations: List[Location] = [loc for loc in locations if payloads.get(loc.id)]
+
+        records: List[Tuple[int, str, Dict[str, Any]]] = []
+        for position, loc in enumerate(self.locations):
+            for record in payloads[loc.id].get('data', []):
+                date = (record.get('forecastDate') or '')[:10]
+                if date:
+                    records.append((position, date, record))
+
+        self.dates: List[str] = sorted({date for _, date, _ in records})
+        date_positions = {date: index for index, date in enumerate(self.dates)}
+        width = len(self.locations)
+
+        self.columns: Dict[str, array] = {
+            variable: array('d', [math.nan]) * (width * len(self.dates)) for variable in FORECAST_VARIABLES
+        }
+
+        for position, date, record in records:
+            offset = date_positions[date] * width + position
+            for variable, fields in FORECAST_VARIABLES.items():
+                value = next((record[field] for field in fields if record.get(field) is not None), None)
+                try:
+                    self.columns[variable][offset] = float(value)
+                except (TypeError, ValueError):
+                    pass
+
+    def __len__(self) -> int:
+        return len(self.locations)
+
+    def date_positions(self, dates: Optional[Sequence[str]] = None) -> List[int]:
+        """Posições das datas pedidas presentes na grelha (todas se dates for None)"""
+        if dates is None:
+            return list(range(len(self.dates)))
+        wanted = {date[:10] for date in dates}
+        return [index for index, date in enumerate(self.dates) if date in wanted]
+
+    def _block(self, variable: str, date_position: int) -> array:
+        width = len(self.locations)
+        return self.columns[variable][date_position * width:(date_position + 1) * width]
+
+    def cells(self, variable: str, dates: Optional[Sequence[str]] = None,
+              op: Optional[str] = None, value: Optional[float] = None) -> List[Cell]:
+        """Células com valor (não NaN) nas datas pedidas, opcionalmente filtradas por limiar"""
+        compare = COMPARATORS[op] if op is not None else None
+        found: List[Cell] = []
+
+        for date_position in self.date_positions(dates):
+            block = self._block(variable, date_position)
+            if compare is None:
+                found.extend((position, date_position, v) for position, v in enumerate(block) if v == v)
+            else:
+                found.extend(
+                    (position, date_position, v) for position, v in enumerate(block) if v == v and compare(v, value)
+                )
+
+        return found
+
+    @staticmethod
+    def top_k(cells: List[Cell], k: int, largest: bool = True) -> List[Cell]:
+        """As k células de maior (ou menor) valor"""
+        select = heapq.nlargest if largest else heapq.nsmallest
+        return select(k, cells, key=lambda cell: cell[2])
+
+    def group_by_district(self, cells: List[Cell]) -> List[Dict[str, Any]]:
+        """Contagem, mínimo, máximo e média das células por distrito, por ordem alfabética"""
+        groups: Dict[str, List[float]] = {}
+        for position, _, v in cells:
+            stats = groups.get(self.locations[position].district)
+            if stats is None:
+                groups[self.locations[position].district] = [1, v, v, v]
+            else:
+                stats[0] += 1
+                stats[1] = min(stats[1], v)
+                stats[2] = max(stats[2], v)
+                stats[3] += v
+
+        return [
+            {"district": district, "count": int(count), "min": low, "max": high, "mean": round(total / count, 2)}
+            for district, (count, low, high, total) in sorted(groups.items())
+        ]
+
+    def district_summaries(self) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Reduções diárias por distrito: mínima de tMin, máxima de tMax, tipo de
+        tempo mais frequente (empate -> menor id) e máxima probabilidade de precipitação
+        """
+        width = len(self.locations)
+        positions_by_district: Dict[str, List[int]] = {}
+        for position, loc in enumerate(self.locations):
+            positions_by_district.setdefault(loc.district, []).append(position)
+
+        summaries: Dict[str, List[Dict[str, Any]]] = {}
+        for district, positions in sorted(positions_by_district.items()):
+            days = []
+            for date_position, date in enumerate(self.dates):
+                offset = date_position * width
+
+                def values(variable: str) -> List[float]:
+                    column = self.columns[variable]
+                    found = (column[offset + position] for position in positions)
+                    return [value for value in found if value == value]
+
+                t_min, t_max = values("min_temperature"), values("max_temperature")
+                precipitation, weather_types = values("precipitation_probability"), values("weather_type")
+                if not (t_min or t_max or precipitation or weather_types):
+                    continue
+
+                counts = Counter(int(weather_type) for weather_type in weather_types)
+                days.append({
+                    "date": date,
+                    "locations": max(len(t_min), len(t_max), len(precipitation), len(weather_types)),
+                    "min_temperature": min(t_min) if t_min else None,
+                    "max_temperature": max(t_max) if t_max else None,
+                    "dominant_weather_type": max(counts.items(), key=lambda item: (item[1], -item[0]))[0] if counts else None,
+                    "max_precipitation_probability": max(precipitation) if precipitation else None
+                })
+            summaries[district] = days
+
+        return summaries
@@ -0,0 +1,259 @@
+from bisect import bisect_left
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence, Tuple
+from app.models import SeismicData, WeatherWarning
+from app.services.spatial import SpatialIndex
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """
+    Converte datas ISO 8601 do IPMA em datetime UTC sem fuso (comparáveis entre si)
+
+    Aceita datas simples (YYYY-MM-DD), datas com hora e sufixo 'Z' ou desvio horário.
+    Devolve None para valores vazios ou inválidos.
+    """
+    if not value:
+        return None
+
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace('Z', '+00:00'))
+    except ValueError:
+        return None
+
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return parsed
+
+
+def intersect_positions(candidates: List[List[int]]) -> List[int]:
+    """Interseção de listas de posições, começando pela mais curta; resultado ordenado"""
+    candidates = sorted(candidates, key=len)
+    positions = set(candidates[0])
+    for other in candidates[1:]:
+        if not positions:
+            break
+        positions.intersection_update(other)
+    return sorted(positions)
+
+
+class SeismicIndex:
+    """
+    Índices de um catálogo sísmico regional: magnitudes ordenadas (bisect),
+    tempos ordenados (bisect) e índice espacial sobre o epicentro
+    """
+
+    def __init__(self, events: List[SeismicData]):
+        self.events = events
+
+        self._by_magnitude = sorted(range(len(events)), key=lambda position: events[position].magnitude)
+        self._magnitudes = [events[position].magnitude for position in self._by_magnitude]
+
+        timed = sorted(
+            (timestamp, position)
+            for position, timestamp in enumerate(parse_timestamp(event.time) for event in events)
+            if timestamp is not None
+        )
+        self._times = [timestamp for timestamp, _ in timed]
+        self._by_time = [position for _, position in timed]
+
+        self._spatial = SpatialIndex(range(len(events)), lambda position: (
+            events[position].coordinates.get("latitude"), events[position].coordinates.get("longitude")
+        ))
+
+    def with_min_magnitude(self, min_magnitude: float) -> List[int]:
+        """Posições dos eventos com magnitude >= min_magnitude"""
+        return self._by_magnitude[bisect_left(self._magnitudes, min_magnitude):]
+
+    def since(self, start: datetime) -> List[int]:
+        """Posições dos eventos ocorridos a partir de start (UTC)"""
+        return self._by_time[bisect_left(self._times, start):]
+
+    def near(self, lat: float, lon: float, radius_km: float) -> List[int]:
+        """Posições dos eventos com epicentro a até radius_km do ponto"""
+        return [position for position, _ in self._spatial.within_radius(lat, lon, radius_km)]
+
+    def within_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[int]:
+        """Posições dos eventos com epicentro dentro do retângulo"""
+        return self._spatial.within_bbox(min_lat, min_lon, max_lat, max_lon)
+
+    def query(self, min_magnitude: Optional[float] = None, since: Optional[datetime] = None,
+              near: Optional[Tuple[float, float, float]] = None,
+              bbox: Optional[Tuple[float, float, float, float]] = None) -> List[SeismicData]:
+        """
+        Combina os filtros indicados intersetando as posições de cada índice
+
+        Args:
+            min_magnitude: Magnitude mínima
+            since: Instante mínimo (UTC)
+            near: (latitude, longitude, raio em km)
+            bbox: (min_lat, min_lon, max_lat, max_lon)
+
+        Returns:
+            Eventos que satisfazem todos os filtros, pela ordem original do catálogo
+        """
+        candidates = []
+        if min_magnitude is not None:
+            candidates.append(self.with_min_magnitude(min_magnitude))
+        if since is not None:
+            candidates.append(self.since(since))
+        if near is not None:
+            candidates.append(self.near(*near))
+        if bbox is not None:
+            candidates.append(self.within_bbox(*bbox))
+
+        if not candidates:
+            return list(self.events)
+
+        return [self.events[position] for position in intersect_positions(candidates)]
+
+
+class _IntervalNode:
+    """Nó de uma árvore de intervalos centrada"""
+
+    __slots__ = ("center", "by_start", "by_end", "left", "right")
+
+    def __init__(self, center, by_start, by_end, left, right):
+        self.center = center
+        self.by_start = by_start
+        self.by_end = by_end
+        self.left = left
+        self.right = right
+
+
+class IntervalIndex:
+    """
+    Árvore de intervalos centrada e estática: responde a "que intervalos
+    contêm o instante t" em O(log n + k)
+
+    Cada intervalo é um tuplo (início, fim, valor) com limites inclusivos.
+    """
+
+    def __init__(self, intervals: List[Tuple[datetime, datetime, int]]):
+        self._root = self._build([interval for interval in intervals if interval[0] <= interval[1]])
+
+    def _build(self, intervals):
+        if not intervals:
+            return None
+
+        endpoints = sorted(point for start, end, _ in intervals for point in (start, end))
+        center = endpoints[len(endpoints) // 2]
+
+        left = [interval for interval in intervals if interval[1] < center]
+        right = [interval for interval in intervals if interval[0] > center]
+        overlapping = [interval for interval in intervals if interval[0] <= center <= interval[1]]
+
+        return _IntervalNode(
+            center,
+            sorted(overlapping, key=lambda interval: interval[0]),
+            sorted(overlapping, key=lambda interval: interval[1], reverse=True),
+            self._build(left),
+            self._build(right)
+        )
+
+    def stab(self, at: datetime) -> List[int]:
+        """Valores dos intervalos que contêm o instante at"""
+        found = []
+        node = self._root
+
+        while node is not None:
+            if at < node.center:
+                for start, _, value in node.by_start:
+                    if start > at:
+                        break
+                    found.append(value)
+                node = node.left
+            elif at > node.center:
+                for _, end, value in node.by_end:
+                    if end < at:
+                        break
+                    found.append(value)
+                node = node.right
+            else:
+                found.extend(value for _, _, value in node.by_start)
+                break
+
+        return found
+
+
+class WarningIndex:
+    """Índices dos avisos meteorológicos por nível, por área (idAreaAviso) e por intervalo de vigência"""
+
+    def __init__(self, warnings: List[WeatherWarning]):
+        self.warnings = warnings
+        self.by_level: Dict[str, List[int]] = {}
+        self.by_area: Dict[str, List[int]] = {}
+        intervals = []
+
+        for position, warning in enumerate(warnings):
+            self.by_level.setdefault(warning.level.lower(), []).append(position)
+            self.by_area.setdefault(warning.id.upper(), []).append(position)
+
+            start, end = parse_timestamp(warning.start_time), parse_timestamp(warning.end_time)
+            if start is not None and end is not None:
+                intervals.append((start, end, position))
+
+        self._intervals = IntervalIndex(intervals)
+
+    def with_level(self, level: str) -> List[WeatherWarning]:
+        """Avisos de um nível (verde, amarelo, laranja, vermelho)"""
+        return [self.warnings[position] for position in self.by_level.get(level.lower(), [])]
+
+    def with_area(self, area: str) -> List[WeatherWarning]:
+        """Avisos de uma área de aviso (idAreaAviso, ex: LSB)"""
+        return [self.warnings[position] for position in self.by_area.get(area.upper(), [])]
+
+    def active_at(self, at: datetime, area: Optional[str] = None, level: Optional[str] = None) -> List[WeatherWarning]:
+        """Avisos em vigor no instante at, opcionalmente restritos a uma área e/ou nível"""
+        positions = set(self._intervals.stab(at))
+
+        if area is not None:
+            positions.intersection_update(self.by_area.get(area.upper(), []))
+        if level is not None:
+            positions.intersection_update(self.by_level.get(level.lower(), []))
+
+        return [self.warnings[position] for position in sorted(positions)]
+
+
+class LevelIndex:
+    """
+    Índices de previsões por nível, data e localidade (risco de incêndio, UV)
+
+    Além do balde de cada nível, guarda vistas cumulativas "nível >= n"
+    segundo a ordem dos níveis indicada.
+    """
+
+    def __init__(self, records: List[Any], level: Callable[[Any], Hashable], levels: Sequence[Hashable]):
+        self.records = records
+        self.by_level: Dict[Hashable, List[int]] = {value: [] for value in levels}
+        self.by_date: Dict[str, List[int]] = {}
+        self.by_location: Dict[str, List[int]] = {}
+
+        for position, record in enumerate(records):
+            self.by_level.setdefault(level(record), []).append(position)
+            self.by_date.setdefault(record.date[:10], []).append(position)
+            self.by_location.setdefault(record.location.lower(), []).append(position)
+
+        self.at_least: Dict[Hashable, List[int]] = {}
+        accumulated: List[int] = []
+        for value in reversed(levels):
+            accumulated = sorted(accumulated + self.by_level[value])
+            self.at_least[value] = accumulated
+
+    def query(self, level: Optional[Hashable] = None, min_level: Optional[Hashable] = None,
+              date: Optional[str] = None, location: Optional[str] = None) -> List[Any]:
+        """Registos que satisfazem todos os filtros indicados, pela ordem original"""
+        candidates = []
+        if level is not None:
+            candidates.append(self.by_level.get(level, []))
+        if min_level is not None:
+            candidates.append(self.at_least.get(min_level, []))
+        if date is not None:
+            candidates.append(self.by_date.get(date[:10], []))
+        if location is not None:
+            candidates.append(self.by_location.get(location.lower(), []))
+
+        if not candidates:
+            return list(self.records)
+
+        return [self.records[position] for position in intersect_positions(candidates)]
@@ -1,14 +1,32 @@
 import requests
+import heapq
 import json
+import math
 import csv
-from typing import List, Optional, Dict, Any
-from functools import lru_cache
+import contextvars
+from contextlib import contextmanager
+from typing import List, Optional, Dict, Any, Callable, Iterator
+from collections import Counter
+from itertools import accumulate
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from app.models import (
     DailyForecast, HourlyForecast, WeatherCondition, Location,
     WeatherWarning, SeismicData, SeaState, FireRisk, UVIndex,
-    WeatherStation, StationObservation, AgriculturalData, WaterQuality
+    WeatherStation, StationObservation, AgriculturalData, WaterQuality,
+    AgriculturalAggregate, SeismicStats, MagnitudeFrequencyBin, DailyEventCount, DepthBin,
+    DatasetChanges, DatasetChangesResponse, LocationBundle,
+    ForecastCell, ForecastDistrictGroup, ForecastQueryResult, DistrictDailySummary, DistrictForecastSummary
 )
+from app.services.spatial import PolygonIndex, SpatialIndex, geometry_bounds
+from app.services.cache import ttl_cache
+from app.services.export import encode_records
+from app.services.metrics import PARSE_DURATION, MeteredSession
+from app.services.tracing import span, traced, tracing_enabled
+from app.services.forecast_grid import ForecastGrid
+from app.services.indexes import LevelIndex, SeismicIndex, WarningIndex, parse_timestamp
+from app.services.seismic_catalog import SeismicCatalog
+from app.services.versioning import UnavailableRecords, VersionedDataset
 import logging
 
 logger = logging.getLogger(__name__)
@@ -18,48 +36,193 @@ class IPMAService:
     """Serviço completo para interação com TODOS os recursos da API do IPMA"""
 
     BASE_URL = "https://api.ipma.pt/open-data"
+    MAX_CONCURRENT_FETCHES = 8
+
+    # Tipo de dados agrícolas -> campo preenchido em AgriculturalData
+    AGRICULTURAL_DATASETS = {
+        "evapotranspiration": "evapotranspiration",
+        "precipitation": "precipitation",
+        "temperature_min": "min_temperature",
+        "temperature_max": "max_temperature",
+        "pdsi": "pdsi_index"
+    }
+
+    # Métricas agregáveis: as séries diretas mais graus-dia de crescimento (GDD)
+    AGRICULTURAL_AGGREGATES = ("evapotranspiration", "precipitation", "temperature_min",
+                               "temperature_max", "pdsi", "gdd")
+    AGGREGATION_PERIODS = ("week", "month", "rolling")
+    GDD_BASE_TEMPERATURE = 10.0
+
+    SEISMIC_REGIONS = ("continente", "acores", "madeira")
+    MAGNITUDE_BIN_WIDTH = 0.1
+    DEPTH_BIN_WIDTH = 5.0
+
+    FIRE_RISK_LEVELS = (1, 2, 3, 4, 5)
+    # Nome do nível UV no URL -> descrição, por ordem crescente de risco
+    UV_LEVELS = {
+        "baixo": "Baixo",
+        "moderado": "Moderado",
+        "alto": "Alto",
+        "muito_alto": "Muito Alto",
+        "extremo": "Extremo"
+    }
 
     def __init__(self):
-        self.session = requests.Session()
+        self.session = MeteredSession(self.BASE_URL)
         self.session.headers.update({
             'User-Agent': 'weather_api_ipma/2.0'
         })
+        self._derived: Dict[str, tuple] = {}
+        self._seismic_catalog: Optional[SeismicCatalog] = None
+        self._versioned: Dict[str, VersionedDataset] = {}
+
+    def _fetch_concurrently(self, calls: Dict[str, tuple]) -> Dict[str, Any]:
+        """Executa várias chamadas bloqueantes ao IPMA em paralelo e devolve os resultados por chave"""
+        with ThreadPoolExecutor(max_workers=self.MAX_CONCURRENT_FETCHES) as executor:
+            # Cada chamada corre numa cópia do contexto, para que os seus spans fiquem no trace do pedido
+            futures = {
+                key: executor.submit(contextvars.copy_context().run, func, *args) for key, (func, *args) in calls.items()
+            }
+            return {key: future.result() for key, future in futures.items()}
+
+    def _memoize_per_refresh(self, key: str, sources: List[Any], builder: Callable[[], Any]) -> Any:
+        """Memoiza um resultado derivado enquanto os dados de origem em cache não forem renovados"""
+        stamp = tuple(id(source) for source in sources)
+        cached = self._derived.get(key)
+
+        if cached is not None and cached[0] == stamp:
+            return cached[2]
+
+        value = builder()
+        # Guardar as fontes evita que os seus id() sejam reutilizados por outros objetos
+        self._derived[key] = (stamp, sources, value)
+        return value
+
+    # Conjuntos com versões e registo de diferenças -> chave de cada registo
+    VERSIONED_DATASETS: Dict[str, Callable[[Any], tuple]] = {
+        "warnings": lambda warning: (warning.id, warning.warning_type, warning.start_time),
+        "observations": lambda observation: (observation.station_id, observation.timestamp),
+        "fire_risk": lambda risk: (risk.date, risk.location),
+        "uv_index": lambda uv: (uv.date, uv.location)
+    }
+
+    def track_dataset_version(self, name: str, records: List[Any]) -> int:
+        """Regista uma renovação de um conjunto versionado e devolve a sua versão atual"""
+        dataset = self._versioned.get(name)
+        if dataset is None:
+            dataset = self._versioned[name] = VersionedDataset(name, self.VERSIONED_DATASETS[name])
+
+        # Só há novo cálculo de diferenças quando a lista em cache é renovada
+        return self._memoize_per_refresh(f"version:{name}", [records], lambda: dataset.update(records))
+
+    def get_dataset_changes(self, name: str, since_version: int, records: List[Any]) -> DatasetChangesResponse:
+        """Obtém as diferenças de um conjunto desde since_version, ou o conjunto completo se já não estiverem retidas"""
+        version = self.track_dataset_version(name, records)
+        dataset = self._versioned[name]
+        changes = dataset.changes_since(since_version)
+
+        if changes is None:
+            data = DatasetChanges(
+                dataset=name, version=version, since_version=since_version,
+                full_snapshot=True, inserted=dataset.snapshot()
+            )
+            message = f"Versão {since_version} indisponível: enviado conjunto completo (versão {version})"
+        else:
+            data = DatasetChanges(dataset=name, version=version, since_version=since_version, **changes)
+            message = (
+                f"Alterações {since_version} -> {version}: {len(data.inserted)} novos, "
+                f"{len(data.updated)} alterados, {len(data.removed)} removidos"
+            )
+
+        return DatasetChangesResponse(success=True, data=data, message=message)
+
+    @contextmanager
+    def _parsing(self, parser: str) -> Iterator[None]:
+        """Mede a descodificação e construção dos modelos de um parser (métrica e span ipma.parse)"""
+        with PARSE_DURATION.time(parser=parser), span("ipma.parse", parser=parser):
+            yield
+
+    def _decode_json(self, response: requests.Response) -> Any:
+        """Descodifica o corpo JSON de uma resposta do IPMA num span próprio"""
+        with span("ipma.decode") as current:
+            if tracing_enabled():
+                current.set_attribute("http.response.bytes", len(response.content))
+            return response.json()
+
+    def export_dataset(self, name: str, records: List[Any], model: type, fmt: str) -> bytes:
+        """Exportação em colunas (Arrow, Parquet ou CSV) de uma lista em cache, gerada uma vez por renovação"""
+        def build() -> bytes:
+            with span("export.encode", **{"export.dataset": name, "export.format": fmt, "export.records": len(records)}):
+                return encode_records(records, model, fmt)
+
+        return self._memoize_per_refresh(f"export:{name}:{fmt}", [records], build)
+
+    def export_agricultural_data(self, data_type: str, fmt: str) -> Optional[bytes]:
+        """Exporta um conjunto agrícola completo (ou "combined", os cinco unidos por data e concelho)"""
+        if data_type == "combined":
+            records = self._get_combined_agricultural_dataset()
+        elif data_type in self.AGRICULTURAL_DATASETS:
+            records = self._get_agricultural_dataset(data_type)
+        else:
+            return None
+        return self.export_dataset(f"agriculture:{data_type}", records, AgriculturalData, fmt)
+
+    def export_station_observations(self, fmt: str) -> bytes:
+        """Exporta as observações das últimas 24 horas de todas as estações"""
+        return self.export_dataset("observations", self.get_station_observations(), StationObservation, fmt)
+
+    def export_seismic_data(self, region: str, fmt: str) -> bytes:
+        """Exporta o catálogo sísmico de uma região (ou "all": as três regiões fundidas por ordem temporal)"""
+        region = region.lower()
+        records = self.get_all_seismic_data() if region == "all" else self.get_seismic_data(region)
+        return self.export_dataset(f"seismic:{region}", records, SeismicData, fmt)
 
     # ==================== MÉTODOS ORIGINAIS ====================
 
-    @lru_cache(maxsize=128, typed=True)
+    @ttl_cache("locations", maxsize=128, typed=True)
     def get_districts_and_locations(self) -> Dict[str, List[Location]]:
         """Obtém lista de distritos e localidades com cache"""
         try:
             response = self.session.get(f"{self.BASE_URL}/distrits-islands.json")
             response.raise_for_status()
 
-            data = response.json()
-            districts_locations = {}
-
-            for location_data in data.get('data', []):
-                district_name = self._get_district_name(location_data.get('idDistrito', 0))
-                if not district_name:
-                    continue
-
-                location = Location(
-                    id=location_data.get('globalIdLocal'),
-                    name=location_data.get('local', '').strip(),
-                    district=district_name
-                )
+            with self._parsing("locations"):
+                data = self._decode_json(response)
+                districts_locations = {}
+
+                for location_data in data.get('data', []):
+                    district_name = self._get_district_name(location_data.get('idDistrito', 0))
+                    if not district_name:
+                        continue
+
+                    location = Location(
+                        id=location_data.get('globalIdLocal'),
+                        name=location_data.get('local', '').strip(),
+                        district=district_name,
+                        latitude=self._parse_float(location_data.get('latitude')),
+                        longitude=self._parse_float(location_data.get('longitude')),
+                        warning_area=str(location_data['idAreaAviso']) if location_data.get('idAreaAviso') else None
+                    )
 
-                district_key = district_name.lower()
-                if district_key not in districts_locations:
-                    districts_locations[district_key] = []
+                    district_key = district_name.lower()
+                    if district_key not in districts_locations:
+                        districts_locations[district_key] = []
 
-                districts_locations[district_key].append(location)
+                    districts_locations[district_key].append(location)
 
-            return districts_locations
+                return districts_locations
 
         except Exception as e:
             logger.error(f"Erro ao obter distritos e localidades: {e}")
             return {}
 
+    def _parse_float(self, value: Any) -> Optional[float]:
+        """Converte valores numéricos do IPMA (muitas vezes em texto) para float"""
+        try:
+            return float(value)
+        except (TypeError, ValueError):
+            return None
+
     def _get_district_name(self, district_id: int) -> str:
         """Mapeia ID do distrito para nome"""
         district_map = {
@@ -74,7 +237,7 @@ class IPMAService:
         }
         return district_map.get(district_id, "")
 
-    @lru_cache(maxsize=256, typed=True)
+    @ttl_cache("reference", maxsize=256, typed=True)
     def get_weather_conditions(self) -> Dict[int, str]:
         """Obtém dicionário de condições meteorológicas com cache"""
         try:
@@ -95,41 +258,52 @@ class IPMAService:
 
     # ==================== NOVOS RECURSOS EXPANDIDOS ====================
 
-    @lru_cache(maxsize=64, typed=True)
+    @ttl_cache("warnings", maxsize=64, typed=True)
     def get_weather_warnings(self, days: int = 3) -> List[WeatherWarning]:
         """Obtém avisos meteorológicos até 3 dias"""
         try:
             response = self.session.get(f"{self.BASE_URL}/warnings/warnings_www.json")
             response.raise_for_status()
 
-            data = response.json()
-            warnings = []
-
-            for warning_data in data.get('data', []):
-                warning = WeatherWarning(
-                    id=str(warning_data.get('idAreaAviso', '')),
-                    area=warning_data.get('area', ''),
-                    warning_type=warning_data.get('awarenessTypeName', ''),
-                    level=self._get_warning_level(warning_data.get('awarenessLevelID', 0)),
-                    start_time=warning_data.get('startTime', ''),
-                    end_time=warning_data.get('endTime', ''),
-                    description=warning_data.get('text', ''),
-                    phenomenon=warning_data.get('phenomenon', '')
-                )
-                warnings.append(warning)
+            with self._parsing("warnings"):
+                data = self._decode_json(response)
+                warnings = []
+
+                for warning_data in data.get('data', []):
+                    warning = WeatherWarning(
+                        id=str(warning_data.get('idAreaAviso', '')),
+                        area=warning_data.get('area', ''),
+                        warning_type=warning_data.get('awarenessTypeName', ''),
+                        level=self._get_warning_level(warning_data.get('awarenessLevelID', 0)),
+                        start_time=warning_data.get('startTime', ''),
+                        end_time=warning_data.get('endTime', ''),
+                        description=warning_data.get('text', ''),
+                        phenomenon=warning_data.get('phenomenon', '')
+                    )
+                    warnings.append(warning)
 
-            return warnings
+                return warnings
 
         except Exception as e:
             logger.error(f"Erro ao obter avisos meteorológicos: {e}")
-            return []
+            return UnavailableRecords()
+
+    def refresh_weather_warnings(self) -> List[WeatherWarning]:
+        """Descarta a cache dos avisos e obtém a versão atual do IPMA"""
+        self.get_weather_warnings.cache_clear()
+        return self.get_weather_warnings()
+
+    def get_warning_index(self) -> WarningIndex:
+        """Índices dos avisos (nível, área e vigência), reconstruídos a cada renovação"""
+        warnings = self.get_weather_warnings()
+        return self._memoize_per_refresh("warnings_index", [warnings], lambda: WarningIndex(warnings))
 
     def _get_warning_level(self, level_id: int) -> str:
         """Mapeia ID do nível de aviso para texto"""
         levels = {1: "verde", 2: "amarelo", 3: "laranja", 4: "vermelho"}
         return levels.get(level_id, "desconhecido")
 
-    @lru_cache(maxsize=32, typed=True)
+    @ttl_cache("seismic", maxsize=32, typed=True)
     def get_seismic_data(self, region: str = "continente") -> List[SeismicData]:
         """Obtém dados sísmicos dos últimos 30 dias"""
         try:
@@ -139,89 +313,233 @@ class IPMAService:
                 "madeira": f"{self.BASE_URL}/earthquake/hp2-madeira.json"
             }
 
-            url = endpoints.get(region.lower(), endpoints["continente"])
-            response = self.session.get(url)
+            region_key = region.lower() if region.lower() in endpoints else "continente"
+            response = self.session.get(endpoints[region_key])
             response.raise_for_status()
 
-            data = response.json()
-            seismic_events = []
-
-            for event in data.get('data', []):
-                seismic_event = SeismicData(
-                    id=str(event.get('id', '')),
-                    magnitude=float(event.get('magnitude', 0)),
-                    depth=float(event.get('depth', 0)),
-                    location=event.get('location', ''),
-                    time=event.get('time', ''),
-                    coordinates={
-                        "latitude": float(event.get('lat', 0)),
-                        "longitude": float(event.get('lon', 0))
-                    },
-                    intensity=event.get('intensityID', None)
-                )
-                seismic_events.append(seismic_event)
+            with self._parsing("seismic"):
+                data = self._decode_json(response)
+                seismic_events = []
+
+                for event in data.get('data', []):
+                    seismic_event = SeismicData(
+                        id=str(event.get('id', '')),
+                        magnitude=float(event.get('magnitude', 0)),
+                        depth=float(event.get('depth', 0)),
+                        location=event.get('location', ''),
+                        time=event.get('time', ''),
+                        coordinates={
+                            "latitude": float(event.get('lat', 0)),
+                            "longitude": float(event.get('lon', 0))
+                        },
+                        intensity=event.get('intensityID', None),
+                        region=region_key
+                    )
+                    seismic_events.append(seismic_event)
 
+            # Cada renovação acrescenta ao catálogo os eventos ainda desconhecidos
+            self._ingest_seismic_events(region_key, seismic_events)
             return seismic_events
 
         except Exception as e:
             logger.error(f"Erro ao obter dados sísmicos: {e}")
             return []
 
-    @lru_cache(maxsize=32, typed=True)
+    def get_seismic_index(self, region: str = "continente") -> SeismicIndex:
+        """Índices do catálogo sísmico de uma região, reconstruídos a cada renovação"""
+        events = self.get_seismic_data(region)
+        return self._memoize_per_refresh(f"seismic_index:{region.lower()}", [events], lambda: SeismicIndex(events))
+
+    def get_all_seismic_data(self) -> List[SeismicData]:
+        """Obtém os catálogos das três regiões em paralelo, fundidos por ordem temporal decrescente"""
+        catalogs = self._fetch_concurrently({
+            region: (self.get_seismic_data, region) for region in self.SEISMIC_REGIONS
+        })
+
+        # Cada região é ordenada apenas quando o seu catálogo é renovado;
+        # a fusão das três listas já ordenadas é linear
+        sorted_catalogs = [
+            self._memoize_per_refresh(
+                f"seismic_sorted:{region}", [catalogs[region]],
+                lambda region=region: sorted(catalogs[region], key=self._seismic_sort_key, reverse=True)
+            )
+            for region in self.SEISMIC_REGIONS
+        ]
+
+        return self._memoize_per_refresh(
+            "seismic_all", sorted_catalogs, lambda: self._merge_seismic_catalogs(sorted_catalogs)
+        )
+
+    def _seismic_sort_key(self, event: SeismicData) -> tuple:
+        """Chave de ordenação temporal (usada em ordem inversa); eventos sem hora válida ficam no fim"""
+        timestamp = parse_timestamp(event.time)
+        return (timestamp is not None, timestamp or datetime.min)
+
+    def _merge_seismic_catalogs(self, sorted_catalogs: List[List[SeismicData]]) -> List[SeismicData]:
+        """Fusão k-way de catálogos ordenados, sem eventos repetidos (por id)"""
+        seen_ids = set()
+        merged = []
+
+        for event in heapq.merge(*sorted_catalogs, key=self._seismic_sort_key, reverse=True):
+            if event.id in seen_ids:
+                continue
+            seen_ids.add(event.id)
+            merged.append(event)
+
+        return merged
+
+    def get_seismic_stats(self, region: str = "continente") -> SeismicStats:
+        """Estatísticas do catálogo (Gutenberg-Richter, contagens diárias, profundidades), por renovação"""
+        region_key = region.lower()
+        events = self.get_all_seismic_data() if region_key == "all" else self.get_seismic_data(region_key)
+
+        return self._memoize_per_refresh(
+            f"seismic_stats:{region_key}", [events], lambda: self._compute_seismic_stats(region_key, events)
+        )
+
+    def _compute_seismic_stats(self, region: str, events: List[SeismicData]) -> SeismicStats:
+        """Agrupa magnitudes, dias e profundidades em classes inteiras e deriva Mc e o valor b"""
+        step = self.MAGNITUDE_BIN_WIDTH
+        magnitude_bins = Counter(round(event.magnitude / step) for event in events)
+        day_bins = Counter(event.time[:10] for event in events if event.time)
+        depth_bins = Counter(int(event.depth // self.DEPTH_BIN_WIDTH) for event in events)
+
+        magnitude_frequency = []
+        cumulative = len(events)
+        for bin_index in sorted(magnitude_bins):
+            magnitude_frequency.append(MagnitudeFrequencyBin(
+                magnitude=round(bin_index * step, 2),
+                count=magnitude_bins[bin_index],
+                cumulative=cumulative
+            ))
+            cumulative -= magnitude_bins[bin_index]
+
+        completeness = None
+        b_value = None
+        if magnitude_bins:
+            completeness_bin = max(magnitude_bins, key=lambda bin_index: (magnitude_bins[bin_index], -bin_index))
+            completeness = round(completeness_bin * step, 2)
+            above = [event.magnitude for event in events if round(event.magnitude / step) >= completeness_bin]
+            excess = sum(above) / len(above) - (completeness - step / 2)
+            if len(above) > 1 and excess > 0:
+                b_value = round(math.log10(math.e) / excess, 3)
+
+        return SeismicStats(
+            region=region,
+            total_events=len(events),
+            max_magnitude=max((event.magnitude for event in events), default=None),
+            completeness_magnitude=completeness,
+            b_value=b_value,
+            magnitude_frequency=magnitude_frequency,
+            daily_counts=[DailyEventCount(date=day, count=day_bins[day]) for day in sorted(day_bins)],
+            depth_histogram=[
+                DepthBin(
+                    min_depth=bin_index * self.DEPTH_BIN_WIDTH,
+                    max_depth=(bin_index + 1) * self.DEPTH_BIN_WIDTH,
+                    count=depth_bins[bin_index]
+                )
+                for bin_index in sorted(depth_bins)
+            ]
+        )
+
+    @property
+    def seismic_catalog(self) -> SeismicCatalog:
+        """Catálogo sísmico persistente, aberto na primeira utilização"""
+        if self._seismic_catalog is None:
+            self._seismic_catalog = SeismicCatalog()
+        return self._seismic_catalog
+
+    def _ingest_seismic_events(self, region: str, events: List[SeismicData]) -> int:
+        """Acrescenta ao catálogo persistente os eventos novos de uma renovação e devolve quantos entraram"""
+        try:
+            return self.seismic_catalog.ingest(events)
+        except Exception as e:
+            logger.error(f"Erro ao atualizar catálogo sísmico ({region}): {e}")
+            return 0
+
+    def get_seismic_history(self, region: Optional[str] = None, since: Optional[datetime] = None,
+                            until: Optional[datetime] = None, min_magnitude: Optional[float] = None,
+                            limit: int = 1000) -> List[SeismicData]:
+        """Obtém eventos do catálogo persistente, que vai além dos 30 dias do IPMA"""
+        return self.seismic_catalog.query(region, since, until, min_magnitude, limit)
+
+    @ttl_cache("sea_state", maxsize=32, typed=True)
     def get_sea_state(self, days: int = 3) -> List[SeaState]:
         """Obtém previsão do estado do mar até 3 dias"""
         try:
             response = self.session.get(f"{self.BASE_URL}/sea-conditions/hp-daily-sea-conditions-forecast.json")
             response.raise_for_status()
 
-            data = response.json()
-            sea_states = []
-
-            for forecast in data.get('data', []):
-                sea_state = SeaState(
-                    date=forecast.get('forecastDate', ''),
-                    location=forecast.get('location', ''),
-                    wave_height=forecast.get('significantWaveHeight'),
-                    wave_period=forecast.get('wavePeriod'),
-                    wave_direction=forecast.get('waveDirection'),
-                    sea_temperature=forecast.get('seaTemperature'),
-                    coastal_conditions=forecast.get('coastalConditions')
-                )
-                sea_states.append(sea_state)
+            with self._parsing("sea_state"):
+                data = self._decode_json(response)
+                sea_states = []
+
+                for forecast in data.get('data', []):
+                    sea_state = SeaState(
+                        date=forecast.get('forecastDate', ''),
+                        location=forecast.get('location', ''),
+                        wave_height=forecast.get('significantWaveHeight'),
+                        wave_period=forecast.get('wavePeriod'),
+                        wave_direction=forecast.get('waveDirection'),
+                        sea_temperature=forecast.get('seaTemperature'),
+                        coastal_conditions=forecast.get('coastalConditions')
+                    )
+                    sea_states.append(sea_state)
 
-            return sea_states
+                return sea_states
 
         except Exception as e:
             logger.error(f"Erro ao obter estado do mar: {e}")
             return []
 
-    @lru_cache(maxsize=64, typed=True)
+    def get_sea_state_by_location(self) -> Dict[str, List[SeaState]]:
+        """Previsões do estado do mar agrupadas por local (minúsculas), por renovação"""
+        sea_states = self.get_sea_state()
+
+        def build() -> Dict[str, List[SeaState]]:
+            by_location: Dict[str, List[SeaState]] = {}
+            for sea_state in sea_states:
+                by_location.setdefault(sea_state.location.lower(), []).append(sea_state)
+            return by_location
+
+        return self._memoize_per_refresh("sea_state_by_location", [sea_states], build)
+
+    @ttl_cache("fire_risk", maxsize=64, typed=True)
     def get_fire_risk(self, days: int = 2) -> List[FireRisk]:
         """Obtém previsão do risco de incêndio até 2 dias"""
         try:
             response = self.session.get(f"{self.BASE_URL}/fire-risk/hp-daily-fire-risk-forecast.json")
             response.raise_for_status()
 
-            data = response.json()
-            fire_risks = []
-
-            for risk_data in data.get('data', []):
-                fire_risk = FireRisk(
-                    date=risk_data.get('forecastDate', ''),
-                    location=risk_data.get('local', ''),
-                    risk_level=int(risk_data.get('riscoIncendio', 1)),
-                    risk_description=self._get_fire_risk_description(risk_data.get('riscoIncendio', 1)),
-                    temperature=risk_data.get('temperatura'),
-                    humidity=risk_data.get('humidade'),
-                    wind_speed=risk_data.get('vento')
-                )
-                fire_risks.append(fire_risk)
+            with self._parsing("fire_risk"):
+                data = self._decode_json(response)
+                fire_risks = []
+
+                for risk_data in data.get('data', []):
+                    fire_risk = FireRisk(
+                        date=risk_data.get('forecastDate', ''),
+                        location=risk_data.get('local', ''),
+                        risk_level=int(risk_data.get('riscoIncendio', 1)),
+                        risk_description=self._get_fire_risk_description(risk_data.get('riscoIncendio', 1)),
+                        temperature=risk_data.get('temperatura'),
+                        humidity=risk_data.get('humidade'),
+                        wind_speed=risk_data.get('vento')
+                    )
+                    fire_risks.append(fire_risk)
 
-            return fire_risks
+                return fire_risks
 
         except Exception as e:
             logger.error(f"Erro ao obter risco de incêndio: {e}")
-            return []
+            return UnavailableRecords()
+
+    def get_fire_risk_index(self) -> LevelIndex:
+        """Índices do risco de incêndio por nível (1-5), data e localidade, por renovação"""
+        fire_risks = self.get_fire_risk()
+        return self._memoize_per_refresh(
+            "fire_risk_index", [fire_risks],
+            lambda: LevelIndex(fire_risks, lambda risk: risk.risk_level, self.FIRE_RISK_LEVELS)
+        )
 
     def _get_fire_risk_description(self, level: int) -> str:
         """Mapeia nível de risco de incêndio para descrição"""
@@ -230,32 +548,41 @@ class IPMAService:
         }
         return descriptions.get(level, "Desconhecido")
 
-    @lru_cache(maxsize=64, typed=True)
+    @ttl_cache("uv_index", maxsize=64, typed=True)
     def get_uv_index(self, days: int = 3) -> List[UVIndex]:
         """Obtém previsão do índice UV até 3 dias"""
         try:
             response = self.session.get(f"{self.BASE_URL}/uv/hp-daily-uv-index-forecast.json")
             response.raise_for_status()
 
-            data = response.json()
-            uv_indices = []
-
-            for uv_data in data.get('data', []):
-                uv_value = int(uv_data.get('iuv', 0))
-                uv_index = UVIndex(
-                    date=uv_data.get('forecastDate', ''),
-                    location=uv_data.get('local', ''),
-                    uv_index=uv_value,
-                    uv_level=self._get_uv_level(uv_value),
-                    protection_time=self._get_protection_time(uv_value)
-                )
-                uv_indices.append(uv_index)
+            with self._parsing("uv_index"):
+                data = self._decode_json(response)
+                uv_indices = []
+
+                for uv_data in data.get('data', []):
+                    uv_value = int(uv_data.get('iuv', 0))
+                    uv_index = UVIndex(
+                        date=uv_data.get('forecastDate', ''),
+                        location=uv_data.get('local', ''),
+                        uv_index=uv_value,
+                        uv_level=self._get_uv_level(uv_value),
+                        protection_time=self._get_protection_time(uv_value)
+                    )
+                    uv_indices.append(uv_index)
 
-            return uv_indices
+                return uv_indices
 
         except Exception as e:
             logger.error(f"Erro ao obter índice UV: {e}")
-            return []
+            return UnavailableRecords()
+
+    def get_uv_level_index(self) -> LevelIndex:
+        """Índices do UV por nível de risco, data e localidade, por renovação"""
+        uv_indices = self.get_uv_index()
+        return self._memoize_per_refresh(
+            "uv_index_index", [uv_indices],
+            lambda: LevelIndex(uv_indices, lambda uv: uv.uv_level, list(self.UV_LEVELS.values()))
+        )
 
     def _get_uv_level(self, uv_index: int) -> str:
         """Mapeia índice UV para nível de risco"""
@@ -278,34 +605,54 @@ class IPMAService:
         }
         return protection_times.get(min(uv_index, 11), 5)
 
-    @lru_cache(maxsize=32, typed=True)
+    @ttl_cache("stations", maxsize=32, typed=True)
     def get_weather_stations(self) -> List[WeatherStation]:
         """Obtém lista de estações meteorológicas"""
         try:
             response = self.session.get(f"{self.BASE_URL}/weather-stations.json")
             response.raise_for_status()
 
-            data = response.json()
-            stations = []
-
-            for station_data in data.get('data', []):
-                station = WeatherStation(
-                    id=str(station_data.get('idEstacao', '')),
-                    name=station_data.get('nome', ''),
-                    coordinates={
-                        "latitude": float(station_data.get('latitude', 0)),
-                        "longitude": float(station_data.get('longitude', 0))
-                    },
-                    altitude=station_data.get('altitude')
-                )
-                stations.append(station)
+            with self._parsing("stations"):
+                data = self._decode_json(response)
+                stations = []
+
+                for station_data in data.get('data', []):
+                    station = WeatherStation(
+                        id=str(station_data.get('idEstacao', '')),
+                        name=station_data.get('nome', ''),
+                        coordinates={
+                            "latitude": float(station_data.get('latitude', 0)),
+                            "longitude": float(station_data.get('longitude', 0))
+                        },
+                        altitude=station_data.get('altitude')
+                    )
+                    stations.append(station)
 
-            return stations
+                return stations
 
         except Exception as e:
             logger.error(f"Erro ao obter estações meteorológicas: {e}")
             return []
 
+    def get_station_index(self) -> SpatialIndex:
+        """Índice espacial das estações, reconstruído a cada renovação da lista de estações"""
+        stations = self.get_weather_stations()
+        return self._memoize_per_refresh(
+            "stations_index", [stations],
+            lambda: SpatialIndex(stations, lambda station: (
+                station.coordinates.get("latitude"), station.coordinates.get("longitude")
+            ))
+        )
+
+    def find_nearest_stations(self, lat: float, lon: float, k: int = 1) -> List[tuple]:
+        """Obtém as k estações mais próximas de um ponto, com a distância em km"""
+        return self.get_station_index().nearest(lat, lon, k)
+
+    def find_stations_within(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[WeatherStation]:
+        """Obtém as estações dentro de um retângulo de latitude/longitude"""
+        return self.get_station_index().within_bbox(min_lat, min_lon, max_lat, max_lon)
+
+    @ttl_cache("observations", maxsize=64, typed=True)
     def get_station_observations(self, station_id: str = None) -> List[StationObservation]:
         """Obtém observações meteorológicas das últimas 24 horas"""
         try:
@@ -317,32 +664,47 @@ class IPMAService:
                 response = self.session.get(f"{self.BASE_URL}/observation/meteorology/stations/observations.json")
 
             response.raise_for_status()
-            data = response.json()
-            observations = []
-
-            for obs_data in data.get('data', []):
-                observation = StationObservation(
-                    station_id=str(obs_data.get('idEstacao', '')),
-                    station_name=obs_data.get('nomeEstacao', ''),
-                    timestamp=obs_data.get('time', ''),
-                    temperature=obs_data.get('temperatura'),
-                    humidity=obs_data.get('humidade'),
-                    pressure=obs_data.get('pressao'),
-                    wind_speed=obs_data.get('intensidadeVento'),
-                    wind_direction=obs_data.get('direcaoVento'),
-                    precipitation=obs_data.get('precipitacao'),
-                    visibility=obs_data.get('visibilidade')
-                )
-                observations.append(observation)
+            with self._parsing("observations"):
+                data = self._decode_json(response)
+                observations = []
+
+                for obs_data in data.get('data', []):
+                    observation = StationObservation(
+                        station_id=str(obs_data.get('idEstacao', '')),
+                        station_name=obs_data.get('nomeEstacao', ''),
+                        timestamp=obs_data.get('time', ''),
+                        temperature=obs_data.get('temperatura'),
+                        humidity=obs_data.get('humidade'),
+                        pressure=obs_data.get('pressao'),
+                        wind_speed=obs_data.get('intensidadeVento'),
+                        wind_direction=obs_data.get('direcaoVento'),
+                        precipitation=obs_data.get('precipitacao'),
+                        visibility=obs_data.get('visibilidade')
+                    )
+                    observations.append(observation)
 
-            return observations
+                return observations
 
         except Exception as e:
             logger.error(f"Erro ao obter observações de estações: {e}")
-            return []
+            return UnavailableRecords()
 
     def get_agricultural_data(self, data_type: str, municipality: str = None) -> List[AgriculturalData]:
         """Obtém dados agrícolas (evapotranspiração, precipitação, temperaturas, PDSI)"""
+        if data_type not in self.AGRICULTURAL_DATASETS:
+            logger.error(f"Tipo de dados agrícolas inválido: {data_type}")
+            return []
+
+        agricultural_data = self._get_agricultural_dataset(data_type)
+
+        if municipality is None:
+            return list(agricultural_data)
+
+        return [entry for entry in agricultural_data if entry.municipality.lower() == municipality.lower()]
+
+    @ttl_cache("agriculture", maxsize=16, typed=True)
+    def _get_agricultural_dataset(self, data_type: str) -> List[AgriculturalData]:
+        """Descarrega e processa o CSV completo de um tipo de dados agrícolas"""
         try:
             endpoints = {
                 "evapotranspiration": f"{self.BASE_URL}/climate/evapotranspiration",
@@ -352,80 +714,236 @@ class IPMAService:
                 "pdsi": f"{self.BASE_URL}/climate/pdsi"
             }
 
-            if data_type not in endpoints:
-                logger.error(f"Tipo de dados agrícolas inválido: {data_type}")
-                return []
-
             response = self.session.get(endpoints[data_type])
             response.raise_for_status()
 
-            # Processar CSV
-            agricultural_data = []
-            lines = response.text.strip().split('\n')
-
-            if len(lines) < 2:
-                return []
-
-            headers = lines[0].split(',')
-            for line in lines[1:]:
-                values = line.split(',')
-                if len(values) >= 3:
-                    data_entry = AgriculturalData(
-                        date=values[0] if len(values) > 0 else '',
-                        municipality=values[1] if len(values) > 1 else '',
-                        evapotranspiration=float(values[2]) if data_type == "evapotranspiration" and len(values) > 2 and values[2] else None,
-                        precipitation=float(values[2]) if data_type == "precipitation" and len(values) > 2 and values[2] else None,
-                        min_temperature=float(values[2]) if data_type == "temperature_min" and len(values) > 2 and values[2] else None,
-                        max_temperature=float(values[2]) if data_type == "temperature_max" and len(values) > 2 and values[2] else None,
-                        pdsi_index=float(values[2]) if data_type == "pdsi" and len(values) > 2 and values[2] else None
-                    )
-
-                    if municipality is None or data_entry.municipality.lower() == municipality.lower():
+            with self._parsing("agriculture"):
+                # Processar CSV
+                agricultural_data = []
+                lines = response.text.strip().split('\n')
+
+                if len(lines) < 2:
+                    return []
+
+                field = self.AGRICULTURAL_DATASETS[data_type]
+                for line in lines[1:]:
+                    values = line.split(',')
+                    if len(values) >= 3:
+                        data_entry = AgriculturalData(
+                            date=values[0],
+                            municipality=values[1],
+                            **{field: float(values[2]) if values[2] else None}
+                        )
                         agricultural_data.append(data_entry)
 
-            return agricultural_data
+                return agricultural_data
 
         except Exception as e:
             logger.error(f"Erro ao obter dados agrícolas: {e}")
             return []
 
-    @lru_cache(maxsize=16, typed=True)
+    def get_combined_agricultural_data(self, municipality: str = None) -> List[AgriculturalData]:
+        """Obtém os cinco conjuntos agrícolas em paralelo, unidos por (data, concelho)"""
+        combined = self._get_combined_agricultural_dataset()
+
+        if municipality is None:
+            return list(combined)
+
+        return [entry for entry in combined if entry.municipality.lower() == municipality.lower()]
+
+    def _get_combined_agricultural_dataset(self) -> List[AgriculturalData]:
+        """Junção dos cinco conjuntos agrícolas, recalculada apenas quando algum é renovado"""
+        datasets = self._fetch_concurrently({
+            data_type: (self._get_agricultural_dataset, data_type)
+            for data_type in self.AGRICULTURAL_DATASETS
+        })
+        sources = [datasets[data_type] for data_type in self.AGRICULTURAL_DATASETS]
+
+        return self._memoize_per_refresh(
+            "agriculture_combined", sources, lambda: self._join_agricultural_data(datasets)
+        )
+
+    def _join_agricultural_data(self, datasets: Dict[str, List[AgriculturalData]]) -> List[AgriculturalData]:
+        """Hash join dos conjuntos agrícolas pela chave (data, concelho)"""
+        rows: Dict[tuple, Dict[str, Any]] = {}
+
+        for data_type, entries in datasets.items():
+            field = self.AGRICULTURAL_DATASETS[data_type]
+            for entry in entries:
+                key = (entry.date, entry.municipality.lower())
+                row = rows.get(key)
+                if row is None:
+                    row = rows[key] = {"date": entry.date, "municipality": entry.municipality}
+                row[field] = getattr(entry, field)
+
+        return [AgriculturalData(**row) for row in rows.values()]
+
+    def get_agricultural_aggregates(self, metric: str, period: str, window: int = 7,
+                                    municipality: str = None) -> List[AgriculturalAggregate]:
+        """Agrega uma série agrícola por semana, mês ou janela móvel de N registos"""
+        if metric not in self.AGRICULTURAL_AGGREGATES:
+            logger.error(f"Métrica agrícola inválida: {metric}")
+            return []
+
+        if metric == "gdd":
+            # A lista memoizada da junção (a pública devolve uma cópia por chamada)
+            source = self._get_combined_agricultural_dataset()
+        else:
+            source = self._get_agricultural_dataset(metric)
+
+        memo_key = f"agriculture_aggregate:{metric}:{period}:{window if period == 'rolling' else ''}"
+        aggregates = self._memoize_per_refresh(
+            memo_key, [source], lambda: self._aggregate_agricultural_series(metric, source, period, window)
+        )
+
+        if municipality is None:
+            return list(aggregates)
+
+        return [entry for entry in aggregates if entry.municipality.lower() == municipality.lower()]
+
+    def _aggregate_agricultural_series(self, metric: str, source: List[AgriculturalData],
+                                       period: str, window: int) -> List[AgriculturalAggregate]:
+        """Calcula somas e médias por período com somas acumuladas por concelho"""
+        series: Dict[str, List[tuple]] = {}
+
+        for entry in source:
+            value = self._agricultural_metric_value(metric, entry)
+            if value is None:
+                continue
+            try:
+                day = datetime.strptime(entry.date[:10], '%Y-%m-%d').date()
+            except ValueError:
+                continue
+            series.setdefault(entry.municipality, []).append((day, value))
+
+        aggregates = []
+        for municipality_name, points in series.items():
+            points.sort(key=lambda point: point[0])
+            days = [point[0] for point in points]
+            prefix = [0.0] + list(accumulate(point[1] for point in points))
+
+            if period == "rolling":
+                spans = [(max(0, end - window), end) for end in range(1, len(points) + 1)]
+            else:
+                spans = self._period_spans(days, period)
+
+            for start, end in spans:
+                count = end - start
+                total = prefix[end] - prefix[start]
+                mean = total / count
+
+                trend = None
+                if period == "rolling" and end > window:
+                    previous_start = max(0, end - 2 * window)
+                    previous_end = end - window
+                    previous_mean = (prefix[previous_end] - prefix[previous_start]) / (previous_end - previous_start)
+                    trend = round(mean - previous_mean, 4)
+
+                aggregates.append(AgriculturalAggregate(
+                    municipality=municipality_name,
+                    metric=metric,
+                    period_start=days[start].isoformat(),
+                    period_end=days[end - 1].isoformat(),
+                    count=count,
+                    total=round(total, 4),
+                    mean=round(mean, 4),
+                    trend=trend
+                ))
+
+        return aggregates
+
+    def _agricultural_metric_value(self, metric: str, entry: AgriculturalData) -> Optional[float]:
+        """Extrai de um registo o valor usado numa métrica agregada"""
+        if metric == "gdd":
+            if entry.min_temperature is None or entry.max_temperature is None:
+                return None
+            mean_temperature = (entry.min_temperature + entry.max_temperature) / 2
+            return max(0.0, mean_temperature - self.GDD_BASE_TEMPERATURE)
+
+        return getattr(entry, self.AGRICULTURAL_DATASETS[metric])
+
+    def _period_spans(self, days: List[Any], period: str) -> List[tuple]:
+        """Divide datas ordenadas em intervalos [início, fim) por semana ISO ou mês"""
+        if period == "week":
+            period_key = lambda day: day.isocalendar()[:2]
+        else:
+            period_key = lambda day: (day.year, day.month)
+
+        spans = []
+        start = 0
+        for index in range(1, len(days) + 1):
+            if index == len(days) or period_key(days[index]) != period_key(days[start]):
+                spans.append((start, index))
+                start = index
+
+        return spans
+
+    @ttl_cache("water_quality", maxsize=16, typed=True)
     def get_water_quality(self) -> List[WaterQuality]:
         """Obtém interdições à apanha nas zonas de produção de moluscos bivalves"""
         try:
             response = self.session.get(f"{self.BASE_URL}/sea-conditions/bivalve-mollusk-zones.json")
             response.raise_for_status()
 
-            data = response.json()
-            water_quality_data = []
-
-            for zone_data in data.get('features', []):
-                properties = zone_data.get('properties', {})
-                geometry = zone_data.get('geometry', {})
-                coordinates = geometry.get('coordinates', [])
-
-                water_quality = WaterQuality(
-                    zone_id=str(properties.get('id', '')),
-                    zone_name=properties.get('nome', ''),
-                    status=properties.get('estado', ''),
-                    restriction_type=properties.get('tipo_restricao'),
-                    coordinates={
-                        "latitude": coordinates[1] if len(coordinates) >= 2 else 0,
-                        "longitude": coordinates[0] if len(coordinates) >= 1 else 0
-                    },
-                    last_update=properties.get('data_atualizacao', '')
-                )
-                water_quality_data.append(water_quality)
+            with self._parsing("water_quality"):
+                data = self._decode_json(response)
+                water_quality_data = []
+
+                for zone_data in data.get('features', []):
+                    properties = zone_data.get('properties', {})
+                    geometry = zone_data.get('geometry') or {}
+                    bounds = geometry_bounds(geometry)
+
+                    # Ponto representativo: centro do retângulo envolvente (Point, Polygon ou MultiPolygon)
+                    water_quality = WaterQuality(
+                        zone_id=str(properties.get('id', '')),
+                        zone_name=properties.get('nome', ''),
+                        status=properties.get('estado', ''),
+                        restriction_type=properties.get('tipo_restricao'),
+                        coordinates={
+                            "latitude": (bounds[0] + bounds[2]) / 2 if bounds else 0,
+                            "longitude": (bounds[1] + bounds[3]) / 2 if bounds else 0
+                        },
+                        geometry=geometry or None,
+                        last_update=properties.get('data_atualizacao', '')
+                    )
+                    water_quality_data.append(water_quality)
 
-            return water_quality_data
+                return water_quality_data
 
         except Exception as e:
             logger.error(f"Erro ao obter qualidade da água: {e}")
             return []
 
+    def get_water_quality_index(self) -> Dict[str, Any]:
+        """
+        Índices das zonas de moluscos bivalves, por renovação: polígonos numa
+        grelha de retângulos envolventes e zonas agrupadas por estado
+        """
+        zones = self.get_water_quality()
+
+        def build() -> Dict[str, Any]:
+            by_status: Dict[str, List[WaterQuality]] = {}
+            for zone in zones:
+                by_status.setdefault(zone.status.lower(), []).append(zone)
+            return {
+                "polygons": PolygonIndex(zones, lambda zone: zone.geometry),
+                "by_status": by_status
+            }
+
+        return self._memoize_per_refresh("water_quality_index", [zones], build)
+
+    def get_water_quality_by_status(self, status: str) -> List[WaterQuality]:
+        """Zonas de moluscos bivalves com um estado (aberta, fechada, condicional)"""
+        return list(self.get_water_quality_index()["by_status"].get(status.lower(), []))
+
+    def find_water_quality_zones(self, lat: float, lon: float) -> List[WaterQuality]:
+        """Zonas de moluscos bivalves cujo polígono contém o ponto indicado"""
+        return self.get_water_quality_index()["polygons"].containing(lat, lon)
+
     # ==================== MÉTODOS AUXILIARES EXPANDIDOS ====================
 
-    @lru_cache(maxsize=32, typed=True)
+    @ttl_cache("reference", maxsize=32, typed=True)
     def get_wind_intensity_classes(self) -> Dict[int, str]:
         """Obtém classes de intensidade do vento"""
         try:
@@ -444,7 +962,7 @@ class IPMAService:
             logger.error(f"Erro ao obter classes de intensidade do vento: {e}")
             return {}
 
-    @lru_cache(maxsize=32, typed=True)
+    @ttl_cache("reference", maxsize=32, typed=True)
     def get_precipitation_classes(self) -> Dict[int, str]:
         """Obtém classes de precipitação"""
         try:
@@ -465,8 +983,8 @@ class IPMAService:
 
     # ==================== MÉTODOS ORIGINAIS MANTIDOS ====================
 
-    def find_location_id(self, district: str, location: str) -> Optional[int]:
-        """Encontra o ID de uma localidade específica"""
+    def find_location(self, district: str, location: str) -> Optional[Location]:
+        """Encontra uma localidade específica de um distrito"""
         districts_locations = self.get_districts_and_locations()
 
         district_key = district.lower().strip()
@@ -477,10 +995,15 @@ class IPMAService:
 
         for loc in districts_locations[district_key]:
             if loc.name.lower().strip() == location_name:
-                return loc.id
+                return loc
 
         return None
 
+    def find_location_id(self, district: str, location: str) -> Optional[int]:
+        """Encontra o ID de uma localidade específica"""
+        loc = self.find_location(district, location)
+        return loc.id if loc else None
+
     def get_locations_by_district(self, district: str) -> List[Location]:
         """Obtém todas as localidades de um distrito"""
         districts_locations = self.get_districts_and_locations()
@@ -488,19 +1011,38 @@ class IPMAService:
 
         return districts_locations.get(district_key, [])
 
-    @lru_cache(maxsize=512, typed=True)
+    def get_location_index(self) -> SpatialIndex:
+        """Índice espacial das localidades de previsão, reconstruído a cada renovação"""
+        districts_locations = self.get_districts_and_locations()
+
+        def build() -> SpatialIndex:
+            locations = [loc for district_locations in districts_locations.values() for loc in district_locations]
+            return SpatialIndex(locations, lambda loc: (
+                (loc.latitude, loc.longitude) if loc.latitude is not None and loc.longitude is not None else None
+            ))
+
+        return self._memoize_per_refresh("locations_index", [districts_locations], build)
+
+    def find_nearest_location(self, lat: float, lon: float) -> Optional[tuple]:
+        """Encontra a localidade de previsão mais próxima de um ponto, com a distância em km"""
+        nearest = self.get_location_index().nearest(lat, lon, 1)
+        return nearest[0] if nearest else None
+
+    @ttl_cache("forecasts", maxsize=2048, typed=True)
     def get_forecast(self, location_id: int, days: int = 5) -> Optional[Dict[str, Any]]:
         """Obtém previsão meteorológica para uma localidade com cache"""
         try:
             response = self.session.get(f"{self.BASE_URL}/forecast/meteorology/cities/daily/{location_id}.json")
             response.raise_for_status()
 
-            return response.json()
+            return self._decode_json(response)
 
         except Exception as e:
             logger.error(f"Erro ao obter previsão para localidade {location_id}: {e}")
             return None
 
+    @PARSE_DURATION.timed(parser="forecast")
+    @traced("ipma.parse", parser="forecast")
     def parse_forecast_data(self, raw_data: Dict[str, Any], district: str, location: str, target_date: Optional[str] = None) -> Optional[DailyForecast]:
         """Converte dados brutos da API em modelo DailyForecast"""
         if not raw_data or 'data' not in raw_data:
@@ -583,3 +1125,142 @@ class IPMAService:
             return None
 
         return self.parse_forecast_data(raw_data, district, location, target_date)
+
+    def get_forecast_grid(self) -> ForecastGrid:
+        """
+        Previsões diárias de todas as localidades em colunas (data x localidade),
+        reconstruídas quando a lista de localidades ou alguma previsão for renovada
+        """
+        districts_locations = self.get_districts_and_locations()
+        locations = [loc for district_locations in districts_locations.values() for loc in district_locations]
+        payloads = self._fetch_concurrently({loc.id: (self.get_forecast, loc.id) for loc in locations})
+
+        return self._memoize_per_refresh(
+            "forecast_grid", [districts_locations, *payloads.values()],
+            lambda: ForecastGrid(locations, payloads)
+        )
+
+    def get_district_forecast_summaries(self) -> Dict[str, DistrictForecastSummary]:
+        """Resumos diários da previsão de cada distrito (chave em minúsculas), calculados uma vez por renovação"""
+        grid = self.get_forecast_grid()
+
+        def build() -> Dict[str, DistrictForecastSummary]:
+            weather_conditions = self.get_weather_conditions()
+            summaries = {}
+
+            for district, days in grid.district_summaries().items():
+                daily = []
+                for day in days:
+                    weather_type = day.pop("dominant_weather_type")
+                    dominant = None
+                    if weather_type is not None:
+                        dominant = WeatherCondition(
+                            id=weather_type,
+                            description=weather_conditions.get(weather_type, 'Desconhecido')
+                        )
+                    daily.append(DistrictDailySummary(dominant_weather=dominant, **day))
+
+                summaries[district.lower()] = DistrictForecastSummary(district=district, days=daily)
+
+            return summaries
+
+        return self._memoize_per_refresh("forecast_district_summaries", [grid], build)
+
+    def query_forecasts(self, variable: str, dates: Optional[List[str]] = None, op: Optional[str] = None,
+                        value: Optional[float] = None, top: Optional[int] = None, largest: bool = True,
+                        group_by_district: bool = False) -> ForecastQueryResult:
+        """
+        Consulta as previsões de todas as localidades
+
+        Args:
+            variable: Variável (max_temperature, min_temperature, precipitation_probability, weather_type)
+            dates: Datas YYYY-MM-DD a considerar (todas se None)
+            op: Comparação do limiar (gt, ge, lt, le)
+            value: Valor do limiar
+            top: Devolver apenas as top células por valor
+            largest: Ordem do top (maiores ou menores valores)
+            group_by_district: Agregar as células por distrito em vez de as listar
+
+        Returns:
+            ForecastQueryResult com as células ou os grupos por distrito
+        """
+        grid = self.get_forecast_grid()
+        cells = grid.cells(variable, dates, op, value)
+        selected_dates = [grid.dates[position] for position in grid.date_positions(dates)]
+
+        if group_by_district:
+            groups = [ForecastDistrictGroup(**group) for group in grid.group_by_district(cells)]
+            return ForecastQueryResult(variable=variable, dates=selected_dates, groups=groups)
+
+        if top is not None:
+            cells = grid.top_k(cells, top, largest)
+
+        matches = [
+            ForecastCell(
+                location_id=grid.locations[position].id,
+                location=grid.locations[position].name,
+                district=grid.locations[position].district,
+                date=grid.dates[date_position],
+                value=cell_value
+            )
+            for position, date_position, cell_value in cells
+        ]
+        return ForecastQueryResult(variable=variable, dates=selected_dates, matches=matches)
+
+    def get_location_bundle(self, district: str, location: str, target_date: Optional[str] = None) -> Optional[LocationBundle]:
+        """
+        Reúne num só resultado os dados de uma localidade: previsão, avisos da
+        sua área, risco de incêndio, índice UV e estado do mar
+
+        A localidade é resolvida uma vez; a previsão e os índices de cada
+        conjunto são obtidos em paralelo e consultados apenas para essa localidade.
+
+        Returns:
+            LocationBundle, ou None se a localidade não existir no distrito
+        """
+        loc = self.find_location(district, location)
+        if not loc:
+            return None
+
+        results = self._fetch_concurrently({
+            "forecast": (self.get_forecast, loc.id),
+            "warnings": (self.get_warning_index,),
+            "fire_risk": (self.get_fire_risk_index,),
+            "uv_index": (self.get_uv_level_index,),
+            "sea_state": (self.get_sea_state_by_location,)
+        })
+
+        forecast = None
+        if results["forecast"]:
+            forecast = self.parse_forecast_data(results["forecast"], loc.district, loc.name, target_date)
+
+        # Apenas os avisos em vigor (já iniciados e ainda não terminados), como em /warnings/active
+        warnings = results["warnings"].active_at(datetime.utcnow(), loc.warning_area) if loc.warning_area else []
+
+        return LocationBundle(
+            location=loc,
+            forecast=forecast,
+            warnings=warnings,
+            fire_risk=results["fire_risk"].query(date=target_date, location=loc.name),
+            uv_index=results["uv_index"].query(date=target_date, location=loc.name),
+            sea_state=[
+                sea_state for sea_state in results["sea_state"].get(loc.name.lower(), [])
+                if not target_date or sea_state.date.startswith(target_date)
+            ]
+        )
+
+    def get_forecast_for_coordinates(self, lat: float, lon: float, target_date: Optional[str] = None) -> Optional[tuple]:
+        """Obtém a previsão da localidade mais próxima de um ponto: (previsão, localidade, distância km)"""
+        nearest = self.find_nearest_location(lat, lon)
+
+        if not nearest:
+            return None
+
+        location, distance = nearest
+        raw_data = self.get_forecast(location.id)
+
+        if not raw_data:
+            return None
+
+        forecast = self.parse_forecast_data(raw_data, location.district, location.name, target_date)
+        return forecast, location, distance
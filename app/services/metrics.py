@@ -0,0 +1,289 @@
+import re
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+import requests
+from app.services.cache import registered_caches
+from app.services.tracing import SPAN_KIND_CLIENT, span, tracing_enabled
+
+# Limites (segundos) dos histogramas de latência
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Limites (bytes) do histograma de tamanho das respostas do IPMA
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if value != int(value) else str(int(value))
+
+
+class _Metric:
+    """Métrica com etiquetas; os valores são guardados por tuplo de valores das etiquetas"""
+
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} requer as etiquetas {', '.join(self.labelnames)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        header = f"# HELP {self.name} {self.documentation}\n# TYPE {self.name} {self.kind}\n"
+        return header + "".join(f"{line}\n" for line in self.samples())
+
+
+class Counter(_Metric):
+    """Contador monotónico"""
+
+    kind = "counter"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    """Valor que sobe e desce (ex: pedidos em curso)"""
+
+    kind = "gauge"
+
+    def dec(self, amount: float = 1, **labels: str) -> None:
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track_inprogress(self, **labels: str) -> Iterator[None]:
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Histograma cumulativo com limites fixos, soma e contagem"""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        self._values: Dict[LabelValues, List[float]] = {}  # [contagens por limite..., soma]
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [0] * len(self.buckets) + [0.0]
+            for index, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[index] += 1
+                    break
+            state[-1] += value
+
+    @contextmanager
+    def time(self, **labels: str) -> Iterator[None]:
+        """Mede a duração do bloco em segundos"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def timed(self, **labels: str) -> Callable:
+        """Decorador que mede a duração de cada chamada em segundos"""
+        def decorator(func: Callable) -> Callable:
+            @wraps(func)
+            def wrapper(*args, **kwargs):
+                with self.time(**labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    def count(self, **labels: str) -> int:
+        state = self._values.get(self._key(labels))
+        return sum(state[:-1]) if state else 0
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = sorted((key, list(state)) for key, state in self._values.items())
+        for key, state in items:
+            cumulative = 0
+            for bound, count in zip(self.buckets, state[:-1]):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            yield f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(state[-1])}"
+            yield f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}"
+
+
+class MetricsRegistry:
+    """Conjunto de métricas e de coletores (funções que geram métricas no momento da recolha)"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Callable[[], Sequence[_Metric]]] = []
+
+    def register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Métrica {metric.name} já registada")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self.register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self.register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self.register(Histogram(name, documentation, labelnames, buckets))
+
+    def add_collector(self, collector: Callable[[], Sequence[_Metric]]) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Todas as métricas no formato de texto do Prometheus (versão 0.0.4)"""
+        metrics = list(self._metrics.values())
+        for collector in self._collectors:
+            metrics.extend(collector())
+        return "".join(metric.render() for metric in metrics)
+
+
+REGISTRY = MetricsRegistry()
+
+UPSTREAM_LATENCY = REGISTRY.histogram(
+    "ipma_upstream_request_duration_seconds", "Duração dos pedidos à API do IPMA, incluindo o corpo",
+    ["endpoint", "status"]
+)
+UPSTREAM_RESPONSE_SIZE = REGISTRY.histogram(
+    "ipma_upstream_response_size_bytes", "Tamanho do corpo das respostas da API do IPMA",
+    ["endpoint"], buckets=SIZE_BUCKETS
+)
+PARSE_DURATION = REGISTRY.histogram(
+    "ipma_parse_duration_seconds", "Duração da descodificação e construção dos modelos por parser",
+    ["parser"]
+)
+HTTP_REQUEST_DURATION = REGISTRY.histogram(
+    "http_request_duration_seconds", "Duração dos pedidos HTTP servidos, por rota",
+    ["method", "route", "status"]
+)
+HTTP_REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    "http_requests_in_flight", "Pedidos HTTP em curso, por grupo de rotas",
+    ["group"]
+)
+
+
+def _collect_cache_metrics() -> Sequence[_Metric]:
+    """Acertos, falhas, entradas expiradas e despejos das caches TTL, somados por conjunto de dados"""
+    requests_total = Counter(
+        "ipma_cache_requests_total", "Consultas às caches TTL do serviço, por resultado", ["dataset", "result"]
+    )
+    evictions = Counter("ipma_cache_evictions_total", "Entradas despejadas por excesso de tamanho", ["dataset"])
+    entries = Gauge("ipma_cache_entries", "Entradas atualmente em cache", ["dataset"])
+
+    for cached in registered_caches():
+        info = cached.cache_info()
+        dataset = cached.dataset
+        requests_total.inc(info.hits, dataset=dataset, result="hit")
+        requests_total.inc(info.misses, dataset=dataset, result="miss")
+        requests_total.inc(info.stale, dataset=dataset, result="stale")
+        evictions.inc(info.evictions, dataset=dataset)
+        entries.inc(info.currsize, dataset=dataset)
+
+    return [requests_total, evictions, entries]
+
+
+REGISTRY.add_collector(_collect_cache_metrics)
+
+_NUMERIC_SEGMENT = re.compile(r"/\d+(?=\.json$|/|$)")
+
+
+def upstream_endpoint(url: str, base_url: Optional[str] = None) -> str:
+    """Caminho do endpoint do IPMA com identificadores numéricos agregados (ex: cities/daily/{id}.json)"""
+    path = urlsplit(url).path
+    if base_url:
+        base_path = urlsplit(base_url).path.rstrip("/")
+        if path.startswith(base_path):
+            path = path[len(base_path):]
+    return _NUMERIC_SEGMENT.sub("/{id}", path)
+
+
+class MeteredSession(requests.Session):
+    """requests.Session que regista a latência e o tamanho de cada resposta por endpoint"""
+
+    def __init__(self, base_url: Optional[str] = None):
+        super().__init__()
+        self.base_url = base_url
+
+    def request(self, method, url, *args, **kwargs):
+        endpoint = upstream_endpoint(url, self.base_url)
+        attributes = {"http.method": method, "http.url": url, "ipma.endpoint": endpoint}
+
+        with span("ipma.fetch", kind=SPAN_KIND_CLIENT, **attributes) as current:
+            start = time.perf_counter()
+            try:
+                response = super().request(method, url, *args, **kwargs)
+            except requests.RequestException:
+                UPSTREAM_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint, status="error")
+                raise
+
+            UPSTREAM_LATENCY.observe(time.perf_counter() - start, endpoint=endpoint, status=str(response.status_code))
+            if not kwargs.get("stream"):
+                UPSTREAM_RESPONSE_SIZE.observe(len(response.content), endpoint=endpoint)
+
+            if tracing_enabled():
+                current.set_attribute("http.status_code", response.status_code)
+                # O requests não expõe DNS/ligação/TLS; elapsed vai do envio até aos cabeçalhos da resposta
+                current.set_attribute("http.time_to_headers_ms", round(response.elapsed.total_seconds() * 1000, 3))
+                if not kwargs.get("stream"):
+                    current.set_attribute("http.response.bytes", len(response.content))
+            return response
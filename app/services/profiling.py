@@ -0,0 +1,163 @@
+import cProfile
+import io
+import marshal
+import os
+import pstats
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+# Token de administração que ativa o perfilamento de um pedido (cabeçalho X-Profile);
+# sem token e sem amostragem o perfilamento fica desligado
+PROFILING_TOKEN: Optional[str] = os.getenv("PROFILING_TOKEN") or None
+
+# Fração (0 a 1) dos pedidos perfilados por amostragem, guardados sem alterar a resposta
+PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+
+# Diretório opcional onde cada perfil é também gravado em formato pstats (<id>.prof)
+PROFILING_DIR: Optional[str] = os.getenv("PROFILING_DIR") or None
+
+# Etapa -> funções (fim do caminho do ficheiro, nome) cujo tempo acumulado lhe é atribuído
+PROFILE_STAGES: Dict[str, Tuple[Tuple[str, str], ...]] = {
+    # No thread do pedido, a espera pelas obtenções paralelas (_fetch_concurrently) aparece em result()
+    "upstream": (("requests/sessions.py", "request"), ("concurrent/futures/_base.py", "result")),
+    "json_decode": (("json/__init__.py", "loads"),),
+    "model_build": (("pydantic/main.py", "__init__"),),
+    "serialization": (
+        ("fastapi/routing.py", "serialize_response"), ("fastapi/encoders.py", "jsonable_encoder"),
+        ("starlette/responses.py", "render"), ("pydantic/main.py", "model_dump_json"),
+        ("pydantic/main.py", "model_dump")
+    )
+}
+
+StatsKey = Tuple[str, int, str]
+
+
+class StoredProfile(NamedTuple):
+    """Perfil de um pedido: tempos por etapa (ms) e estatísticas cProfile em bruto"""
+    id: str
+    method: str
+    path: str
+    status: int
+    started_at: float
+    duration_ms: float
+    breakdown: Dict[str, float]
+    sampled: bool
+    stats: bytes  # marshal das estatísticas, legível por pstats.Stats
+
+
+def _matches(func: StatsKey, targets: Sequence[Tuple[str, str]]) -> bool:
+    filename = func[0].replace(os.sep, "/")
+    return any(func[2] == name and filename.endswith(suffix) for suffix, name in targets)
+
+
+def stage_breakdown(stats: Dict[StatsKey, tuple], total_seconds: float) -> Dict[str, float]:
+    """
+    Tempo (ms) de cada etapa de PROFILE_STAGES e o restante em "other"
+
+    Só conta as chamadas feitas por funções de fora da etapa, para que funções
+    da mesma etapa encadeadas (ex: serialize_response -> jsonable_encoder) não
+    sejam somadas duas vezes.
+    """
+    breakdown: Dict[str, float] = {}
+    for stage, targets in PROFILE_STAGES.items():
+        seconds = 0.0
+        for func, (_, _, _, _, callers) in stats.items():
+            if not _matches(func, targets):
+                continue
+            for caller, edge in callers.items():
+                if not _matches(caller, targets):
+                    seconds += edge[3]
+        breakdown[stage] = round(seconds * 1000, 3)
+
+    breakdown["other"] = round(max(total_seconds * 1000 - sum(breakdown.values()), 0.0), 3)
+    return breakdown
+
+
+class _StatsSource:
+    """Adaptador para pstats.Stats carregar estatísticas já recolhidas"""
+
+    def __init__(self, stats: Dict[StatsKey, tuple]):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+def stats_report(profile: StoredProfile, limit: int = 40, sort: str = "cumulative") -> str:
+    """Relatório de texto do pstats com as limit funções de maior tempo"""
+    stats = pstats.Stats(_StatsSource(marshal.loads(profile.stats)), stream=io.StringIO())
+    stats.sort_stats(sort).print_stats(limit)
+    return stats.stream.getvalue()
+
+
+class ProfileStore:
+    """Últimos perfis recolhidos, em memória (limitados a max_profiles) e opcionalmente em disco"""
+
+    def __init__(self, max_profiles: int = 50, output_dir: Optional[str] = PROFILING_DIR):
+        self.max_profiles = max_profiles
+        self.output_dir = output_dir
+        self._profiles: "OrderedDict[str, StoredProfile]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, profile: StoredProfile) -> None:
+        with self._lock:
+            self._profiles[profile.id] = profile
+            while len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+
+        if self.output_dir:
+            os.makedirs(self.output_dir, exist_ok=True)
+            with open(os.path.join(self.output_dir, f"{profile.id}.prof"), "wb") as handle:
+                handle.write(profile.stats)
+
+    def get(self, profile_id: str) -> Optional[StoredProfile]:
+        return self._profiles.get(profile_id)
+
+    def list(self) -> List[StoredProfile]:
+        """Perfis guardados, do mais recente para o mais antigo"""
+        with self._lock:
+            return list(reversed(self._profiles.values()))
+
+
+PROFILE_STORE = ProfileStore()
+
+# O cProfile regista um único perfil ativo por thread; pedidos concorrentes no
+# mesmo ciclo de eventos não são perfilados enquanto outro perfil decorre
+_active = threading.Lock()
+
+
+class RequestProfiler:
+    """Perfil cProfile de um pedido, entre start() e stop()"""
+
+    def __init__(self):
+        self._profiler = cProfile.Profile()
+        self._started = 0.0
+
+    @staticmethod
+    def acquire() -> bool:
+        return _active.acquire(blocking=False)
+
+    def start(self) -> None:
+        self._started = time.perf_counter()
+        self._profiler.enable()
+
+    def stop(self, method: str, path: str, status: int, sampled: bool) -> StoredProfile:
+        self._profiler.disable()
+        total = time.perf_counter() - self._started
+        _active.release()
+
+        self._profiler.create_stats()
+        return StoredProfile(
+            id=uuid.uuid4().hex[:16],
+            method=method,
+            path=path,
+            status=status,
+            started_at=time.time() - total,
+            duration_ms=round(total * 1000, 3),
+            breakdown=stage_breakdown(self._profiler.stats, total),
+            sampled=sampled,
+            stats=marshal.dumps(self._profiler.stats)
+        )
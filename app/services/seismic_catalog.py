@@ -0,0 +1,135 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, List, Optional
+from app.models import SeismicData
+from app.services.indexes import parse_timestamp
+import logging
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CATALOG_PATH = "seismic_catalog.sqlite3"
+
+
+class SeismicCatalog:
+    """
+    Catálogo sísmico persistente em SQLite, apenas de acréscimo
+
+    Os feeds do IPMA cobrem só os últimos 30 dias; cada ingestão insere apenas
+    os eventos cujo id ainda não existe, pelo que o histórico cresce para lá
+    dessa janela e pode ser consultado pelos índices locais (região/tempo e magnitude).
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.getenv("SEISMIC_CATALOG_PATH", DEFAULT_CATALOG_PATH)
+
+        directory = os.path.dirname(self.path)
+        if directory and self.path != ":memory:":
+            os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.executescript("""
+            CREATE TABLE IF NOT EXISTS seismic_events (
+                id TEXT PRIMARY KEY,
+                region TEXT,
+                time TEXT,
+                event_time TEXT,
+                magnitude REAL,
+                depth REAL,
+                latitude REAL,
+                longitude REAL,
+                location TEXT,
+                intensity TEXT,
+                ingested_at TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_seismic_region_time ON seismic_events (region, event_time);
+            CREATE INDEX IF NOT EXISTS idx_seismic_time ON seismic_events (event_time);
+            CREATE INDEX IF NOT EXISTS idx_seismic_magnitude ON seismic_events (magnitude);
+        """)
+
+        self._known_ids = {row[0] for row in self._connection.execute("SELECT id FROM seismic_events")}
+
+    def ingest(self, events: Iterable[SeismicData]) -> int:
+        """Insere os eventos ainda desconhecidos e devolve quantos foram acrescentados"""
+        with self._lock:
+            ingested_at = datetime.utcnow().isoformat(timespec='seconds')
+            rows = {}
+
+            for event in events:
+                if not event.id or event.id in self._known_ids or event.id in rows:
+                    continue
+
+                event_time = parse_timestamp(event.time)
+                rows[event.id] = (
+                    event.id,
+                    event.region,
+                    event.time,
+                    event_time.isoformat() if event_time else None,
+                    event.magnitude,
+                    event.depth,
+                    event.coordinates.get("latitude"),
+                    event.coordinates.get("longitude"),
+                    event.location,
+                    event.intensity,
+                    ingested_at
+                )
+
+            if not rows:
+                return 0
+
+            with self._connection:
+                self._connection.executemany(
+                    "INSERT OR IGNORE INTO seismic_events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                    rows.values()
+                )
+
+            self._known_ids.update(rows)
+            logger.info(f"Catálogo sísmico: {len(rows)} eventos novos ({len(self._known_ids)} no total)")
+            return len(rows)
+
+    def query(self, region: Optional[str] = None, since: Optional[datetime] = None,
+              until: Optional[datetime] = None, min_magnitude: Optional[float] = None,
+              limit: int = 1000) -> List[SeismicData]:
+        """Consulta o histórico, por ordem temporal decrescente"""
+        clauses, params = [], []
+
+        if region is not None:
+            clauses.append("region = ?")
+            params.append(region.lower())
+        if since is not None:
+            clauses.append("event_time >= ?")
+            params.append(since.isoformat())
+        if until is not None:
+            clauses.append("event_time <= ?")
+            params.append(until.isoformat())
+        if min_magnitude is not None:
+            clauses.append("magnitude >= ?")
+            params.append(min_magnitude)
+
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        sql = (
+            "SELECT id, region, time, magnitude, depth, latitude, longitude, location, intensity "
+            f"FROM seismic_events {where} ORDER BY event_time DESC LIMIT ?"
+        )
+
+        with self._lock:
+            rows = self._connection.execute(sql, [*params, limit]).fetchall()
+
+        return [
+            SeismicData(
+                id=row[0],
+                region=row[1],
+                time=row[2] or '',
+                magnitude=row[3],
+                depth=row[4],
+                coordinates={"latitude": row[5], "longitude": row[6]},
+                location=row[7] or '',
+                intensity=row[8]
+            )
+            for row in rows
+        ]
+
+    def __len__(self) -> int:
+        return len(self._known_ids)
@@ -0,0 +1,316 @@
+import heapq
+import math
+from typing import Callable, Generic, List, Optional, Sequence, Tuple, TypeVar
+
+T = TypeVar("T")
+
+EARTH_RADIUS_KM = 6371.0088
+
+
+def haversine_km(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """Distância em km entre dois pontos (latitude/longitude em graus) pela fórmula de haversine"""
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = phi2 - phi1
+    d_lambda = math.radians(lon2 - lon1)
+
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * math.asin(min(1.0, math.sqrt(a)))
+
+
+def parse_bbox(bbox: str) -> Tuple[float, float, float, float]:
+    """
+    Converte 'min_lon,min_lat,max_lon,max_lat' (ordem GeoJSON) em
+    (min_lat, min_lon, max_lat, max_lon)
+
+    Raises:
+        ValueError: se o texto não tiver quatro números válidos ou os limites estiverem invertidos
+    """
+    parts = [part.strip() for part in bbox.split(',')]
+    if len(parts) != 4:
+        raise ValueError("bbox deve ter o formato min_lon,min_lat,max_lon,max_lat")
+
+    min_lon, min_lat, max_lon, max_lat = (float(part) for part in parts)
+    if min_lat > max_lat or min_lon > max_lon:
+        raise ValueError("bbox com limites mínimos superiores aos máximos")
+    if not (-90 <= min_lat <= 90 and -90 <= max_lat <= 90):
+        raise ValueError("Latitudes da bbox fora do intervalo [-90, 90]")
+
+    return min_lat, min_lon, max_lat, max_lon
+
+
+def _unit_vector(lat: float, lon: float) -> Tuple[float, float, float]:
+    """Projeta latitude/longitude na esfera unitária (coordenadas cartesianas)"""
+    phi, lam = math.radians(lat), math.radians(lon)
+    return (math.cos(phi) * math.cos(lam), math.cos(phi) * math.sin(lam), math.sin(phi))
+
+
+def _chord_for_km(distance_km: float) -> float:
+    """Comprimento da corda na esfera unitária equivalente a uma distância à superfície"""
+    angle = min(math.pi, distance_km / EARTH_RADIUS_KM)
+    return 2 * math.sin(angle / 2)
+
+
+class KDTree:
+    """
+    Árvore k-d estática e implícita: cada sub-intervalo [lo, hi) de _order tem
+    a mediana em (lo + hi) // 2, à esquerda os menores e à direita os maiores
+    segundo o eixo depth % k
+    """
+
+    def __init__(self, points: Sequence[Sequence[float]]):
+        self.points = [tuple(point) for point in points]
+        self.dimensions = len(self.points[0]) if self.points else 0
+        self._order = list(range(len(self.points)))
+        self._build(0, len(self._order), 0)
+
+    def __len__(self) -> int:
+        return len(self.points)
+
+    def _build(self, lo: int, hi: int, depth: int) -> None:
+        if hi - lo <= 1:
+            return
+
+        axis = depth % self.dimensions
+        self._order[lo:hi] = sorted(self._order[lo:hi], key=lambda index: self.points[index][axis])
+        mid = (lo + hi) // 2
+        self._build(lo, mid, depth + 1)
+        self._build(mid + 1, hi, depth + 1)
+
+    def _squared_distance(self, index: int, target: Sequence[float]) -> float:
+        return sum((a - b) ** 2 for a, b in zip(self.points[index], target))
+
+    def nearest(self, target: Sequence[float], k: int = 1) -> List[Tuple[float, int]]:
+        """Devolve até k pares (distância euclidiana, índice do ponto) ordenados por distância"""
+        if not self.points or k < 1:
+            return []
+
+        heap: List[Tuple[float, int]] = []  # max-heap com distâncias negativas
+
+        def visit(lo: int, hi: int, depth: int) -> None:
+            if lo >= hi:
+                return
+
+            mid = (lo + hi) // 2
+            index = self._order[mid]
+            distance = self._squared_distance(index, target)
+
+            if len(heap) < k:
+                heapq.heappush(heap, (-distance, index))
+            elif distance < -heap[0][0]:
+                heapq.heapreplace(heap, (-distance, index))
+
+            axis = depth % self.dimensions
+            delta = target[axis] - self.points[index][axis]
+            near, far = ((lo, mid), (mid + 1, hi)) if delta < 0 else ((mid + 1, hi), (lo, mid))
+
+            visit(near[0], near[1], depth + 1)
+            if len(heap) < k or delta ** 2 < -heap[0][0]:
+                visit(far[0], far[1], depth + 1)
+
+        visit(0, len(self._order), 0)
+        return sorted((math.sqrt(-negative), index) for negative, index in heap)
+
+    def within_radius(self, target: Sequence[float], radius: float) -> List[int]:
+        """Índices dos pontos a uma distância euclidiana <= radius do alvo"""
+        found: List[int] = []
+        radius_squared = radius ** 2
+
+        def visit(lo: int, hi: int, depth: int) -> None:
+            if lo >= hi:
+                return
+
+            mid = (lo + hi) // 2
+            index = self._order[mid]
+            if self._squared_distance(index, target) <= radius_squared:
+                found.append(index)
+
+            axis = depth % self.dimensions
+            delta = target[axis] - self.points[index][axis]
+            if delta <= radius:
+                visit(lo, mid, depth + 1)
+            if delta >= -radius:
+                visit(mid + 1, hi, depth + 1)
+
+        visit(0, len(self._order), 0)
+        return found
+
+    def within_box(self, lows: Sequence[float], highs: Sequence[float]) -> List[int]:
+        """Índices dos pontos contidos na caixa [lows, highs] (limites inclusivos)"""
+        found: List[int] = []
+
+        def visit(lo: int, hi: int, depth: int) -> None:
+            if lo >= hi:
+                return
+
+            mid = (lo + hi) // 2
+            index = self._order[mid]
+            point = self.points[index]
+            if all(low <= value <= high for value, low, high in zip(point, lows, highs)):
+                found.append(index)
+
+            axis = depth % self.dimensions
+            if lows[axis] <= point[axis]:
+                visit(lo, mid, depth + 1)
+            if highs[axis] >= point[axis]:
+                visit(mid + 1, hi, depth + 1)
+
+        visit(0, len(self._order), 0)
+        return found
+
+
+class SpatialIndex(Generic[T]):
+    """
+    Índice geográfico sobre uma lista de objetos com latitude/longitude
+
+    As consultas por proximidade usam uma árvore k-d sobre vetores na esfera
+    unitária (a distância da corda é monótona com a distância de haversine);
+    as consultas por retângulo usam uma árvore k-d sobre (latitude, longitude).
+    """
+
+    def __init__(self, items: Sequence[T], coordinates: Callable[[T], Optional[Tuple[float, float]]]):
+        self.items: List[T] = []
+        self.coordinates: List[Tuple[float, float]] = []
+
+        for item in items:
+            position = coordinates(item)
+            if position is None:
+                continue
+            self.items.append(item)
+            self.coordinates.append((float(position[0]), float(position[1])))
+
+        self._sphere = KDTree([_unit_vector(lat, lon) for lat, lon in self.coordinates])
+        self._grid = KDTree(self.coordinates)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _with_distance(self, indexes: List[int], lat: float, lon: float) -> List[Tuple[T, float]]:
+        ranked = sorted(
+            (haversine_km(lat, lon, *self.coordinates[index]), index) for index in indexes
+        )
+        return [(self.items[index], distance) for distance, index in ranked]
+
+    def nearest(self, lat: float, lon: float, k: int = 1) -> List[Tuple[T, float]]:
+        """Os k objetos mais próximos do ponto, com a distância em km"""
+        matches = self._sphere.nearest(_unit_vector(lat, lon), k)
+        return self._with_distance([index for _, index in matches], lat, lon)
+
+    def within_radius(self, lat: float, lon: float, radius_km: float) -> List[Tuple[T, float]]:
+        """Objetos a até radius_km do ponto, ordenados por distância"""
+        indexes = self._sphere.within_radius(_unit_vector(lat, lon), _chord_for_km(radius_km))
+        return self._with_distance(indexes, lat, lon)
+
+    def within_bbox(self, min_lat: float, min_lon: float, max_lat: float, max_lon: float) -> List[T]:
+        """Objetos dentro do retângulo de latitude/longitude (limites inclusivos)"""
+        indexes = self._grid.within_box((min_lat, min_lon), (max_lat, max_lon))
+        return [self.items[index] for index in sorted(indexes)]
+
+
+def geometry_polygons(geometry: Optional[dict]) -> List[List[List[Sequence[float]]]]:
+    """
+    Polígonos (lista de anéis [lon, lat], o primeiro exterior e os restantes buracos)
+    de uma geometria GeoJSON Polygon ou MultiPolygon
+    """
+    if not geometry:
+        return []
+
+    geometry_type = geometry.get("type")
+    coordinates = geometry.get("coordinates") or []
+
+    if geometry_type == "Polygon":
+        return [coordinates] if coordinates else []
+    if geometry_type == "MultiPolygon":
+        return [polygon for polygon in coordinates if polygon]
+    return []
+
+
+def _point_in_ring(lon: float, lat: float, ring: List[Sequence[float]]) -> bool:
+    """Teste par-ímpar (ray casting) de um ponto num anel"""
+    inside = False
+    j = len(ring) - 1
+    for i in range(len(ring)):
+        xi, yi = ring[i][0], ring[i][1]
+        xj, yj = ring[j][0], ring[j][1]
+        if (yi > lat) != (yj > lat) and lon < (xj - xi) * (lat - yi) / (yj - yi) + xi:
+            inside = not inside
+        j = i
+    return inside
+
+
+def point_in_polygon(lon: float, lat: float, polygon: List[List[Sequence[float]]]) -> bool:
+    """Indica se o ponto está no anel exterior do polígono e fora dos seus buracos"""
+    if not polygon or not _point_in_ring(lon, lat, polygon[0]):
+        return False
+    return not any(_point_in_ring(lon, lat, hole) for hole in polygon[1:])
+
+
+def geometry_bounds(geometry: Optional[dict]) -> Optional[Tuple[float, float, float, float]]:
+    """Retângulo envolvente (min_lat, min_lon, max_lat, max_lon) de qualquer geometria GeoJSON"""
+    if not geometry:
+        return None
+
+    lons, lats = [], []
+
+    def collect(coordinates) -> None:
+        if coordinates and isinstance(coordinates[0], (int, float)):
+            lons.append(float(coordinates[0]))
+            lats.append(float(coordinates[1]))
+        else:
+            for item in coordinates or []:
+                collect(item)
+
+    collect(geometry.get("coordinates"))
+    if not lons:
+        return None
+
+    return min(lats), min(lons), max(lats), max(lons)
+
+
+class PolygonIndex(Generic[T]):
+    """
+    Índice de polígonos numa grelha regular de retângulos envolventes
+
+    Cada objeto é registado nas células cobertas pelo seu retângulo; uma
+    consulta por ponto testa apenas os polígonos da célula correspondente.
+    """
+
+    def __init__(self, items: Sequence[T], geometry: Callable[[T], Optional[dict]], cell_size: float = 0.1):
+        self.cell_size = cell_size
+        self.items: List[T] = []
+        self._polygons: List[List[List[List[Sequence[float]]]]] = []
+        self._bounds: List[Tuple[float, float, float, float]] = []
+        self._cells: dict = {}
+
+        for item in items:
+            item_geometry = geometry(item)
+            polygons = geometry_polygons(item_geometry)
+            bounds = geometry_bounds(item_geometry)
+            if not polygons or bounds is None:
+                continue
+
+            position = len(self.items)
+            self.items.append(item)
+            self._polygons.append(polygons)
+            self._bounds.append(bounds)
+
+            min_lat, min_lon, max_lat, max_lon = bounds
+            for row in range(self._cell(min_lat), self._cell(max_lat) + 1):
+                for column in range(self._cell(min_lon), self._cell(max_lon) + 1):
+                    self._cells.setdefault((row, column), []).append(position)
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _cell(self, value: float) -> int:
+        return math.floor(value / self.cell_size)
+
+    def containing(self, lat: float, lon: float) -> List[T]:
+        """Objetos cujo polígono contém o ponto"""
+        found = []
+        for position in self._cells.get((self._cell(lat), self._cell(lon)), []):
+            min_lat, min_lon, max_lat, max_lon = self._bounds[position]
+            if not (min_lat <= lat <= max_lat and min_lon <= lon <= max_lon):
+                continue
+            if any(point_in_polygon(lon, lat, polygon) for polygon in self._polygons[position]):
+                found.append(self.items[position])
+        return found
@@ -0,0 +1,289 @@
+import contextvars
+import json
+import logging
+import os
+import queue
+import secrets
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Any, Callable, Dict, Iterator, List, Optional
+import requests
+
+logger = logging.getLogger(__name__)
+
+# Tipos de span (valores do OTLP)
+SPAN_KIND_INTERNAL = 1
+SPAN_KIND_SERVER = 2
+SPAN_KIND_CLIENT = 3
+
+
+class Span:
+    """Intervalo de tempo nomeado de um trace, com atributos e ligação ao span pai"""
+
+    def __init__(self, name: str, parent: Optional["Span"] = None, kind: int = SPAN_KIND_INTERNAL,
+                 attributes: Optional[Dict[str, Any]] = None, start_ns: Optional[int] = None):
+        self.name = name
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent is not None else secrets.token_hex(16)
+        self.span_id = secrets.token_hex(8)
+        self.kind = kind
+        self.attributes: Dict[str, Any] = dict(attributes or {})
+        self.start_ns = start_ns if start_ns is not None else time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.error: Optional[str] = None
+        self.last_child_end_ns: Optional[int] = None
+        # Spans terminados do trace, partilhados com a raiz (exportados quando esta termina)
+        self._finished: List["Span"] = parent._finished if parent is not None else []
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def end(self, end_ns: Optional[int] = None) -> None:
+        self.end_ns = end_ns if end_ns is not None else time.time_ns()
+        self._finished.append(self)
+        if self.parent is not None:
+            self.parent.last_child_end_ns = self.end_ns
+        elif _exporter is not None:
+            try:
+                _exporter.export(list(self._finished))
+            except Exception as e:
+                logger.warning(f"Erro ao exportar spans do trace {self.trace_id}: {e}")
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent is not None else None,
+            "name": self.name,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "attributes": self.attributes,
+            "error": self.error
+        }
+
+
+class _NoopSpan:
+    """Span usado com o tracing desligado: aceita atributos e não regista nada"""
+
+    last_child_end_ns = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar("current_span", default=None)
+
+
+class SpanExporter:
+    """Destino dos spans de cada trace terminado"""
+
+    def export(self, spans: List[Span]) -> None:
+        raise NotImplementedError
+
+    def shutdown(self) -> None:
+        pass
+
+
+class LogSpanExporter(SpanExporter):
+    """Escreve cada span como uma linha JSON no log (logger app.services.tracing)"""
+
+    def export(self, spans: List[Span]) -> None:
+        for span_ in spans:
+            logger.info(json.dumps(span_.to_dict(), default=str))
+
+
+class FileSpanExporter(SpanExporter):
+    """Acrescenta cada span como uma linha JSON a um ficheiro"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, spans: List[Span]) -> None:
+        lines = "".join(json.dumps(span_.to_dict(), default=str) + "\n" for span_ in spans)
+        with self._lock, open(self.path, "a", encoding="utf-8") as handle:
+            handle.write(lines)
+
+
+def _otlp_value(value: Any) -> Dict[str, Any]:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    return {"stringValue": str(value)}
+
+
+def otlp_payload(spans: List[Span], service_name: str) -> Dict[str, Any]:
+    """Spans no formato OTLP/JSON (ExportTraceServiceRequest)"""
+    return {
+        "resourceSpans": [{
+            "resource": {"attributes": [{"key": "service.name", "value": {"stringValue": service_name}}]},
+            "scopeSpans": [{
+                "scope": {"name": __name__},
+                "spans": [
+                    {
+                        "traceId": span_.trace_id,
+                        "spanId": span_.span_id,
+                        "parentSpanId": span_.parent.span_id if span_.parent is not None else "",
+                        "name": span_.name,
+                        "kind": span_.kind,
+                        "startTimeUnixNano": str(span_.start_ns),
+                        "endTimeUnixNano": str(span_.end_ns),
+                        "attributes": [
+                            {"key": key, "value": _otlp_value(value)} for key, value in span_.attributes.items()
+                        ],
+                        "status": {"code": 2, "message": span_.error} if span_.error else {"code": 1}
+                    }
+                    for span_ in spans
+                ]
+            }]
+        }]
+    }
+
+
+class OTLPSpanExporter(SpanExporter):
+    """
+    Envia os spans por OTLP/HTTP (JSON) para um coletor local
+
+    Os traces são postos numa fila e enviados em lotes por um thread de fundo,
+    para que os pedidos não esperem pelo coletor; se a fila encher, os spans
+    mais recentes são descartados.
+    """
+
+    def __init__(self, endpoint: str, service_name: str, max_batch: int = 512, interval: float = 2.0,
+                 max_queue: int = 10000, timeout: float = 5.0):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self.max_batch = max_batch
+        self.interval = interval
+        self.timeout = timeout
+        self._queue: "queue.Queue[Span]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._worker = threading.Thread(target=self._run, name="otlp-exporter", daemon=True)
+        self._worker.start()
+
+    def export(self, spans: List[Span]) -> None:
+        for span_ in spans:
+            try:
+                self._queue.put_nowait(span_)
+            except queue.Full:
+                logger.warning("Fila de spans OTLP cheia: spans descartados")
+                return
+
+    def _drain(self) -> List[Span]:
+        batch = []
+        while len(batch) < self.max_batch:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def flush(self) -> None:
+        batch = self._drain()
+        while batch:
+            try:
+                requests.post(self.endpoint, json=otlp_payload(batch, self.service_name), timeout=self.timeout)
+            except requests.RequestException as e:
+                logger.warning(f"Erro ao enviar spans para {self.endpoint}: {e}")
+            batch = self._drain()
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+    def shutdown(self) -> None:
+        self._stop.set()
+        self.flush()
+
+
+_exporter: Optional[SpanExporter] = None
+
+
+def configure_tracing(exporter: Optional[SpanExporter]) -> Optional[SpanExporter]:
+    """Define o exportador dos spans (None desliga o tracing) e devolve o anterior"""
+    global _exporter
+    previous, _exporter = _exporter, exporter
+    return previous
+
+
+def exporter_from_env() -> Optional[SpanExporter]:
+    """
+    Exportador configurado por variáveis de ambiente
+
+    TRACING_EXPORTER: none (por omissão), log, file ou otlp
+    TRACING_FILE: ficheiro do exportador file (traces.jsonl)
+    TRACING_OTLP_ENDPOINT: coletor OTLP/HTTP (http://localhost:4318/v1/traces)
+    TRACING_SERVICE_NAME: service.name enviado no OTLP (weather_api_ipma)
+    """
+    kind = os.getenv("TRACING_EXPORTER", "none").lower()
+    if kind == "log":
+        return LogSpanExporter()
+    if kind == "file":
+        return FileSpanExporter(os.getenv("TRACING_FILE", "traces.jsonl"))
+    if kind == "otlp":
+        return OTLPSpanExporter(
+            os.getenv("TRACING_OTLP_ENDPOINT", "http://localhost:4318/v1/traces"),
+            os.getenv("TRACING_SERVICE_NAME", "weather_api_ipma")
+        )
+    if kind != "none":
+        logger.warning(f"TRACING_EXPORTER desconhecido: {kind} (tracing desligado)")
+    return None
+
+
+def tracing_enabled() -> bool:
+    return _exporter is not None
+
+
+def current_span() -> Optional[Span]:
+    return _current_span.get()
+
+
+@contextmanager
+def span(name: str, kind: int = SPAN_KIND_INTERNAL, **attributes: Any) -> Iterator[Any]:
+    """Abre um span filho do span atual (ou a raiz de um novo trace) durante o bloco"""
+    if _exporter is None:
+        yield _NOOP_SPAN
+        return
+
+    current = Span(name, _current_span.get(), kind, attributes)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        _current_span.reset(token)
+        current.end()
+
+
+def record_span(name: str, start_ns: int, end_ns: int, **attributes: Any) -> None:
+    """Regista um span já decorrido (início e fim conhecidos) como filho do span atual"""
+    if _exporter is None:
+        return
+    Span(name, _current_span.get(), attributes=attributes, start_ns=start_ns).end(end_ns)
+
+
+def traced(name: str, **attributes: Any) -> Callable:
+    """Decorador que envolve cada chamada num span"""
+    def decorator(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(name, **attributes):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+configure_tracing(exporter_from_env())
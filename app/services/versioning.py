@@ -0,0 +1,106 @@
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, Hashable, List, Optional
+
+
+class UnavailableRecords(list):
+    """
+    Lista vazia devolvida quando a obtenção de um conjunto falha
+
+    Para quem lê os registos comporta-se como [], mas não representa um
+    conjunto vazio: VersionedDataset.update ignora-a, em vez de dar todos os
+    registos como removidos e voltar a inseri-los na renovação seguinte.
+    """
+
+
+class VersionedDataset:
+    """
+    Versão monotónica e registo limitado de diferenças de um conjunto de dados
+
+    Cada atualização com alterações incrementa a versão e guarda os registos
+    inseridos, alterados e removidos. Um cliente que indique a última versão
+    que conhece recebe apenas as diferenças acumuladas desde então, ou None
+    se essa versão já saiu do registo (deve então pedir o conjunto completo).
+    """
+
+    def __init__(self, name: str, key: Callable[[Any], Hashable], max_log: int = 64):
+        self.name = name
+        self.key = key
+        self.version = 0
+        self._records: Dict[Hashable, Any] = {}
+        self._log: deque = deque(maxlen=max_log)
+        self._lock = threading.Lock()
+
+    def update(self, records: List[Any]) -> int:
+        """Integra a lista atual de registos e devolve a versão resultante"""
+        with self._lock:
+            if isinstance(records, UnavailableRecords):
+                return self.version
+
+            current = {self.key(record): record for record in records}
+
+            inserted = [record for key, record in current.items() if key not in self._records]
+            updated = [record for key, record in current.items() if key in self._records and self._records[key] != record]
+            removed = [record for key, record in self._records.items() if key not in current]
+
+            if inserted or updated or removed or self.version == 0:
+                self.version += 1
+                self._log.append((self.version, inserted, updated, removed))
+
+            self._records = current
+            return self.version
+
+    def snapshot(self) -> List[Any]:
+        """Todos os registos da versão atual"""
+        with self._lock:
+            return list(self._records.values())
+
+    def changes_since(self, since_version: int) -> Optional[Dict[str, List[Any]]]:
+        """
+        Diferenças entre since_version e a versão atual
+
+        Returns:
+            Dicionário com inserted, updated e removed; None se since_version
+            for desconhecida ou anterior ao registo retido
+        """
+        with self._lock:
+            if since_version == self.version:
+                return {"inserted": [], "updated": [], "removed": []}
+
+            if since_version > self.version or not self._log or since_version < self._log[0][0] - 1:
+                return None
+
+            # Por chave: se já existia em since_version e o estado final (None = removido)
+            existed: Dict[Hashable, bool] = {}
+            final: Dict[Hashable, Any] = {}
+            last_removed: Dict[Hashable, Any] = {}
+
+            for version, inserted, updated, removed in self._log:
+                if version <= since_version:
+                    continue
+                for record in inserted:
+                    key = self.key(record)
+                    existed.setdefault(key, False)
+                    final[key] = record
+                for record in updated:
+                    key = self.key(record)
+                    existed.setdefault(key, True)
+                    final[key] = record
+                for record in removed:
+                    key = self.key(record)
+                    existed.setdefault(key, True)
+                    final[key] = None
+                    last_removed[key] = record
+
+            changes = {"inserted": [], "updated": [], "removed": []}
+            for key, was_present in existed.items():
+                record = final[key]
+                if record is None:
+                    if was_present:
+                        changes["removed"].append(last_removed[key])
+                elif was_present:
+                    changes["updated"].append(record)
+                else:
+                    changes["inserted"].append(record)
+
+            return changes
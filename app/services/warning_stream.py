@@ -0,0 +1,164 @@
+import asyncio
+import os
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set, Tuple
+from fastapi.encoders import jsonable_encoder
+from starlette.concurrency import run_in_threadpool
+from app.models import WeatherWarning
+from app.services.indexes import parse_timestamp
+from app.services.versioning import UnavailableRecords
+import logging
+
+logger = logging.getLogger(__name__)
+
+WarningKey = Tuple[str, str, str]
+
+
+def warning_key(warning: WeatherWarning) -> WarningKey:
+    """Identifica um aviso pela área, tipo e início de vigência"""
+    return (warning.id, warning.warning_type, warning.start_time)
+
+
+def live_warnings(warnings: List[WeatherWarning], now: datetime) -> Dict[WarningKey, WeatherWarning]:
+    """Avisos ainda não terminados no instante now, indexados pela sua chave"""
+    live = {}
+    for warning in warnings:
+        end = parse_timestamp(warning.end_time)
+        if end is None or end >= now:
+            live[warning_key(warning)] = warning
+    return live
+
+
+def diff_warnings(previous: Dict[WarningKey, WeatherWarning],
+                  current: Dict[WarningKey, WeatherWarning]) -> Dict[str, List[WeatherWarning]]:
+    """Compara dois conjuntos de avisos em vigor: novos, alterados e expirados/removidos"""
+    return {
+        "added": [warning for key, warning in current.items() if key not in previous],
+        "updated": [warning for key, warning in current.items() if key in previous and previous[key] != warning],
+        "expired": [warning for key, warning in previous.items() if key not in current]
+    }
+
+
+def _drain(queue: asyncio.Queue) -> None:
+    """Descarta os eventos pendentes de uma fila"""
+    while not queue.empty():
+        queue.get_nowait()
+
+
+class WarningBroadcaster:
+    """
+    Difunde alterações dos avisos para clientes ligados (SSE/WebSocket)
+
+    Uma única tarefa renova os avisos a cada intervalo enquanto houver
+    subscritores e envia a cada um apenas as diferenças detetadas. O estado
+    difundido (_live e version) só é alterado no ciclo de eventos: a obtenção
+    bloqueante corre numa thread e o resultado é integrado depois. Qualquer
+    versão mais recente observada (numa renovação ou num snapshot) é integrada
+    e difundida, para que todos os clientes partam do mesmo estado.
+    """
+
+    def __init__(self, service, interval: Optional[float] = None):
+        self.service = service
+        self.interval = interval if interval is not None else float(os.getenv("WARNINGS_STREAM_INTERVAL", "60"))
+        # Versão do conjunto "warnings" (a mesma de GET /warnings/?since_version=)
+        self.version = 0
+        self._live: Dict[WarningKey, WeatherWarning] = {}
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def _fetch(self, refresh: bool = False) -> Tuple[List[WeatherWarning], int]:
+        """Obtém os avisos e a versão do conjunto (bloqueante: corre numa thread)"""
+        warnings = self.service.refresh_weather_warnings() if refresh else self.service.get_weather_warnings()
+        return warnings, self.service.track_dataset_version("warnings", warnings)
+
+    def _snapshot_event(self) -> Dict[str, Any]:
+        return {
+            "type": "snapshot",
+            "version": self.version,
+            "warnings": jsonable_encoder(list(self._live.values()))
+        }
+
+    async def snapshot(self, queue: Optional[asyncio.Queue] = None) -> Dict[str, Any]:
+        """
+        Evento com todos os avisos em vigor e a versão do conjunto a que correspondem
+
+        Os eventos já na fila do cliente estão incluídos no snapshot e são
+        descartados; a fila passa a conter apenas o que for difundido depois.
+        """
+        warnings, version = await run_in_threadpool(self._fetch)
+        if not isinstance(warnings, UnavailableRecords):
+            event = self.apply(warnings, version)
+            if event is not None:
+                self.publish(event)
+
+        if queue is not None:
+            _drain(queue)
+        return self._snapshot_event()
+
+    def apply(self, warnings: List[WeatherWarning], version: int,
+              now: Optional[datetime] = None) -> Optional[Dict[str, Any]]:
+        """Integra uma lista de avisos na versão indicada e devolve o evento de alterações (None se não houver)"""
+        if version < self.version:
+            return None  # obtida antes de uma versão já integrada
+
+        current = live_warnings(warnings, now or datetime.utcnow())
+        changes = diff_warnings(self._live, current)
+        self._live, self.version = current, version
+
+        if not any(changes.values()):
+            return None
+
+        return {
+            "type": "changes",
+            "version": self.version,
+            **{kind: jsonable_encoder(items) for kind, items in changes.items()}
+        }
+
+    def subscribe(self) -> asyncio.Queue:
+        """Regista um cliente e arranca a renovação periódica se ainda não estiver ativa"""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=100)
+        self._subscribers.add(queue)
+
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        """Remove um cliente e pára a renovação quando já não há subscritores"""
+        self._subscribers.discard(queue)
+
+        if not self._subscribers and self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def publish(self, event: Dict[str, Any]) -> None:
+        """Coloca um evento na fila de cada subscritor (chamado após integrar o evento no estado)"""
+        for queue in list(self._subscribers):
+            if queue.full():
+                # Cliente lento: as alterações pendentes são substituídas pelo estado atual,
+                # que já inclui este evento, em vez de se perder uma delas sem aviso
+                _drain(queue)
+                queue.put_nowait(self._snapshot_event())
+            else:
+                queue.put_nowait(event)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                warnings, version = await run_in_threadpool(self._fetch, True)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Erro ao renovar avisos para difusão: {e}")
+                continue
+
+            if isinstance(warnings, UnavailableRecords):
+                # Falha do IPMA: não é um conjunto vazio, os clientes mantêm os avisos que têm
+                logger.warning("Avisos indisponíveis no IPMA: renovação da difusão ignorada")
+                continue
+
+            event = self.apply(warnings, version)
+            if event is not None:
+                self.publish(event)
@@ -0,0 +1 @@
+"""Benchmarks sobre respostas do IPMA gravadas (python -m benchmarks)"""
@@ -0,0 +1,60 @@
+import argparse
+import json
+import platform
+import sys
+from benchmarks.fixtures import recorded_ipma
+from benchmarks.runner import compare, format_table, run_benchmark
+from benchmarks.suite import build_suite
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks",
+        description="Benchmarks dos parsers e endpoints sobre respostas do IPMA gravadas"
+    )
+    parser.add_argument("-k", "--filter", action="append", default=[],
+                        help="Apenas benchmarks cujo nome contém este texto (pode repetir)")
+    parser.add_argument("--list", action="store_true", help="Lista os benchmarks e termina")
+    parser.add_argument("--min-time", type=float, default=1.0, help="Segundos medidos por benchmark")
+    parser.add_argument("--rounds", type=int, default=5, help="Número mínimo de lotes medidos")
+    parser.add_argument("--no-allocations", action="store_true", help="Não mede a memória com tracemalloc")
+    parser.add_argument("--json", dest="output", help="Grava os resultados em JSON (para usar como --baseline)")
+    parser.add_argument("--baseline", help="Resultados JSON de referência para detetar regressões")
+    parser.add_argument("--max-regression", type=float, default=0.2,
+                        help="Perda de ops/s ou aumento do pico de memória tolerados (0.2 = 20%%)")
+    args = parser.parse_args()
+
+    with recorded_ipma() as recorded:
+        benchmarks = [
+            benchmark for benchmark in build_suite(recorded)
+            if not args.filter or any(text in benchmark.name for text in args.filter)
+        ]
+
+        if args.list:
+            print("\n".join(benchmark.name for benchmark in benchmarks))
+            return 0
+
+        results = []
+        for benchmark in benchmarks:
+            results.append(run_benchmark(benchmark, args.min_time, args.rounds, not args.no_allocations))
+            print(f"{benchmark.name}: {results[-1]['ops_per_sec']:,.1f} ops/s", file=sys.stderr)
+
+    print(format_table(results))
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump({"python": platform.python_version(), "results": results}, handle, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as handle:
+            regressions = compare(results, json.load(handle)["results"], args.max_regression)
+        if regressions:
+            print("\nRegressões:\n" + "\n".join(f"  {line}" for line in regressions))
+            return 1
+        print("\nSem regressões face à referência")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,309 @@
+import json
+import math
+import random
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+from unittest.mock import patch
+from urllib.parse import parse_qs, urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from app.services.ipma_service import IPMAService
+
+SEED = 20251003
+
+# Distritos e ilhas do IPMA (idDistrito) com o retângulo aproximado (lat, lon) de cada um
+DISTRICT_BOUNDS = {
+    1: (40.5, -8.8, 41.0, -8.2), 2: (37.5, -8.3, 38.2, -7.2), 3: (41.4, -8.7, 41.9, -7.9),
+    4: (41.3, -7.3, 42.0, -6.2), 5: (39.6, -8.1, 40.3, -6.9), 6: (39.9, -8.9, 40.4, -7.8),
+    7: (38.2, -8.6, 39.0, -7.1), 8: (37.0, -8.9, 37.5, -7.4), 9: (40.3, -7.6, 41.0, -6.8),
+    10: (39.3, -9.3, 40.1, -8.4), 11: (38.7, -9.5, 39.3, -8.8), 12: (38.8, -8.0, 39.6, -7.0),
+    13: (41.0, -8.8, 41.4, -8.0), 14: (38.8, -9.0, 39.8, -7.9), 15: (37.8, -9.2, 38.7, -8.2),
+    16: (41.6, -8.9, 42.1, -8.1), 17: (41.2, -8.0, 41.9, -7.2), 18: (40.4, -8.2, 41.2, -7.4),
+    31: (32.6, -17.3, 32.9, -16.7), 32: (33.0, -16.4, 33.1, -16.3), 41: (36.9, -25.2, 37.0, -25.0),
+    42: (37.7, -25.9, 37.9, -25.1), 43: (38.6, -27.4, 38.8, -27.0), 44: (39.0, -28.1, 39.1, -27.9),
+    45: (38.5, -28.3, 38.7, -27.7), 46: (38.4, -28.5, 38.6, -28.0), 47: (38.5, -28.8, 38.6, -28.6),
+    48: (39.4, -31.3, 39.5, -31.1), 49: (39.7, -31.2, 39.7, -31.1)
+}
+
+WIND_DIRECTIONS = ["N", "NE", "E", "SE", "S", "SW", "W", "NW"]
+WATER_QUALITY_STATUS = ["Aberta", "Fechada", "Condicional"]
+
+# Tamanhos de uma resposta típica de cada recurso
+LOCATIONS = 300
+FORECAST_DAYS = 5
+STATIONS = 180
+OBSERVATION_HOURS = 24
+SEISMIC_EVENTS = {"continente": 400, "acores": 250, "madeira": 60}
+MUNICIPALITIES = 308
+CLIMATE_DAYS = 60
+BIVALVE_ZONES = 50
+ZONE_VERTICES = 60
+
+# Localidade usada nas previsões e nos pedidos de ida e volta
+SAMPLE_LOCATION = (11, 1110600, "Lisboa")
+
+
+def _point(rng: random.Random, district_id: int) -> Tuple[float, float]:
+    min_lat, min_lon, max_lat, max_lon = DISTRICT_BOUNDS[district_id]
+    return round(rng.uniform(min_lat, max_lat), 4), round(rng.uniform(min_lon, max_lon), 4)
+
+
+def locations_payload(count: int = LOCATIONS) -> Dict:
+    """distrits-islands.json: localidades de previsão distribuídas pelos distritos e ilhas"""
+    rng = random.Random(SEED)
+    district_ids = list(DISTRICT_BOUNDS)
+    district_id, location_id, name = SAMPLE_LOCATION
+    latitude, longitude = _point(rng, district_id)
+    data = [{
+        "idRegiao": 1, "idAreaAviso": "LSB", "idConcelho": 6, "globalIdLocal": location_id,
+        "latitude": str(latitude), "idDistrito": district_id, "local": name, "longitude": str(longitude)
+    }]
+    for index in range(1, count):
+        district_id = district_ids[index % len(district_ids)]
+        latitude, longitude = _point(rng, district_id)
+        data.append({
+            "idRegiao": 1 if district_id < 30 else (3 if district_id < 40 else 2),
+            "idAreaAviso": f"A{district_id:02d}",
+            "idConcelho": index % 20 + 1,
+            "globalIdLocal": district_id * 100000 + index,
+            "latitude": str(latitude),
+            "idDistrito": district_id,
+            "local": f"Localidade {index:03d}",
+            "longitude": str(longitude)
+        })
+    return {"owner": "IPMA", "country": "PT", "data": data}
+
+
+def weather_types_payload() -> Dict:
+    """weather-type-classe.json: os 30 tipos de tempo"""
+    return {"owner": "IPMA", "country": "PT", "data": [
+        {"descWeatherTypeEN": f"Weather type {code}", "descIdWeatherTypePT": f"Tipo de tempo {code}", "idWeatherType": code}
+        for code in [-99] + list(range(30))
+    ]}
+
+
+def forecast_payload(location_id: int, start: Optional[date] = None, days: int = FORECAST_DAYS) -> Dict:
+    """Previsão de uma localidade: um registo por hora durante `days` dias a partir de `start`"""
+    rng = random.Random(SEED + location_id)
+    start = start or date.today()
+    first = datetime(start.year, start.month, start.day)
+    data = []
+    for hour in range(days * 24):
+        moment = first + timedelta(hours=hour)
+        base = 14 + 6 * rng.random() - 5 * abs(12 - moment.hour) / 12
+        data.append({
+            "forecastDate": moment.strftime("%Y-%m-%dT%H:%M:%S"),
+            "dataPrev": moment.strftime("%Y-%m-%dT%H:%M:%S"),
+            "idPeriodo": 1,
+            "globalIdLocal": location_id,
+            "tMed": round(base, 1),
+            "hR": round(rng.uniform(40, 95), 1),
+            "utci": round(base - rng.random(), 1),
+            "idWeatherType": rng.randrange(1, 30),
+            "probabilityOfPrecipitation": round(rng.uniform(0, 100), 1),
+            "idIntensidadePrecipita": rng.randrange(0, 4),
+            "ffVento": round(rng.uniform(0, 40), 1),
+            "ddVento": rng.choice(WIND_DIRECTIONS),
+            "iUv": round(rng.uniform(0, 9), 1)
+        })
+    return {"owner": "IPMA", "country": "PT", "globalIdLocal": location_id, "dataUpdate": first.isoformat(), "data": data}
+
+
+def stations_payload(count: int = STATIONS) -> Dict:
+    """weather-stations.json: estações meteorológicas"""
+    rng = random.Random(SEED + 1)
+    district_ids = list(DISTRICT_BOUNDS)
+    data = []
+    for index in range(count):
+        latitude, longitude = _point(rng, district_ids[index % len(district_ids)])
+        data.append({
+            "idEstacao": 1200500 + index, "nome": f"Estação {index:03d}",
+            "latitude": latitude, "longitude": longitude, "altitude": rng.randrange(0, 1500)
+        })
+    return {"owner": "IPMA", "country": "PT", "data": data}
+
+
+def observations_payload(stations: int = STATIONS, hours: int = OBSERVATION_HOURS, station_id: Optional[str] = None) -> Dict:
+    """observations.json: uma observação por estação e hora nas últimas `hours` horas"""
+    rng = random.Random(SEED + 2)
+    last = datetime(2025, 10, 3, 12)
+    data = []
+    for hour in range(hours):
+        moment = (last - timedelta(hours=hours - 1 - hour)).strftime("%Y-%m-%dT%H:%M")
+        for index in range(stations):
+            identifier = str(1200500 + index)
+            record = {
+                "idEstacao": identifier, "nomeEstacao": f"Estação {index:03d}", "time": moment,
+                "temperatura": round(rng.uniform(5, 30), 1), "humidade": round(rng.uniform(30, 100), 1),
+                "pressao": round(rng.uniform(995, 1030), 1), "intensidadeVento": round(rng.uniform(0, 15), 1),
+                "direcaoVento": rng.choice(WIND_DIRECTIONS), "precipitacao": round(max(0.0, rng.gauss(0, 1)), 1),
+                "visibilidade": rng.choice([None, 10000, 20000])
+            }
+            if station_id is None or identifier == station_id:
+                data.append(record)
+    return {"owner": "IPMA", "country": "PT", "data": data}
+
+
+def seismic_payload(region: str = "continente", count: Optional[int] = None) -> Dict:
+    """hp2*.json: catálogo sísmico dos últimos 30 dias de uma região"""
+    count = SEISMIC_EVENTS[region] if count is None else count
+    rng = random.Random(SEED + len(region))
+    bounds = {"continente": (36.5, -10.5, 42.0, -6.2), "acores": (36.5, -31.5, 40.0, -24.5),
+              "madeira": (32.0, -17.5, 33.5, -16.0)}[region]
+    last = datetime(2025, 10, 3, 12)
+    data = []
+    for index in range(count):
+        moment = last - timedelta(minutes=rng.randrange(0, 30 * 24 * 60))
+        data.append({
+            "googlemapref": "", "degree": None, "sismoId": f"{region[:2]}{index:05d}", "dataUpdate": last.isoformat(),
+            "id": 80000 + index, "magnitude": round(rng.expovariate(1.4) + 0.5, 1), "depth": rng.randrange(1, 40),
+            "location": f"Região {index % 40:02d}", "time": moment.strftime("%Y-%m-%dT%H:%M:%S"),
+            "lat": round(rng.uniform(bounds[0], bounds[2]), 3), "lon": round(rng.uniform(bounds[1], bounds[3]), 3),
+            "intensityID": None, "magType": "L", "obsRegion": f"Região {index % 40:02d}", "source": "IPMA"
+        })
+    return {"idArea": 7, "country": "PT", "lastSismicActivityDate": last.isoformat(), "updateDate": last.isoformat(),
+            "owner": "IPMA", "data": data}
+
+
+def climate_csv(data_type: str, municipalities: int = MUNICIPALITIES, days: int = CLIMATE_DAYS) -> str:
+    """CSV climático por concelho (data,concelho,valor), com algumas falhas de valor"""
+    rng = random.Random(SEED + len(data_type))
+    ranges = {"evapotranspiration": (0.5, 6.0), "precipitation": (0.0, 25.0), "temperature_min": (2.0, 18.0),
+              "temperature_max": (12.0, 38.0), "pdsi": (-4.0, 4.0)}
+    low, high = ranges[data_type]
+    first = date(2025, 8, 1)
+    lines = ["date,municipality,value"]
+    for day in range(days):
+        day_str = (first + timedelta(days=day)).isoformat()
+        for index in range(municipalities):
+            value = "" if rng.random() < 0.01 else f"{rng.uniform(low, high):.2f}"
+            lines.append(f"{day_str},Concelho {index:03d},{value}")
+    return "\n".join(lines) + "\n"
+
+
+def _ring(rng: random.Random, lat: float, lon: float, vertices: int) -> List[List[float]]:
+    radius = rng.uniform(0.02, 0.08)
+    ring = []
+    for step in range(vertices):
+        angle = 2 * math.pi * step / vertices
+        scale = radius * rng.uniform(0.7, 1.0)
+        ring.append([round(lon + scale * math.cos(angle), 5), round(lat + scale * math.sin(angle), 5)])
+    return ring + [ring[0]]
+
+
+def bivalve_geojson(zones: int = BIVALVE_ZONES, vertices: int = ZONE_VERTICES) -> Dict:
+    """bivalve-mollusk-zones.json: zonas de produção (Polygon e MultiPolygon) ao longo da costa"""
+    rng = random.Random(SEED + 3)
+    features = []
+    for index in range(zones):
+        lat = 37.0 + 5.0 * index / zones
+        lon = -8.9 + rng.uniform(-0.2, 0.2)
+        if index % 5 == 0:
+            geometry = {"type": "MultiPolygon", "coordinates": [
+                [_ring(rng, lat, lon, vertices)], [_ring(rng, lat + 0.1, lon, vertices // 2)]
+            ]}
+        else:
+            geometry = {"type": "Polygon", "coordinates": [_ring(rng, lat, lon, vertices)]}
+        features.append({
+            "type": "Feature",
+            "geometry": geometry,
+            "properties": {
+                "id": f"L{index + 1}", "nome": f"Zona {index + 1:02d}", "estado": rng.choice(WATER_QUALITY_STATUS),
+                "tipo_restricao": rng.choice([None, "Biotoxinas", "Microbiológica"]),
+                "data_atualizacao": "2025-10-03T09:00:00"
+            }
+        })
+    return {"type": "FeatureCollection", "features": features}
+
+
+class RecordedIPMA:
+    """
+    Respostas do IPMA geradas de forma determinística (semente fixa), servidas
+    por URL como se viessem da rede; cada corpo é codificado uma única vez
+    """
+
+    CLIMATE_PATHS = {
+        "/climate/evapotranspiration": "evapotranspiration",
+        "/climate/precipitation": "precipitation",
+        "/climate/temperature-min": "temperature_min",
+        "/climate/temperature-max": "temperature_max",
+        "/climate/pdsi": "pdsi"
+    }
+    SEISMIC_PATHS = {
+        "/earthquake/hp2.json": "continente",
+        "/earthquake/hp2-azores.json": "acores",
+        "/earthquake/hp2-madeira.json": "madeira"
+    }
+
+    def __init__(self, start: Optional[date] = None):
+        self.start = start or date.today()
+        self._bodies: Dict[str, Tuple[bytes, str]] = {}
+        self.requests = 0
+
+    def _json(self, payload: Dict) -> Tuple[bytes, str]:
+        return json.dumps(payload, ensure_ascii=False).encode("utf-8"), "application/json;charset=UTF-8"
+
+    def _build(self, path: str, query: Dict[str, List[str]]) -> Optional[Tuple[bytes, str]]:
+        if path == "/distrits-islands.json":
+            return self._json(locations_payload())
+        if path == "/weather-type-classe.json":
+            return self._json(weather_types_payload())
+        if path.startswith("/forecast/meteorology/cities/daily/"):
+            location_id = path.rsplit("/", 1)[-1].split(".")[0]
+            return self._json(forecast_payload(int(location_id), self.start)) if location_id.isdigit() else None
+        if path == "/weather-stations.json":
+            return self._json(stations_payload())
+        if path == "/observation/meteorology/stations/observations.json":
+            station_id = query.get("stationId", [None])[0]
+            return self._json(observations_payload(station_id=station_id))
+        if path in self.SEISMIC_PATHS:
+            return self._json(seismic_payload(self.SEISMIC_PATHS[path]))
+        if path in self.CLIMATE_PATHS:
+            return climate_csv(self.CLIMATE_PATHS[path]).encode("utf-8"), "text/csv;charset=UTF-8"
+        if path == "/sea-conditions/bivalve-mollusk-zones.json":
+            return self._json(bivalve_geojson())
+        return None
+
+    def body(self, url: str) -> Optional[Tuple[bytes, str]]:
+        """Corpo e tipo de conteúdo da resposta a um URL do IPMA (None se não existir)"""
+        parts = urlsplit(url)
+        path = parts.path[len(urlsplit(IPMAService.BASE_URL).path):]
+        key = f"{path}?{parts.query}"
+        if key not in self._bodies:
+            self._bodies[key] = self._build(path, parse_qs(parts.query))
+        return self._bodies[key]
+
+    def send(self, adapter: HTTPAdapter, request: requests.PreparedRequest, **kwargs) -> requests.Response:
+        """Substituto de HTTPAdapter.send: devolve a resposta gravada sem sair do processo"""
+        self.requests += 1
+        recorded = self.body(request.url)
+        response = requests.Response()
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        if recorded is None:
+            response.status_code = 404
+            response._content = b'{"error": "not found"}'
+        else:
+            response.status_code = 200
+            response._content, response.headers["Content-Type"] = recorded
+        return response
+
+
+@contextmanager
+def recorded_ipma(start: Optional[date] = None) -> Iterator[RecordedIPMA]:
+    """
+    Liga todas as sessões requests às respostas gravadas durante o bloco
+
+    Apenas o transporte é substituído: MeteredSession, a descodificação JSON e
+    os parsers correm como em produção.
+    """
+    recorded = RecordedIPMA(start)
+
+    def send(adapter, request, **kwargs):
+        return recorded.send(adapter, request, **kwargs)
+
+    # O catálogo sísmico recebe os eventos de cada renovação: fica em memória, fora do repositório
+    with patch.object(HTTPAdapter, "send", send), patch.dict("os.environ", {"SEISMIC_CATALOG_PATH": ":memory:"}):
+        yield recorded
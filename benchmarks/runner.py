@@ -0,0 +1,153 @@
+import gc
+import statistics
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, Optional
+
+# Lote mínimo de uma medição sem preparação por operação (calibrado até este tempo)
+MIN_BATCH_SECONDS = 0.01
+
+
+class Benchmark:
+    """
+    Operação medida do conjunto de benchmarks
+
+    setup corre antes de cada operação, fora do tempo medido (ex: limpar as
+    caches para medir uma obtenção a frio); check valida o resultado uma vez,
+    para que um parser que passe a devolver [] não pareça mais rápido.
+    """
+
+    def __init__(self, name: str, func: Callable[[], Any], setup: Optional[Callable[[], None]] = None,
+                 check: Optional[Callable[[Any], bool]] = None, group: str = ""):
+        self.name = name
+        self.func = func
+        self.setup = setup
+        self.check = check
+        self.group = group or name.split(".", 1)[0]
+
+    def run_once(self) -> Any:
+        if self.setup is not None:
+            self.setup()
+        result = self.func()
+        if self.check is not None and not self.check(result):
+            raise AssertionError(f"Resultado inesperado no benchmark {self.name}")
+        return result
+
+
+def _time_batch(benchmark: Benchmark, number: int) -> float:
+    """Tempo por operação de um lote de `number` operações"""
+    if benchmark.setup is None:
+        start = time.perf_counter()
+        for _ in range(number):
+            benchmark.func()
+        return (time.perf_counter() - start) / number
+
+    elapsed = 0.0
+    for _ in range(number):
+        benchmark.setup()
+        start = time.perf_counter()
+        benchmark.func()
+        elapsed += time.perf_counter() - start
+    return elapsed / number
+
+
+def _calibrate(benchmark: Benchmark) -> int:
+    number = 1
+    while True:
+        start = time.perf_counter()
+        _time_batch(benchmark, number)
+        if time.perf_counter() - start >= MIN_BATCH_SECONDS or number >= 1 << 20:
+            return number
+        number *= 2
+
+
+def measure_allocations(benchmark: Benchmark, rounds: int = 3) -> Dict[str, float]:
+    """
+    Memória por operação com tracemalloc: pico acima do estado inicial e memória
+    que fica retida no fim (em KiB, o menor valor das rondas)
+    """
+    peaks, retained = [], []
+    tracemalloc.start()
+    try:
+        for _ in range(rounds):
+            if benchmark.setup is not None:
+                benchmark.setup()
+            gc.collect()
+            tracemalloc.reset_peak()
+            before = tracemalloc.get_traced_memory()[0]
+            result = benchmark.func()
+            current, peak = tracemalloc.get_traced_memory()
+            del result
+            peaks.append(peak - before)
+            retained.append(current - before)
+    finally:
+        tracemalloc.stop()
+    return {"peak_kib": round(min(peaks) / 1024, 1), "retained_kib": round(min(retained) / 1024, 1)}
+
+
+def run_benchmark(benchmark: Benchmark, min_time: float = 1.0, rounds: int = 5,
+                  allocations: bool = True) -> Dict[str, Any]:
+    """
+    Mede uma operação: aquecimento e validação, `rounds` lotes calibrados até
+    perfazerem pelo menos `min_time` segundos e, opcionalmente, a memória
+    """
+    benchmark.run_once()
+    number = _calibrate(benchmark)
+
+    timings: List[float] = []
+    deadline = time.perf_counter() + min_time
+    while len(timings) < rounds or time.perf_counter() < deadline:
+        timings.append(_time_batch(benchmark, number))
+
+    median = statistics.median(timings)
+    result = {
+        "name": benchmark.name,
+        "group": benchmark.group,
+        "ops_per_sec": round(1 / median, 2) if median > 0 else float("inf"),
+        "median_ms": round(median * 1000, 4),
+        "min_ms": round(min(timings) * 1000, 4),
+        "stdev_ms": round(statistics.stdev(timings) * 1000, 4) if len(timings) > 1 else 0.0,
+        "rounds": len(timings),
+        "ops_per_round": number
+    }
+    if allocations:
+        result.update(measure_allocations(benchmark))
+    return result
+
+
+def compare(results: List[Dict[str, Any]], baseline: List[Dict[str, Any]],
+            max_regression: float = 0.2) -> List[str]:
+    """
+    Regressões face a uma execução anterior: ops/s abaixo de (1 - max_regression)
+    ou pico de memória acima de (1 + max_regression) do valor de referência
+    """
+    reference = {entry["name"]: entry for entry in baseline}
+    regressions = []
+    for result in results:
+        previous = reference.get(result["name"])
+        if previous is None:
+            continue
+
+        if result["ops_per_sec"] < previous["ops_per_sec"] * (1 - max_regression):
+            regressions.append(
+                f"{result['name']}: {result['ops_per_sec']:.1f} ops/s (antes {previous['ops_per_sec']:.1f})"
+            )
+        if "peak_kib" in result and "peak_kib" in previous and previous["peak_kib"] > 0 \
+                and result["peak_kib"] > previous["peak_kib"] * (1 + max_regression):
+            regressions.append(
+                f"{result['name']}: pico de {result['peak_kib']:.1f} KiB (antes {previous['peak_kib']:.1f})"
+            )
+    return regressions
+
+
+def format_table(results: List[Dict[str, Any]]) -> str:
+    """Tabela de texto com ops/s, tempo mediano e memória de cada benchmark"""
+    header = f"{'benchmark':<40} {'ops/s':>12} {'mediana ms':>12} {'desvio ms':>10} {'pico KiB':>10} {'retido KiB':>11}"
+    lines = [header, "-" * len(header)]
+    for result in results:
+        lines.append(
+            f"{result['name']:<40} {result['ops_per_sec']:>12,.1f} {result['median_ms']:>12.3f} "
+            f"{result['stdev_ms']:>10.3f} {result.get('peak_kib', float('nan')):>10,.1f} "
+            f"{result.get('retained_kib', float('nan')):>11,.1f}"
+        )
+    return "\n".join(lines)
@@ -0,0 +1,99 @@
+import json
+from typing import List
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.cache import registered_caches
+from app.services.ipma_service import IPMAService
+from benchmarks.fixtures import SAMPLE_LOCATION, RecordedIPMA, forecast_payload, locations_payload
+from benchmarks.runner import Benchmark
+
+# Pedidos de ida e volta pela aplicação ASGI completa (middlewares incluídos)
+ROUND_TRIPS = {
+    "forecast": "/forecast/lisboa/lisboa",
+    "observations": "/stations/observations",
+    "seismic": "/seismic/?region=continente",
+    "agriculture": "/agriculture/precipitation",
+    "water_quality": "/agriculture/water-quality"
+}
+
+
+def clear_caches() -> None:
+    """Esvazia todas as caches ttl_cache (pedido seguinte obtém e processa de novo)"""
+    for cache in registered_caches():
+        cache.cache_clear()
+
+
+def build_suite(recorded: RecordedIPMA) -> List[Benchmark]:
+    """
+    Benchmarks dos parsers e dos pedidos completos, sobre as respostas gravadas
+
+    Deve correr dentro de recorded_ipma(), que serve as respostas ao transporte
+    do requests.
+    """
+    service = IPMAService()
+    client = TestClient(app)
+
+    district_id, location_id, location_name = SAMPLE_LOCATION
+    district_name = service._get_district_name(district_id)
+    forecast_raw = json.loads(json.dumps(forecast_payload(location_id, recorded.start)))
+    target_date = recorded.start.isoformat()
+
+    # Pior caso da pesquisa: a última localidade do distrito com mais localidades
+    locations = locations_payload()["data"]
+    last_location = locations[-1]
+    lookup = (service._get_district_name(last_location["idDistrito"]), last_location["local"])
+
+    benchmarks = [
+        Benchmark(
+            "parse.forecast",
+            lambda: service.parse_forecast_data(forecast_raw, district_name, location_name, target_date),
+            check=lambda forecast: forecast is not None and len(forecast.hourly_forecasts) == 24
+        ),
+        Benchmark(
+            "parse.locations",
+            service.get_districts_and_locations,
+            setup=service.get_districts_and_locations.cache_clear,
+            check=lambda districts: sum(len(items) for items in districts.values()) == len(locations)
+        ),
+        Benchmark(
+            "parse.agriculture",
+            lambda: service.get_agricultural_data("precipitation"),
+            setup=service._get_agricultural_dataset.cache_clear,
+            check=lambda data: len(data) > 10000
+        ),
+        Benchmark(
+            "lookup.find_location_id",
+            lambda: service.find_location_id(*lookup),
+            check=lambda found: found == last_location["globalIdLocal"]
+        ),
+        Benchmark(
+            "build.observations",
+            service.get_station_observations,
+            setup=service.get_station_observations.cache_clear,
+            check=lambda observations: len(observations) > 1000
+        ),
+        Benchmark(
+            "build.seismic",
+            lambda: service.get_seismic_data("continente"),
+            setup=service.get_seismic_data.cache_clear,
+            check=lambda events: len(events) > 100
+        ),
+        Benchmark(
+            "build.water_quality",
+            service.get_water_quality,
+            setup=service.get_water_quality.cache_clear,
+            check=lambda zones: len(zones) > 10 and zones[0].geometry is not None
+        )
+    ]
+
+    for name, path in ROUND_TRIPS.items():
+        benchmarks.append(Benchmark(
+            f"asgi.{name}.warm", lambda path=path: client.get(path),
+            check=lambda response: response.status_code == 200
+        ))
+        benchmarks.append(Benchmark(
+            f"asgi.{name}.cold", lambda path=path: client.get(path), setup=clear_caches,
+            check=lambda response: response.status_code == 200
+        ))
+
+    return benchmarks
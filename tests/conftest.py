@@ -0,0 +1,4 @@
+import os
+
+# As renovações sísmicas acrescentam ao catálogo persistente: nos testes fica em memória
+os.environ.setdefault("SEISMIC_CATALOG_PATH", ":memory:")
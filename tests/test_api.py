@@ -1,8 +1,13 @@
+import json
 import pytest
 from fastapi.testclient import TestClient
+from starlette.websockets import WebSocketDisconnect
 from unittest.mock import Mock, patch
 from app.main import app
-from app.models import DailyForecast, HourlyForecast, WeatherCondition, Location
+from app.models import (
+    DailyForecast, HourlyForecast, WeatherCondition, Location, AgriculturalData, WeatherStation,
+    SeismicData, WeatherWarning, FireRisk, UVIndex, WaterQuality, LocationBundle, StationObservation
+)
 
 client = TestClient(app)
 
@@ -143,3 +148,409 @@ class TestForecastAPI:
         assert "lisboa" in data["data"]["districts"]
         assert "porto" in data["data"]["districts"]
         assert "faro" in data["data"]["districts"]
+
+    @patch('app.routers.forecast.ipma_service.get_forecast_for_coordinates')
+    def test_get_forecast_by_coordinates(self, mock_get_forecast, mock_forecast, mock_locations):
+        mock_get_forecast.return_value = (mock_forecast, mock_locations[0], 1.234)
+
+        response = client.get("/forecast/by-coords?lat=38.72&lon=-9.14")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["data"]["location"] == "Lisboa"
+        assert "Lisboa" in data["message"]
+        mock_get_forecast.assert_called_once_with(38.72, -9.14, None)
+
+    @patch('app.routers.forecast.ipma_service.get_forecast_for_coordinates')
+    def test_get_forecast_by_coordinates_not_found(self, mock_get_forecast):
+        mock_get_forecast.return_value = None
+
+        response = client.get("/forecast/by-coords?lat=38.72&lon=-9.14")
+        assert response.status_code == 404
+
+
+class TestForecastQueryAPI:
+
+    @patch('app.routers.forecast.ipma_service.get_forecast')
+    @patch('app.routers.forecast.ipma_service.get_districts_and_locations')
+    def test_query_forecasts_threshold(self, mock_get_locations, mock_get_forecast):
+        mock_get_locations.return_value = {
+            "beja": [Location(id=1020500, name="Beja", district="Beja")],
+            "faro": [Location(id=1080500, name="Faro", district="Faro")]
+        }
+        mock_get_forecast.side_effect = lambda location_id: {"data": [
+            {"forecastDate": "2025-10-05", "tMax": "37.0" if location_id == 1020500 else "29.0"}
+        ]}
+
+        response = client.get("/forecast/query?variable=max_temperature&op=gt&value=35&day=2025-10-05")
+        assert response.status_code == 200
+
+        data = response.json()["data"]
+        assert data["dates"] == ["2025-10-05"]
+        assert [(m["location"], m["value"]) for m in data["matches"]] == [("Beja", 37.0)]
+        assert "groups" not in data
+
+        response = client.get("/forecast/query?variable=max_temperature&group_by=district")
+        assert [g["district"] for g in response.json()["data"]["groups"]] == ["Beja", "Faro"]
+
+    @patch('app.routers.forecast.ipma_service.get_weather_conditions')
+    @patch('app.routers.forecast.ipma_service.get_forecast')
+    @patch('app.routers.forecast.ipma_service.get_districts_and_locations')
+    def test_district_summaries(self, mock_get_locations, mock_get_forecast, mock_get_conditions):
+        mock_get_locations.return_value = {
+            "beja": [Location(id=1020500, name="Beja", district="Beja"),
+                     Location(id=1020900, name="Mértola", district="Beja")]
+        }
+        mock_get_forecast.side_effect = lambda location_id: {"data": [
+            {"forecastDate": "2025-10-05", "tMin": "15.0" if location_id == 1020500 else "17.0",
+             "tMax": "33.0" if location_id == 1020500 else "36.0", "precipitaProb": "5.0", "idWeatherType": 1}
+        ]}
+        mock_get_conditions.return_value = {1: "Céu limpo"}
+
+        response = client.get("/forecast/beja/summary")
+        assert response.status_code == 200
+
+        day = response.json()["data"][0]["days"][0]
+        assert (day["min_temperature"], day["max_temperature"], day["locations"]) == (15.0, 36.0, 2)
+        assert day["dominant_weather"] == {"id": 1, "description": "Céu limpo"}
+
+        response = client.get("/forecast/summary")
+        assert [summary["district"] for summary in response.json()["data"]] == ["Beja"]
+
+        assert client.get("/forecast/inexistente/summary").status_code == 404
+
+    def test_query_forecasts_invalid_parameters(self):
+        assert client.get("/forecast/query?variable=humidade").status_code == 400
+        assert client.get("/forecast/query?variable=max_temperature&op=gt").status_code == 400
+        assert client.get("/forecast/query?variable=max_temperature&op=eq&value=1").status_code == 400
+        assert client.get("/forecast/query?variable=max_temperature&group_by=area").status_code == 400
+
+
+class TestAgricultureAPI:
+
+    @patch('app.routers.agriculture.ipma_service.get_combined_agricultural_data')
+    def test_get_combined_agricultural_data(self, mock_get_combined):
+        mock_get_combined.return_value = [
+            AgriculturalData(
+                date="2025-10-01",
+                municipality="Lisboa",
+                evapotranspiration=3.1,
+                precipitation=0.5,
+                min_temperature=14.0,
+                max_temperature=24.0,
+                pdsi_index=-1.2
+            )
+        ]
+
+        response = client.get("/agriculture/combined?municipality=lisboa")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["success"] is True
+        assert data["data"][0]["pdsi_index"] == -1.2
+        mock_get_combined.assert_called_once_with("lisboa")
+
+    @patch('app.routers.agriculture.ipma_service.get_agricultural_data')
+    def test_get_precipitation_paginated_and_projected(self, mock_get_data):
+        mock_get_data.return_value = [
+            AgriculturalData(date=f"2025-10-0{day}", municipality="Lisboa", precipitation=float(day))
+            for day in range(1, 6)
+        ]
+
+        response = client.get("/agriculture/precipitation?limit=2&fields=date,precipitation")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert data["data"] == [
+            {"date": "2025-10-01", "precipitation": 1.0},
+            {"date": "2025-10-02", "precipitation": 2.0}
+        ]
+
+        pages = [data]
+        while pages[-1]["next_cursor"]:
+            response = client.get(f"/agriculture/precipitation?limit=2&cursor={pages[-1]['next_cursor']}")
+            pages.append(response.json())
+
+        assert [len(page["data"]) for page in pages] == [2, 2, 1]
+        assert pages[-1]["data"][0]["municipality"] == "Lisboa"
+
+    @patch('app.routers.agriculture.ipma_service.get_agricultural_data')
+    def test_cursor_rejected_after_refresh(self, mock_get_data):
+        records = [
+            AgriculturalData(date=f"2025-10-0{day}", municipality="Lisboa", precipitation=float(day))
+            for day in range(1, 6)
+        ]
+        mock_get_data.return_value = records
+        cursor = client.get("/agriculture/precipitation?limit=2").json()["next_cursor"]
+
+        # Registos acrescentados no fim não afetam a posição do cursor
+        mock_get_data.return_value = records + [AgriculturalData(date="2025-10-06", municipality="Lisboa")]
+        response = client.get(f"/agriculture/precipitation?limit=2&cursor={cursor}")
+        assert [row["date"] for row in response.json()["data"]] == ["2025-10-03", "2025-10-04"]
+
+        # A renovação removeu o registo mais antigo: continuar saltaria o 2025-10-03
+        mock_get_data.return_value = records[1:]
+        response = client.get(f"/agriculture/precipitation?limit=2&cursor={cursor}")
+        assert response.status_code == 409
+
+    def test_get_precipitation_invalid_page_parameters(self):
+        with patch('app.routers.agriculture.ipma_service.get_agricultural_data',
+                   return_value=[AgriculturalData(date="2025-10-01", municipality="Lisboa")]):
+            assert client.get("/agriculture/precipitation?fields=date,altitude").status_code == 400
+            assert client.get("/agriculture/precipitation?cursor=@@").status_code == 400
+
+    def test_get_agricultural_aggregates_invalid_metric(self):
+        response = client.get("/agriculture/aggregate/humidade")
+        assert response.status_code == 400
+
+    def test_get_agricultural_aggregates_invalid_period(self):
+        response = client.get("/agriculture/aggregate/precipitation?period=year")
+        assert response.status_code == 400
+
+    @patch('app.routers.agriculture.ipma_service.get_water_quality')
+    def test_get_water_quality_at(self, mock_get_water_quality):
+        mock_get_water_quality.return_value = [
+            WaterQuality(
+                zone_id="L5", zone_name="Estuário do Tejo", status="fechada", coordinates={},
+                geometry={"type": "Polygon", "coordinates": [[[-9.2, 38.6], [-8.9, 38.6], [-8.9, 38.9], [-9.2, 38.6]]]},
+                last_update="2025-10-01"
+            ),
+            WaterQuality(
+                zone_id="L6", zone_name="Lagoa de Albufeira", status="aberta", coordinates={},
+                geometry={"type": "Polygon", "coordinates": [[[-9.2, 38.4], [-9.1, 38.4], [-9.1, 38.5], [-9.2, 38.4]]]},
+                last_update="2025-10-01"
+            )
+        ]
+
+        response = client.get("/agriculture/water-quality/at?lat=38.65&lon=-9.0")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert [zone["zone_id"] for zone in data["data"]] == ["L5"]
+        assert "fechada" in data["message"]
+
+        response = client.get("/agriculture/water-quality/status/ABERTA")
+        assert [zone["zone_id"] for zone in response.json()["data"]] == ["L6"]
+
+        response = client.get("/agriculture/water-quality/at?lat=40&lon=-8")
+        assert response.json()["data"] == []
+
+
+class TestStationsAPI:
+
+    @pytest.fixture
+    def mock_stations(self):
+        return [
+            WeatherStation(id="1", name="Lisboa (Geofísico)", coordinates={"latitude": 38.719, "longitude": -9.15}),
+            WeatherStation(id="2", name="Porto (Pedras Rubras)", coordinates={"latitude": 41.233, "longitude": -8.681}),
+            WeatherStation(id="3", name="Faro (Aeroporto)", coordinates={"latitude": 37.017, "longitude": -7.969})
+        ]
+
+    @patch('app.routers.stations.ipma_service.get_weather_stations')
+    def test_get_nearest_stations(self, mock_get_stations, mock_stations):
+        mock_get_stations.return_value = mock_stations
+
+        response = client.get("/stations/nearest?lat=38.7&lon=-9.1&k=2")
+        assert response.status_code == 200
+
+        data = response.json()
+        assert [item["station"]["id"] for item in data["data"]] == ["1", "3"]
+        assert data["data"][0]["distance_km"] < data["data"][1]["distance_km"]
+
+    @patch('app.routers.stations.ipma_service.get_weather_stations')
+    def test_get_stations_within(self, mock_get_stations, mock_stations):
+        mock_get_stations.return_value = mock_stations
+
+        response = client.get("/stations/within?bbox=-9.5,38,-7,42")
+        assert response.status_code == 200
+        assert [station["id"] for station in response.json()["data"]] == ["1", "2"]
+
+    @patch('app.routers.stations.ipma_service.get_station_observations')
+    def test_get_observations_ndjson(self, mock_get_observations):
+        mock_get_observations.return_value = [
+            StationObservation(station_id=str(i), station_name=f"Estação {i}", timestamp="2025-10-04T12:00", temperature=20.0 + i)
+            for i in range(300)
+        ]
+
+        response = client.get("/stations/observations?format=ndjson&fields=station_id,temperature&limit=299")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        assert "etag" not in response.headers
+
+        lines = response.text.splitlines()
+        assert len(lines) == 299
+        assert json.loads(lines[0]) == {"station_id": "0", "temperature": 20.0}
+        assert response.headers["x-next-cursor"]
+
+        response = client.get("/stations/observations", headers={"Accept": "application/x-ndjson"})
+        assert len(response.text.splitlines()) == 300
+        assert client.get("/stations/observations?format=xml").status_code == 400
+
+    def test_get_stations_within_invalid_bbox(self):
+        response = client.get("/stations/within?bbox=1,2,3")
+        assert response.status_code == 400
+
+
+class TestSeismicAPI:
+
+    @pytest.fixture
+    def mock_events(self):
+        return [
+            SeismicData(id="1", magnitude=2.1, depth=10.0, location="Lisboa", time="2025-10-01T10:00:00",
+                        coordinates={"latitude": 38.7, "longitude": -9.1}),
+            SeismicData(id="2", magnitude=3.4, depth=12.0, location="Algarve", time="2025-10-03T08:30:00",
+                        coordinates={"latitude": 37.0, "longitude": -8.0})
+        ]
+
+    @patch('app.routers.seismic.ipma_service.get_seismic_data')
+    def test_get_seismic_data_with_filters(self, mock_get_seismic, mock_events):
+        mock_get_seismic.return_value = mock_events
+
+        response = client.get("/seismic/?min_mag=2&lat=38.7&lon=-9.1&radius_km=50")
+        assert response.status_code == 200
+        assert [event["id"] for event in response.json()["data"]] == ["1"]
+
+        response = client.get("/seismic/magnitude/3")
+        assert [event["id"] for event in response.json()["data"]] == ["2"]
+
+    @patch('app.routers.seismic.ipma_service.get_seismic_data')
+    def test_export_seismic_data(self, mock_get_seismic, mock_events):
+        mock_get_seismic.return_value = mock_events
+
+        response = client.get("/seismic/export?region=acores&format=csv")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        assert 'filename="seismic-acores.csv"' in response.headers["content-disposition"]
+
+        lines = response.text.splitlines()
+        assert lines[0].startswith("id,magnitude,depth,location,time,coordinates_latitude")
+        assert len(lines) == 3
+        mock_get_seismic.assert_called_once_with("acores")
+
+        assert client.get("/seismic/export?region=lua").status_code == 400
+        assert client.get("/seismic/export?format=xlsx").status_code == 400
+
+    def test_get_seismic_data_incomplete_radius(self):
+        response = client.get("/seismic/?lat=38.7&lon=-9.1")
+        assert response.status_code == 400
+
+    def test_get_seismic_data_invalid_since(self):
+        response = client.get("/seismic/?since=ontem")
+        assert response.status_code == 400
+
+
+class TestWarningsAPI:
+
+    @patch('app.routers.warnings.ipma_service.get_weather_warnings')
+    def test_get_active_warnings(self, mock_get_warnings):
+        mock_get_warnings.return_value = [
+            WeatherWarning(id="LSB", area="LSB", warning_type="Vento", level="amarelo",
+                           start_time="2025-10-04T06:00:00", end_time="2025-10-04T18:00:00",
+                           description="", phenomenon="")
+        ]
+
+        response = client.get("/warnings/active?at=2025-10-04T12:00:00&area=LSB")
+        assert response.status_code == 200
+        assert len(response.json()["data"]) == 1
+
+        response = client.get("/warnings/active?at=2025-10-05T12:00:00")
+        assert response.json()["data"] == []
+
+    def test_get_active_warnings_invalid_instant(self):
+        response = client.get("/warnings/active?at=amanha")
+        assert response.status_code == 400
+
+    @patch('app.routers.warnings.ipma_service.get_weather_warnings')
+    def test_warnings_websocket_sends_snapshot(self, mock_get_warnings):
+        mock_get_warnings.return_value = [
+            WeatherWarning(id="LSB", area="LSB", warning_type="Vento", level="amarelo",
+                           start_time="2099-10-04T06:00:00", end_time="2099-10-04T18:00:00",
+                           description="", phenomenon="")
+        ]
+
+        with client.websocket_connect("/warnings/ws") as websocket:
+            event = websocket.receive_json()
+        version = client.get("/warnings/").json()["version"]
+
+        assert event["type"] == "snapshot"
+        assert event["version"] == version
+        assert [w["id"] for w in event["warnings"]] == ["LSB"]
+
+    @patch('app.routers.warnings.broadcaster.snapshot', side_effect=RuntimeError("falha"))
+    def test_warnings_websocket_closed_on_broadcast_error(self, mock_snapshot):
+        with patch('app.routers.warnings.logger') as mock_logger:
+            with client.websocket_connect("/warnings/ws") as websocket:
+                with pytest.raises(WebSocketDisconnect) as disconnect:
+                    websocket.receive_json()
+
+        assert disconnect.value.code == 1011
+        mock_logger.error.assert_called_once()
+
+
+class TestMarineAPI:
+
+    @patch('app.routers.marine.ipma_service.get_fire_risk')
+    def test_get_fire_risk_since_version(self, mock_get_fire_risk):
+        mock_get_fire_risk.return_value = [
+            FireRisk(date="2025-10-04", location="Lisboa", risk_level=2, risk_description="Moderado")
+        ]
+        version = client.get("/marine/fire-risk").json()["version"]
+
+        mock_get_fire_risk.return_value = [
+            FireRisk(date="2025-10-04", location="Lisboa", risk_level=4, risk_description="Muito Elevado"),
+            FireRisk(date="2025-10-04", location="Faro", risk_level=3, risk_description="Elevado")
+        ]
+        response = client.get(f"/marine/fire-risk?since_version={version}")
+        assert response.status_code == 200
+
+        data = response.json()["data"]
+        assert data["version"] == version + 1
+        assert data["full_snapshot"] is False
+        assert [risk["location"] for risk in data["inserted"]] == ["Faro"]
+        assert [risk["risk_level"] for risk in data["updated"]] == [4]
+        assert data["removed"] == []
+
+    @patch('app.routers.marine.ipma_service.get_uv_index')
+    def test_get_uv_by_level_with_filters(self, mock_get_uv):
+        mock_get_uv.return_value = [
+            UVIndex(date="2025-10-04", location="Lisboa", uv_index=6, uv_level="Alto"),
+            UVIndex(date="2025-10-05", location="Lisboa", uv_index=7, uv_level="Alto"),
+            UVIndex(date="2025-10-04", location="Faro", uv_index=3, uv_level="Moderado")
+        ]
+
+        response = client.get("/marine/uv-index/level/alto?date=2025-10-05&location=lisboa")
+        assert response.status_code == 200
+        assert [uv["uv_index"] for uv in response.json()["data"]] == [7]
+
+    def test_get_uv_by_level_invalid(self):
+        response = client.get("/marine/uv-index/level/fortissimo")
+        assert response.status_code == 400
+
+
+class TestLocationsAPI:
+
+    @patch('app.routers.locations.ipma_service.get_locations_by_district')
+    @patch('app.routers.locations.ipma_service.get_location_bundle')
+    def test_get_location_bundle_not_found(self, mock_get_bundle, mock_get_locations):
+        mock_get_bundle.return_value = None
+        mock_get_locations.return_value = [Location(id=1080800, name="Lagos", district="Faro")]
+
+        response = client.get("/locations/faro/inexistente/bundle")
+        assert response.status_code == 404
+        assert "inexistente" in response.json()["detail"]
+
+    @patch('app.routers.locations.ipma_service.get_location_bundle')
+    def test_get_location_bundle_omits_empty_fields(self, mock_get_bundle):
+        mock_get_bundle.return_value = LocationBundle(
+            location=Location(id=1080800, name="Lagos", district="Faro", warning_area="FAR"),
+            fire_risk=[FireRisk(date="2025-10-04", location="Lagos", risk_level=4, risk_description="Muito Elevado")]
+        )
+
+        response = client.get("/locations/faro/lagos/bundle?day=2025-10-04")
+        assert response.status_code == 200
+
+        data = response.json()["data"]
+        assert "forecast" not in data
+        assert "latitude" not in data["location"]
+        assert data["fire_risk"][0]["risk_level"] == 4
+        mock_get_bundle.assert_called_once_with("faro", "lagos", "2025-10-04")
@@ -0,0 +1,44 @@
+import json
+from benchmarks.fixtures import recorded_ipma, climate_csv, locations_payload
+from benchmarks.runner import Benchmark, compare, run_benchmark
+from benchmarks.suite import ROUND_TRIPS, build_suite, clear_caches
+
+
+class TestBenchmarks:
+
+    def test_fixtures_are_deterministic(self):
+        assert json.dumps(locations_payload()) == json.dumps(locations_payload())
+        assert climate_csv("pdsi") == climate_csv("pdsi")
+        assert climate_csv("pdsi") != climate_csv("precipitation")
+
+    def test_suite_runs_on_recorded_payloads(self):
+        # Cada benchmark corre uma vez e valida o resultado: os dados gravados têm de
+        # continuar a corresponder ao que os parsers esperam
+        with recorded_ipma() as recorded:
+            benchmarks = build_suite(recorded)
+            for benchmark in benchmarks:
+                benchmark.run_once()
+
+        names = {benchmark.name for benchmark in benchmarks}
+        assert {"parse.forecast", "parse.agriculture", "lookup.find_location_id",
+                "build.observations", "build.seismic"} <= names
+        assert {f"asgi.{name}.cold" for name in ROUND_TRIPS} <= names
+        assert recorded.requests > 0
+        clear_caches()
+
+    def test_run_and_compare(self):
+        calls = []
+        result = run_benchmark(
+            Benchmark("demo.lista", lambda: [0] * 1000, setup=lambda: calls.append(1)),
+            min_time=0.01, rounds=2
+        )
+
+        assert result["ops_per_sec"] > 0 and result["rounds"] >= 2
+        assert result["peak_kib"] >= 7.8
+        assert calls
+
+        faster = dict(result, ops_per_sec=result["ops_per_sec"] * 2)
+        smaller = dict(result, peak_kib=result["peak_kib"] / 2)
+        assert compare([result], [result]) == []
+        assert len(compare([result], [faster])) == 1
+        assert "pico" in compare([result], [smaller])[0]
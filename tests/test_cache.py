@@ -0,0 +1,79 @@
+import pytest
+from unittest.mock import patch
+from app.services.cache import dependencies_current, track_dependencies, ttl_cache
+
+
+class TestTTLCache:
+
+    @pytest.fixture
+    def clock(self):
+        now = [1000.0]
+        with patch('app.services.cache.time.monotonic', side_effect=lambda: now[0]):
+            yield now
+
+    def test_entries_expire_after_ttl(self, clock):
+        calls = []
+
+        @ttl_cache("test_expiry", ttl=60)
+        def fetch(value):
+            calls.append(value)
+            return [value]
+
+        first = fetch(1)
+        assert fetch(1) is first
+
+        clock[0] += 61
+        refreshed = fetch(1)
+        assert refreshed == first and refreshed is not first
+        assert calls == [1, 1]
+
+        info = fetch.cache_info()
+        assert (info.hits, info.misses, info.stale) == (1, 1, 1)
+
+    def test_dependencies_track_entry_versions(self, clock):
+        @ttl_cache("test_versions", ttl=60)
+        def fetch(value):
+            return [value]
+
+        with track_dependencies() as dependencies:
+            fetch(1)
+            clock[0] += 30
+            fetch(2)
+            fetch(2)
+        one, two = dependencies.items()
+        assert dependencies_current([one, two])
+
+        # A renovação de uma entrada não altera a versão das outras do mesmo conjunto
+        clock[0] += 31
+        assert fetch.entry_version((1,)) is None
+        fetch(1)
+        assert not dependencies_current([one, two])
+        assert dependencies_current([two])
+
+        fetch.cache_clear()
+        assert not dependencies_current([two])
+
+    def test_maxsize_evicts_least_recently_used(self, clock):
+        @ttl_cache("test_eviction", maxsize=2, ttl=60)
+        def fetch(value):
+            return [value]
+
+        one = fetch(1)
+        fetch(2)
+        fetch(1)
+        fetch(3)
+
+        assert fetch(1) is one
+        assert fetch.cache_info().evictions == 1
+        assert fetch.cache_info().currsize == 2
+
+    def test_bound_methods_keep_cache_clear(self, clock):
+        class Service:
+            @ttl_cache("test_methods", ttl=60)
+            def fetch(self):
+                return object()
+
+        service = Service()
+        first = service.fetch()
+        service.fetch.cache_clear()
+        assert service.fetch() is not first
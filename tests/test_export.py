@@ -0,0 +1,68 @@
+import csv
+import io
+import pytest
+from unittest.mock import patch
+from app.models import AgriculturalData, SeismicData
+from app.services import export
+from app.services.export import available_formats, encode_records, record_columns, resolve_format
+from app.services.ipma_service import IPMAService
+
+
+class TestExport:
+
+    @pytest.fixture
+    def events(self):
+        return [
+            SeismicData(id="1", magnitude=2.1, depth=10.0, location="Lisboa, Portugal", time="2025-10-01T10:00:00",
+                        coordinates={"latitude": 38.7, "longitude": -9.1}),
+            SeismicData(id="2", magnitude=3.4, depth=12.0, location="Algarve", time="2025-10-03T08:30:00",
+                        coordinates={"latitude": 37.0, "longitude": -8.0}, intensity="III")
+        ]
+
+    def test_record_columns_flattens_dicts(self, events):
+        columns = record_columns(events, SeismicData)
+
+        assert list(columns) == [
+            "id", "magnitude", "depth", "location", "time",
+            "coordinates_latitude", "coordinates_longitude", "intensity", "region"
+        ]
+        assert columns["coordinates_longitude"] == [-9.1, -8.0]
+        assert columns["intensity"] == [None, "III"]
+
+    def test_encode_csv(self, events):
+        rows = list(csv.DictReader(io.StringIO(encode_records(events, SeismicData, "csv").decode())))
+
+        assert len(rows) == 2
+        assert rows[0]["location"] == "Lisboa, Portugal"
+        assert rows[0]["intensity"] == ""
+        assert rows[1]["coordinates_latitude"] == "37.0"
+
+    def test_encode_csv_empty_keeps_header(self):
+        assert encode_records([], AgriculturalData, "csv").decode().startswith("date,municipality,evapotranspiration")
+
+    def test_resolve_format_without_pyarrow(self):
+        with patch.object(export, "pyarrow", None):
+            assert available_formats() == ["csv"]
+            assert resolve_format(None) == "csv"
+            with pytest.raises(ValueError):
+                resolve_format("parquet")
+
+    def test_encode_arrow_round_trip(self, events):
+        pyarrow = pytest.importorskip("pyarrow")
+        import pyarrow.ipc
+
+        assert resolve_format(None) == "arrow"
+        table = pyarrow.ipc.open_file(pyarrow.py_buffer(encode_records(events, SeismicData, "arrow"))).read_all()
+        assert table.num_rows == 2
+        assert table.column("magnitude").to_pylist() == [2.1, 3.4]
+
+    def test_service_export_generated_once_per_refresh(self, events):
+        service = IPMAService()
+
+        with patch("app.services.ipma_service.encode_records", wraps=encode_records) as mock_encode:
+            first = service.export_dataset("seismic:continente", events, SeismicData, "csv")
+            assert service.export_dataset("seismic:continente", events, SeismicData, "csv") is first
+            assert mock_encode.call_count == 1
+
+            service.export_dataset("seismic:continente", list(events), SeismicData, "csv")
+            assert mock_encode.call_count == 2
@@ -0,0 +1,72 @@
+import math
+import pytest
+from app.models import Location
+from app.services.forecast_grid import ForecastGrid
+
+
+class TestForecastGrid:
+
+    @pytest.fixture
+    def grid(self):
+        locations = [
+            Location(id=1, name="Évora", district="Évora"),
+            Location(id=2, name="Beja", district="Beja"),
+            Location(id=3, name="Mértola", district="Beja"),
+            Location(id=4, name="Sem dados", district="Faro")
+        ]
+
+        def day(date, t_max, t_min, prob, weather):
+            return {"forecastDate": date, "tMax": t_max, "tMin": t_min, "precipitaProb": prob, "idWeatherType": weather}
+
+        payloads = {
+            1: {"data": [day("2025-10-04", "34.0", "15.1", "0.0", 1), day("2025-10-05", "36.2", "16.0", "10.0", 2)]},
+            2: {"data": [day("2025-10-04", "35.5", "16.3", "85.0", 6), day("2025-10-05", "37.1", "17.2", "90.0", 9)]},
+            3: {"data": [day("2025-10-05", "38.0", "18.0", None, 1)]},
+            4: None
+        }
+        return ForecastGrid(locations, payloads)
+
+    def test_layout(self, grid):
+        assert len(grid) == 3
+        assert grid.dates == ["2025-10-04", "2025-10-05"]
+        assert len(grid.columns["max_temperature"]) == 6
+        # Mértola não tem previsão para 2025-10-04 nem probabilidade de precipitação
+        assert math.isnan(grid.columns["max_temperature"][2])
+        assert math.isnan(grid.columns["precipitation_probability"][5])
+
+    def test_threshold(self, grid):
+        cells = grid.cells("max_temperature", ["2025-10-05"], "gt", 36.5)
+        assert [(grid.locations[position].name, value) for position, _, value in cells] == [
+            ("Beja", 37.1), ("Mértola", 38.0)
+        ]
+
+        cells = grid.cells("precipitation_probability", None, "ge", 80)
+        assert [(position, grid.dates[date_position]) for position, date_position, _ in cells] == [
+            (1, "2025-10-04"), (1, "2025-10-05")
+        ]
+
+    def test_top_k(self, grid):
+        cells = grid.cells("max_temperature")
+        assert [value for _, _, value in grid.top_k(cells, 2)] == [38.0, 37.1]
+        assert [value for _, _, value in grid.top_k(cells, 1, largest=False)] == [34.0]
+
+    def test_group_by_district(self, grid):
+        groups = grid.group_by_district(grid.cells("max_temperature", ["2025-10-05"]))
+        assert groups == [
+            {"district": "Beja", "count": 2, "min": 37.1, "max": 38.0, "mean": 37.55},
+            {"district": "Évora", "count": 1, "min": 36.2, "max": 36.2, "mean": 36.2}
+        ]
+
+    def test_unknown_dates_are_ignored(self, grid):
+        assert grid.cells("max_temperature", ["2030-01-01"]) == []
+
+    def test_district_summaries(self, grid):
+        summaries = grid.district_summaries()
+
+        assert list(summaries) == ["Beja", "Évora"]
+        assert summaries["Beja"] == [
+            {"date": "2025-10-04", "locations": 1, "min_temperature": 16.3, "max_temperature": 35.5,
+             "dominant_weather_type": 6, "max_precipitation_probability": 85.0},
+            {"date": "2025-10-05", "locations": 2, "min_temperature": 17.2, "max_temperature": 38.0,
+             "dominant_weather_type": 1, "max_precipitation_probability": 90.0}
+        ]
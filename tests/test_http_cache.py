@@ -0,0 +1,170 @@
+import gzip
+import pytest
+from unittest.mock import Mock, patch
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from app.middleware import HTTPCacheMiddleware
+from app.middleware.http_cache import COMPRESSORS, negotiate_encoding
+from app.services.cache import ttl_cache
+
+
+class TestHTTPCacheMiddleware:
+
+    @pytest.fixture
+    def service(self):
+        class Service:
+            calls = 0
+            value = "a"
+
+            @ttl_cache("test_http", ttl=300)
+            def fetch(self):
+                return {"value": self.value}
+
+        return Service()
+
+    @pytest.fixture
+    def client(self, service):
+        app = FastAPI()
+        app.add_middleware(HTTPCacheMiddleware, routes=(("/data", ("test_http",)),))
+
+        @app.get("/data/")
+        async def get_data():
+            service.calls += 1
+            return service.fetch()
+
+        @app.get("/data/stream")
+        async def stream():
+            return StreamingResponse(iter([b"data: 1\n\n"]), media_type="text/event-stream")
+
+        @app.get("/other")
+        async def other():
+            return {"ok": True}
+
+        return TestClient(app)
+
+    def test_sets_validators(self, client):
+        response = client.get("/data/")
+
+        assert response.status_code == 200
+        assert response.headers["etag"].startswith('"')
+        assert response.headers["cache-control"] == "public, max-age=300"
+        assert "last-modified" in response.headers
+        assert "etag" not in client.get("/other").headers
+
+    def test_if_none_match_skips_endpoint_until_refresh(self, client, service):
+        # Os validadores guardados na resposta que obteve os dados já valem para o pedido seguinte
+        etag = client.get("/data/").headers["etag"]
+        calls = service.calls
+
+        response = client.get("/data/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert response.content == b""
+        assert response.headers["etag"] == etag
+        assert service.calls == calls
+
+        # Renovação com o mesmo conteúdo: o endpoint corre, mas o ETag mantém-se
+        service.fetch.cache_clear()
+        response = client.get("/data/", headers={"If-None-Match": etag})
+        assert response.status_code == 304
+        assert service.calls == calls + 1
+
+        # Renovação com conteúdo novo
+        service.value = "b"
+        service.fetch.cache_clear()
+        response = client.get("/data/", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json() == {"value": "b"}
+        assert response.headers["etag"] != etag
+
+    def test_refresh_only_invalidates_dependent_urls(self):
+        class Service:
+            calls = []
+
+            @ttl_cache("test_http_keys", ttl=300)
+            def forecast(self, location):
+                return {"location": location}
+
+        service = Service()
+        app = FastAPI()
+        app.add_middleware(HTTPCacheMiddleware, routes=(("/forecast", ("test_http_keys",)),))
+
+        @app.get("/forecast/{location}")
+        async def get_forecast(location: str):
+            service.calls.append(location)
+            return service.forecast(location)
+
+        client = TestClient(app)
+        lisboa = client.get("/forecast/lisboa").headers["etag"]
+        client.get("/forecast/porto")
+
+        # Obter outra localidade do mesmo conjunto não invalida o validador de Lisboa
+        client.get("/forecast/faro")
+        service.calls.clear()
+        assert client.get("/forecast/lisboa", headers={"If-None-Match": lisboa}).status_code == 304
+        assert service.calls == []
+
+    @patch('app.services.ipma_service.requests.Session.get')
+    def test_not_modified_keeps_cors_headers(self, mock_get):
+        from app.main import app
+        from app.routers.seismic import ipma_service
+
+        payload = {"data": [{"id": 1, "magnitude": 4.1, "depth": 8, "lat": 38.7, "lon": -9.1, "time": "2025-10-03T08:30:00"}]}
+        mock_get.return_value = Mock(status_code=200, json=lambda: payload, raise_for_status=lambda: None)
+        ipma_service.get_seismic_data.cache_clear()
+
+        client = TestClient(app)
+        headers = {"Origin": "https://example.org"}
+        etag = client.get("/seismic/magnitude/4", headers=headers).headers["etag"]
+
+        # 304 respondido pela cache HTTP sem executar o endpoint, ainda assim com CORS
+        with patch('app.routers.seismic.ipma_service.get_seismic_data') as endpoint_fetch:
+            response = client.get("/seismic/magnitude/4", headers={**headers, "If-None-Match": etag})
+            assert not endpoint_fetch.called
+
+        assert response.status_code == 304
+        assert response.headers["access-control-allow-origin"] == "*"
+        ipma_service.get_seismic_data.cache_clear()
+
+    def test_streaming_responses_pass_through(self, client):
+        response = client.get("/data/stream")
+        assert response.status_code == 200
+        assert "etag" not in response.headers
+
+    def test_compressed_variants_are_generated_once(self, service):
+        app = FastAPI()
+        app.add_middleware(HTTPCacheMiddleware, routes=(("/big", ("test_http",)),))
+
+        @app.get("/big")
+        async def big():
+            return {"values": list(range(2000))}
+
+        client = TestClient(app)
+
+        with patch.dict(COMPRESSORS, {"gzip": Mock(side_effect=lambda body: gzip.compress(body))}):
+            response = client.get("/big", headers={"Accept-Encoding": "gzip"})
+            assert response.headers["content-encoding"] == "gzip"
+            assert response.headers["vary"] == "Accept-Encoding, Accept"
+            assert response.headers["etag"].endswith('-gzip"')
+            assert len(response.json()["values"]) == 2000
+
+            client.get("/big", headers={"Accept-Encoding": "gzip"})
+            assert COMPRESSORS["gzip"].call_count == 1
+
+        identity = client.get("/big", headers={"Accept-Encoding": "identity"})
+        assert "content-encoding" not in identity.headers
+        assert identity.headers["etag"] == response.headers["etag"].replace('-gzip"', '"')
+
+        # O ETag comprimido também valida a representação sem compressão
+        revalidated = client.get("/big", headers={"Accept-Encoding": "identity", "If-None-Match": response.headers["etag"]})
+        assert revalidated.status_code == 304
+
+    def test_small_bodies_are_not_compressed(self, client):
+        response = client.get("/data/", headers={"Accept-Encoding": "gzip"})
+        assert "content-encoding" not in response.headers
+
+    def test_negotiate_encoding(self):
+        assert negotiate_encoding("gzip, deflate") == "gzip"
+        assert negotiate_encoding("gzip;q=0, deflate") is None
+        assert negotiate_encoding("*") in COMPRESSORS
+        assert negotiate_encoding(None) is None
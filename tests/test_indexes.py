@@ -0,0 +1,135 @@
+import random
+import pytest
+from datetime import datetime, timedelta
+from app.models import FireRisk, SeismicData, WeatherWarning
+from app.services.indexes import IntervalIndex, LevelIndex, SeismicIndex, WarningIndex, parse_timestamp
+
+
+def make_event(event_id, magnitude, time, lat, lon):
+    return SeismicData(
+        id=event_id,
+        magnitude=magnitude,
+        depth=10.0,
+        location="Teste",
+        time=time,
+        coordinates={"latitude": lat, "longitude": lon}
+    )
+
+
+class TestSeismicIndex:
+
+    @pytest.fixture
+    def events(self):
+        return [
+            make_event("1", 2.1, "2025-10-01T10:00:00", 38.7, -9.1),   # Lisboa
+            make_event("2", 3.4, "2025-10-03T08:30:00", 37.0, -8.0),   # Algarve
+            make_event("3", 1.2, "2025-10-05T22:15:00", 38.8, -9.2),   # Lisboa
+            make_event("4", 4.0, "", 41.1, -8.6)                       # Porto, sem hora
+        ]
+
+    def test_parse_timestamp(self):
+        assert parse_timestamp("2025-10-01T10:00:00Z") == datetime(2025, 10, 1, 10, 0)
+        assert parse_timestamp("2025-10-01T11:00:00+01:00") == datetime(2025, 10, 1, 10, 0)
+        assert parse_timestamp("2025-10-01") == datetime(2025, 10, 1)
+        assert parse_timestamp("ontem") is None
+        assert parse_timestamp("") is None
+
+    def test_query_without_filters_returns_catalog(self, events):
+        assert SeismicIndex(events).query() == events
+
+    def test_query_by_magnitude(self, events):
+        result = SeismicIndex(events).query(min_magnitude=2.1)
+        assert [event.id for event in result] == ["1", "2", "4"]
+
+    def test_query_since(self, events):
+        result = SeismicIndex(events).query(since=datetime(2025, 10, 3))
+        assert [event.id for event in result] == ["2", "3"]
+
+    def test_query_near(self, events):
+        result = SeismicIndex(events).query(near=(38.75, -9.15, 30))
+        assert [event.id for event in result] == ["1", "3"]
+
+    def test_query_combines_filters(self, events):
+        index = SeismicIndex(events)
+        assert [e.id for e in index.query(min_magnitude=2.0, near=(38.75, -9.15, 30))] == ["1"]
+        assert [e.id for e in index.query(bbox=(36.5, -10.0, 39.0, -7.5), since=datetime(2025, 10, 2))] == ["2", "3"]
+
+
+def make_warning(area, level, start, end):
+    return WeatherWarning(
+        id=area,
+        area=area,
+        warning_type="Precipitação",
+        level=level,
+        start_time=start,
+        end_time=end,
+        description="",
+        phenomenon=""
+    )
+
+
+class TestIntervalIndex:
+
+    def test_stab_matches_linear_scan(self):
+        rng = random.Random(7)
+        base = datetime(2025, 10, 1)
+        intervals = []
+        for value in range(200):
+            start = base + timedelta(hours=rng.randint(0, 240))
+            intervals.append((start, start + timedelta(hours=rng.randint(0, 48)), value))
+
+        index = IntervalIndex(intervals)
+
+        for hours in range(0, 300, 7):
+            at = base + timedelta(hours=hours)
+            expected = sorted(value for start, end, value in intervals if start <= at <= end)
+            assert sorted(index.stab(at)) == expected
+
+
+class TestWarningIndex:
+
+    @pytest.fixture
+    def warnings(self):
+        return [
+            make_warning("LSB", "amarelo", "2025-10-04T06:00:00", "2025-10-04T18:00:00"),
+            make_warning("PTO", "laranja", "2025-10-04T12:00:00", "2025-10-05T00:00:00"),
+            make_warning("LSB", "verde", "2025-10-05T00:00:00", "2025-10-06T00:00:00"),
+            make_warning("FAR", "vermelho", "", "")
+        ]
+
+    def test_with_level(self, warnings):
+        assert [w.id for w in WarningIndex(warnings).with_level("LARANJA")] == ["PTO"]
+
+    def test_active_at(self, warnings):
+        index = WarningIndex(warnings)
+
+        assert [w.id for w in index.active_at(datetime(2025, 10, 4, 13))] == ["LSB", "PTO"]
+        assert [w.id for w in index.active_at(datetime(2025, 10, 4, 13), area="pto")] == ["PTO"]
+        assert [w.level for w in index.active_at(datetime(2025, 10, 5, 12), area="LSB")] == ["verde"]
+        assert index.active_at(datetime(2025, 10, 4, 13), level="vermelho") == []
+
+
+class TestLevelIndex:
+
+    @pytest.fixture
+    def risks(self):
+        return [
+            FireRisk(date="2025-10-04", location="Lisboa", risk_level=2, risk_description="Moderado"),
+            FireRisk(date="2025-10-04", location="Faro", risk_level=5, risk_description="Máximo"),
+            FireRisk(date="2025-10-05", location="Lisboa", risk_level=4, risk_description="Muito Elevado"),
+            FireRisk(date="2025-10-05", location="Porto", risk_level=1, risk_description="Baixo")
+        ]
+
+    def test_query_by_min_level(self, risks):
+        index = LevelIndex(risks, lambda risk: risk.risk_level, (1, 2, 3, 4, 5))
+
+        assert [r.location for r in index.query(min_level=4)] == ["Faro", "Lisboa"]
+        assert index.query(min_level=1) == risks
+        assert index.query(level=3) == []
+
+    def test_query_by_date_and_location(self, risks):
+        index = LevelIndex(risks, lambda risk: risk.risk_level, (1, 2, 3, 4, 5))
+
+        assert [r.risk_level for r in index.query(location="LISBOA")] == [2, 4]
+        assert [r.location for r in index.query(min_level=2, date="2025-10-05")] == ["Lisboa"]
+        assert index.query(date="2025-10-06") == []
@@ -1,7 +1,9 @@
 import pytest
 from unittest.mock import Mock, patch
 from app.services.ipma_service import IPMAService
-from app.models import Location, DailyForecast
+from app.models import (
+    Location, DailyForecast, AgriculturalData, SeismicData, WeatherWarning, FireRisk, UVIndex, SeaState
+)
 
 
 class TestIPMAService:
@@ -169,3 +171,249 @@ class TestIPMAService:
             # Teste para distrito inexistente
             locations = ipma_service.get_locations_by_district("inexistente")
             assert len(locations) == 0
+
+    @patch('app.services.ipma_service.requests.Session.get')
+    def test_get_combined_agricultural_data(self, mock_get, ipma_service):
+        csv_by_endpoint = {
+            "evapotranspiration": "date,municipality,value\n2025-10-01,Lisboa,3.1\n2025-10-01,Porto,2.4",
+            "precipitation": "date,municipality,value\n2025-10-01,Lisboa,0.5",
+            "temperature-min": "date,municipality,value\n2025-10-01,Lisboa,14.0",
+            "temperature-max": "date,municipality,value\n2025-10-01,Lisboa,24.0",
+            "pdsi": "date,municipality,value\n2025-10-01,Lisboa,-1.2"
+        }
+        mock_get.side_effect = lambda url, *args, **kwargs: Mock(
+            status_code=200, text=csv_by_endpoint[url.rsplit('/', 1)[-1]]
+        )
+
+        ipma_service._get_agricultural_dataset.cache_clear()
+
+        result = ipma_service.get_combined_agricultural_data()
+
+        assert len(result) == 2
+        lisboa = next(row for row in result if row.municipality == "Lisboa")
+        assert lisboa.evapotranspiration == 3.1
+        assert lisboa.precipitation == 0.5
+        assert lisboa.min_temperature == 14.0
+        assert lisboa.max_temperature == 24.0
+        assert lisboa.pdsi_index == -1.2
+        assert mock_get.call_count == 5
+
+        # O resultado da junção é reutilizado até à próxima renovação
+        assert ipma_service.get_combined_agricultural_data() == result
+        assert ipma_service.get_combined_agricultural_data("porto")[0].precipitation is None
+        assert mock_get.call_count == 5
+
+    def test_get_agricultural_aggregates(self, ipma_service):
+        precipitation = [
+            AgriculturalData(date="2025-09-29", municipality="Lisboa", precipitation=1.0),
+            AgriculturalData(date="2025-09-30", municipality="Lisboa", precipitation=2.0),
+            AgriculturalData(date="2025-10-01", municipality="Lisboa", precipitation=3.0),
+            AgriculturalData(date="2025-10-06", municipality="Lisboa", precipitation=4.0)
+        ]
+
+        with patch.object(ipma_service, '_get_agricultural_dataset', return_value=precipitation):
+            weekly = ipma_service.get_agricultural_aggregates("precipitation", "week")
+            assert [(a.period_start, a.total, a.count) for a in weekly] == [
+                ("2025-09-29", 6.0, 3), ("2025-10-06", 4.0, 1)
+            ]
+
+            monthly = ipma_service.get_agricultural_aggregates("precipitation", "month")
+            assert [a.total for a in monthly] == [3.0, 7.0]
+
+            rolling = ipma_service.get_agricultural_aggregates("precipitation", "rolling", window=2)
+            assert [a.total for a in rolling] == [1.0, 3.0, 5.0, 7.0]
+            assert rolling[-1].trend == 2.0
+
+            # Memoizado por (métrica, janela) enquanto a fonte não for renovada
+            assert ipma_service.get_agricultural_aggregates("precipitation", "week") == weekly
+
+    def test_get_agricultural_aggregates_gdd(self, ipma_service):
+        datasets = {
+            "temperature_min": [
+                AgriculturalData(date="2025-10-01", municipality="Beja", min_temperature=12.0),
+                AgriculturalData(date="2025-10-02", municipality="Beja", min_temperature=4.0)
+            ],
+            "temperature_max": [
+                AgriculturalData(date="2025-10-01", municipality="Beja", max_temperature=28.0),
+                AgriculturalData(date="2025-10-02", municipality="Beja", max_temperature=10.0)
+            ]
+        }
+        datasets = {data_type: datasets.get(data_type, []) for data_type in ipma_service.AGRICULTURAL_DATASETS}
+
+        with patch.object(ipma_service, '_get_agricultural_dataset', side_effect=datasets.__getitem__), \
+                patch.object(ipma_service, '_aggregate_agricultural_series',
+                             wraps=ipma_service._aggregate_agricultural_series) as aggregate:
+            result = ipma_service.get_agricultural_aggregates("gdd", "month")
+            assert len(result) == 1
+            assert result[0].total == 10.0
+
+            # Memoizado enquanto os conjuntos de origem não forem renovados
+            assert ipma_service.get_agricultural_aggregates("gdd", "month")[0] is result[0]
+            assert aggregate.call_count == 1
+
+    def test_find_nearest_location(self, ipma_service):
+        mock_locations = {
+            "lisboa": [
+                Location(id=1110600, name="Lisboa", district="Lisboa", latitude=38.7660, longitude=-9.1286),
+                Location(id=1110601, name="Cascais", district="Lisboa", latitude=38.6979, longitude=-9.4215)
+            ],
+            "porto": [
+                Location(id=1131200, name="Porto", district="Porto", latitude=41.1580, longitude=-8.6294),
+                Location(id=1131201, name="Sem coordenadas", district="Porto")
+            ]
+        }
+
+        with patch.object(ipma_service, 'get_districts_and_locations', return_value=mock_locations):
+            location, distance = ipma_service.find_nearest_location(38.70, -9.40)
+            assert location.name == "Cascais"
+            assert distance < 5
+
+            location, _ = ipma_service.find_nearest_location(41.0, -8.6)
+            assert location.name == "Porto"
+
+    def test_get_all_seismic_data(self, ipma_service):
+        def event(event_id, time, region):
+            return SeismicData(id=event_id, magnitude=2.0, depth=10.0, location="", time=time,
+                               coordinates={"latitude": 0.0, "longitude": 0.0}, region=region)
+
+        catalogs = {
+            "continente": [event("c1", "2025-10-01T10:00:00", "continente"), event("c2", "2025-10-04T10:00:00", "continente")],
+            "acores": [event("a1", "2025-10-03T10:00:00", "acores"), event("c2", "2025-10-04T10:00:00", "acores")],
+            "madeira": [event("m1", "", "madeira"), event("m2", "2025-10-02T10:00:00", "madeira")]
+        }
+
+        with patch.object(ipma_service, 'get_seismic_data', side_effect=lambda region: catalogs[region]):
+            result = ipma_service.get_all_seismic_data()
+
+            assert [e.id for e in result] == ["c2", "a1", "m2", "c1", "m1"]
+            assert ipma_service.get_all_seismic_data() is result
+
+            # Renovar só os Açores volta a fundir, mas reaproveita as outras regiões ordenadas
+            catalogs["acores"] = [event("a2", "2025-10-05T10:00:00", "acores")]
+            assert [e.id for e in ipma_service.get_all_seismic_data()] == ["a2", "c2", "m2", "c1", "m1"]
+
+    @patch('app.services.ipma_service.requests.Session.get')
+    def test_seismic_refresh_ingests_into_catalog(self, mock_get, ipma_service, tmp_path):
+        def feed(*event_ids):
+            payload = {"data": [
+                {"id": event_id, "magnitude": 2.0, "depth": 10, "lat": 38.7, "lon": -9.1,
+                 "time": f"2025-10-0{event_id}T10:00:00"}
+                for event_id in event_ids
+            ]}
+            return Mock(status_code=200, json=lambda: payload, raise_for_status=lambda: None)
+
+        ipma_service.get_seismic_data.cache_clear()
+        with patch.dict('os.environ', {"SEISMIC_CATALOG_PATH": str(tmp_path / "seismic.sqlite3")}):
+            mock_get.return_value = feed(1)
+            ipma_service.get_seismic_data("continente")
+            ipma_service.get_seismic_data("continente")  # em cache, sem nova ingestão
+            assert len(ipma_service.seismic_catalog) == 1
+
+            # O IPMA deixou de publicar o evento 1, mas o catálogo mantém-no
+            ipma_service.get_seismic_data.cache_clear()
+            mock_get.return_value = feed(2)
+            ipma_service.get_seismic_data("continente")
+            assert mock_get.call_count == 2
+
+            # O histórico só consulta o catálogo
+            assert [e.id for e in ipma_service.get_seismic_history("continente")] == ["2", "1"]
+            assert mock_get.call_count == 2
+        ipma_service.get_seismic_data.cache_clear()
+
+    def test_get_seismic_stats(self, ipma_service):
+        def event(event_id, magnitude, depth, time):
+            return SeismicData(id=event_id, magnitude=magnitude, depth=depth, location="", time=time,
+                               coordinates={"latitude": 38.0, "longitude": -9.0})
+
+        events = [
+            event("1", 1.0, 2.0, "2025-10-01T01:00:00"),
+            event("2", 1.0, 7.5, "2025-10-01T05:00:00"),
+            event("3", 1.2, 12.0, "2025-10-02T03:00:00"),
+            event("4", 2.5, 4.0, "2025-10-03T03:00:00")
+        ]
+
+        with patch.object(ipma_service, 'get_seismic_data', return_value=events):
+            stats = ipma_service.get_seismic_stats("continente")
+
+            assert stats.total_events == 4
+            assert stats.max_magnitude == 2.5
+            assert [(b.magnitude, b.count, b.cumulative) for b in stats.magnitude_frequency] == [
+                (1.0, 2, 4), (1.2, 1, 2), (2.5, 1, 1)
+            ]
+            assert stats.completeness_magnitude == 1.0
+            assert stats.b_value is not None and stats.b_value > 0
+            assert [(d.date, d.count) for d in stats.daily_counts] == [
+                ("2025-10-01", 2), ("2025-10-02", 1), ("2025-10-03", 1)
+            ]
+            assert [(b.min_depth, b.count) for b in stats.depth_histogram] == [(0.0, 2), (5.0, 1), (10.0, 1)]
+
+            assert ipma_service.get_seismic_stats("continente") is stats
+
+    @patch('app.services.ipma_service.requests.Session.get')
+    def test_dataset_version_ignores_failed_fetch(self, mock_get, ipma_service):
+        payload = {"data": [
+            {"idEstacao": station_id, "nomeEstacao": station_id, "time": "2025-10-04T10:00:00", "temperatura": 20.0}
+            for station_id in ("1", "2", "3")
+        ]}
+        ok = Mock(status_code=200, json=lambda: payload, raise_for_status=lambda: None)
+
+        def refresh():
+            ipma_service.get_station_observations.cache_clear()
+            return ipma_service.get_station_observations()
+
+        mock_get.return_value = ok
+        version = ipma_service.track_dataset_version("observations", refresh())
+
+        # Falha do IPMA entre duas renovações: não é um conjunto vazio
+        mock_get.side_effect = ConnectionError("IPMA indisponível")
+        failed = refresh()
+        assert failed == []
+        changes = ipma_service.get_dataset_changes("observations", version, failed).data
+        assert changes.version == version
+        assert (changes.inserted, changes.updated, changes.removed) == ([], [], [])
+
+        mock_get.side_effect = None
+        changes = ipma_service.get_dataset_changes("observations", version, refresh()).data
+        assert changes.version == version
+        assert (changes.inserted, changes.removed) == ([], [])
+        ipma_service.get_station_observations.cache_clear()
+
+    def test_get_location_bundle(self, ipma_service, mock_forecast_response):
+        mock_locations = {
+            "faro": [Location(id=1080800, name="Lagos", district="Faro", warning_area="FAR")]
+        }
+
+        def warning(area, end_time, start_time="2025-10-04T00:00:00"):
+            return WeatherWarning(id=area, area=area, warning_type="Agitação Marítima", level="amarelo",
+                                  start_time=start_time, end_time=end_time,
+                                  description="", phenomenon="")
+
+        # Em vigor, terminado, ainda não iniciado e de outra área
+        warnings = [warning("FAR", "2099-01-01T00:00:00"), warning("FAR", "2000-01-01T00:00:00"),
+                    warning("FAR", "2099-01-02T00:00:00", start_time="2099-01-01T12:00:00"),
+                    warning("LSB", "2099-01-01T00:00:00")]
+        fire_risks = [
+            FireRisk(date="2025-10-04", location="Lagos", risk_level=4, risk_description="Muito Elevado"),
+            FireRisk(date="2025-10-04", location="Faro", risk_level=3, risk_description="Elevado")
+        ]
+        uv_indices = [UVIndex(date="2025-10-04", location="Lagos", uv_index=6, uv_level="Alto")]
+        sea_states = [SeaState(date="2025-10-04", location="Lagos", wave_height=1.5),
+                      SeaState(date="2025-10-05", location="Lagos", wave_height=2.0)]
+
+        with patch.object(ipma_service, 'get_districts_and_locations', return_value=mock_locations), \
+                patch.object(ipma_service, 'get_forecast', return_value=mock_forecast_response), \
+                patch.object(ipma_service, 'get_weather_conditions', return_value={1: "Céu limpo"}), \
+                patch.object(ipma_service, 'get_weather_warnings', return_value=warnings), \
+                patch.object(ipma_service, 'get_fire_risk', return_value=fire_risks), \
+                patch.object(ipma_service, 'get_uv_index', return_value=uv_indices), \
+                patch.object(ipma_service, 'get_sea_state', return_value=sea_states):
+            bundle = ipma_service.get_location_bundle("faro", "lagos", "2025-10-04")
+
+            assert bundle.location.id == 1080800
+            assert bundle.forecast.hourly_forecasts[0].temperature == 22.5
+            assert bundle.warnings == [warnings[0]]
+            assert bundle.fire_risk == [fire_risks[0]]
+            assert bundle.uv_index == uv_indices
+            assert bundle.sea_state == [sea_states[0]]
+
+            assert ipma_service.get_location_bundle("faro", "inexistente") is None
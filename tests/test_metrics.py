@@ -0,0 +1,77 @@
+import pytest
+from unittest.mock import Mock, patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.middleware.metrics import route_template
+from app.models import SeismicData
+from app.services.metrics import (
+    Counter, Histogram, MeteredSession, UPSTREAM_LATENCY, UPSTREAM_RESPONSE_SIZE, upstream_endpoint
+)
+
+client = TestClient(app)
+
+
+class TestMetrics:
+
+    def test_histogram_render(self):
+        histogram = Histogram("test_duration_seconds", "Duração de teste", ["parser"], buckets=(0.1, 1.0))
+        histogram.observe(0.05, parser="csv")
+        histogram.observe(0.5, parser="csv")
+        histogram.observe(3, parser="csv")
+
+        lines = histogram.render().splitlines()
+        assert lines[:2] == ["# HELP test_duration_seconds Duração de teste", "# TYPE test_duration_seconds histogram"]
+        assert 'test_duration_seconds_bucket{parser="csv",le="0.1"} 1' in lines
+        assert 'test_duration_seconds_bucket{parser="csv",le="1"} 2' in lines
+        assert 'test_duration_seconds_bucket{parser="csv",le="+Inf"} 3' in lines
+        assert 'test_duration_seconds_sum{parser="csv"} 3.55' in lines
+        assert 'test_duration_seconds_count{parser="csv"} 3' in lines
+
+    def test_labels_are_validated_and_escaped(self):
+        counter = Counter("test_total", "Contador de teste", ["route"])
+        counter.inc(route='/a"b')
+        assert 'test_total{route="/a\\"b"} 1' in counter.render()
+
+        with pytest.raises(ValueError):
+            counter.inc(path="/a")
+
+    def test_upstream_endpoint(self):
+        base = "https://api.ipma.pt/open-data"
+        assert upstream_endpoint(f"{base}/forecast/meteorology/cities/daily/1110600.json", base) == \
+            "/forecast/meteorology/cities/daily/{id}.json"
+        assert upstream_endpoint(f"{base}/earthquake/hp2.json", base) == "/earthquake/hp2.json"
+
+    def test_route_template(self):
+        assert route_template("/forecast/lisboa/lisboa", {"distrito": "lisboa", "localidade": "lisboa"}) == \
+            "/forecast/{distrito}/{localidade}"
+        assert route_template("/seismic/magnitude/3.0", {"min_magnitude": 3.0}) == "/seismic/magnitude/{min_magnitude}"
+
+    @patch("requests.Session.request")
+    def test_metered_session(self, mock_request):
+        mock_request.return_value = Mock(status_code=200, content=b"x" * 2048)
+        endpoint = "/observation/meteorology/stations/observations.json"
+        before = UPSTREAM_LATENCY.count(endpoint=endpoint, status="200")
+
+        session = MeteredSession("https://api.ipma.pt/open-data")
+        session.get(f"https://api.ipma.pt/open-data{endpoint}")
+
+        assert UPSTREAM_LATENCY.count(endpoint=endpoint, status="200") == before + 1
+        assert UPSTREAM_RESPONSE_SIZE.count(endpoint=endpoint) >= 1
+
+    @patch('app.routers.seismic.ipma_service.get_seismic_data')
+    def test_metrics_endpoint(self, mock_get_seismic):
+        mock_get_seismic.return_value = [
+            SeismicData(id="1", magnitude=3.4, depth=12.0, location="Algarve", time="2025-10-03T08:30:00",
+                        coordinates={"latitude": 37.0, "longitude": -8.0})
+        ]
+        client.get("/seismic/magnitude/3")
+
+        response = client.get("/metrics")
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/plain")
+
+        body = response.text
+        assert 'http_request_duration_seconds_count{method="GET",route="/seismic/magnitude/{min_magnitude}",status="200"}' in body
+        assert 'http_requests_in_flight{group="seismic"} 0' in body
+        assert "# TYPE ipma_cache_requests_total counter" in body
+        assert 'ipma_cache_entries{dataset="forecasts"}' in body
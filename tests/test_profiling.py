@@ -0,0 +1,106 @@
+import json
+from unittest.mock import patch
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from app.main import app
+from app.middleware.profiling import ProfilingMiddleware
+from app.models import Location
+from app.services import profiling
+from app.services.profiling import ProfileStore, RequestProfiler, stage_breakdown, stats_report
+
+client = TestClient(app)
+
+
+def _profiled_app(store: ProfileStore, **options) -> TestClient:
+    demo = FastAPI()
+
+    @demo.get("/demo")
+    async def demo_endpoint():
+        payload = json.loads(json.dumps([{"id": i, "name": f"Local {i}", "district": "Faro"} for i in range(200)]))
+        return [Location(**item) for item in payload]
+
+    demo.add_middleware(ProfilingMiddleware, store=store, **options)
+    return TestClient(demo)
+
+
+class TestProfiling:
+
+    def test_stage_breakdown_counts_nested_calls_once(self):
+        outer = ("/site-packages/fastapi/routing.py", 1, "serialize_response")
+        inner = ("/site-packages/fastapi/encoders.py", 1, "jsonable_encoder")
+        loads = ("/usr/lib/python3.11/json/__init__.py", 1, "loads")
+        endpoint = ("app/routers/demo.py", 1, "endpoint")
+
+        stats = {
+            outer: (1, 1, 0.001, 0.030, {endpoint: (1, 1, 0.001, 0.030)}),
+            inner: (1, 1, 0.020, 0.020, {outer: (1, 1, 0.020, 0.020)}),
+            loads: (1, 1, 0.010, 0.010, {endpoint: (1, 1, 0.010, 0.010)})
+        }
+
+        breakdown = stage_breakdown(stats, 0.100)
+        assert breakdown["serialization"] == 30.0
+        assert breakdown["json_decode"] == 10.0
+        assert breakdown["upstream"] == 0.0
+        assert breakdown["other"] == 60.0
+
+    def test_requested_profile_returned_in_headers(self):
+        store = ProfileStore(output_dir=None)
+        demo = _profiled_app(store, token="segredo", sample_rate=0)
+
+        response = demo.get("/demo")
+        assert response.status_code == 200
+        assert "x-profile-id" not in response.headers
+        assert store.list() == []
+
+        response = demo.get("/demo", headers={"X-Profile": "segredo"})
+        assert response.status_code == 200
+        assert len(response.json()) == 200
+
+        profile = store.get(response.headers["x-profile-id"])
+        assert profile is not None and not profile.sampled
+        assert profile.breakdown["json_decode"] > 0
+        assert profile.breakdown["model_build"] > 0
+        assert "model_build;dur=" in response.headers["server-timing"]
+        assert "function calls" in stats_report(profile)
+
+        assert "x-profile-id" not in demo.get("/demo", headers={"X-Profile": "errado"}).headers
+        # O token na query não é aceite (ficaria nos logs de acesso)
+        assert "x-profile-id" not in demo.get("/demo?profile=segredo").headers
+
+    def test_sampled_profile_stored_without_headers(self, tmp_path):
+        store = ProfileStore(output_dir=str(tmp_path))
+        demo = _profiled_app(store, token="", sample_rate=1.0)
+
+        response = demo.get("/demo")
+        assert "x-profile-id" not in response.headers
+
+        [profile] = store.list()
+        assert profile.sampled and profile.path == "/demo"
+        assert (tmp_path / f"{profile.id}.prof").exists()
+
+    def test_admin_profiles(self):
+        assert RequestProfiler.acquire()
+        profiler = RequestProfiler()
+        profiler.start()
+        json.loads('{"a": 1}')
+        profile = profiler.stop("GET", "/stations/observations/latest", 200, sampled=True)
+        profiling.PROFILE_STORE.add(profile)
+
+        with patch.object(profiling, "PROFILING_TOKEN", None):
+            assert client.get("/admin/profiles").status_code == 404
+
+        with patch.object(profiling, "PROFILING_TOKEN", "segredo"):
+            assert client.get("/admin/profiles").status_code == 403
+
+            response = client.get("/admin/profiles?path=/stations", headers={"X-Profile": "segredo"})
+            assert response.status_code == 200
+            assert profile.id in [item["id"] for item in response.json()["data"]]
+
+            response = client.get(f"/admin/profiles/{profile.id}?sort=tottime", headers={"X-Profile": "segredo"})
+            assert response.status_code == 200
+            assert "function calls" in response.json()["data"]["report"]
+
+            response = client.get(f"/admin/profiles/{profile.id}/pstats", headers={"X-Profile": "segredo"})
+            assert response.content == profile.stats
+            assert client.get("/admin/profiles/inexistente", headers={"X-Profile": "segredo"}).status_code == 404
+            assert client.get(f"/admin/profiles/{profile.id}?profile=segredo").status_code == 403
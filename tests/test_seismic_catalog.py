@@ -0,0 +1,51 @@
+import pytest
+from datetime import datetime
+from app.models import SeismicData
+from app.services.seismic_catalog import SeismicCatalog
+
+
+def make_event(event_id, magnitude, time, region="continente"):
+    return SeismicData(
+        id=event_id,
+        magnitude=magnitude,
+        depth=8.0,
+        location="Teste",
+        time=time,
+        coordinates={"latitude": 38.7, "longitude": -9.1},
+        region=region
+    )
+
+
+class TestSeismicCatalog:
+
+    @pytest.fixture
+    def catalog_path(self, tmp_path):
+        return str(tmp_path / "catalog" / "seismic.sqlite3")
+
+    def test_ingest_only_new_events(self, catalog_path):
+        catalog = SeismicCatalog(catalog_path)
+
+        assert catalog.ingest([make_event("1", 2.0, "2025-08-01T10:00:00"), make_event("2", 3.0, "2025-09-15T10:00:00")]) == 2
+        assert catalog.ingest([make_event("2", 3.0, "2025-09-15T10:00:00"), make_event("3", 1.5, "2025-10-01T10:00:00")]) == 1
+        assert len(catalog) == 3
+
+    def test_catalog_persists_between_instances(self, catalog_path):
+        SeismicCatalog(catalog_path).ingest([make_event("1", 2.0, "2025-08-01T10:00:00")])
+
+        reopened = SeismicCatalog(catalog_path)
+        assert len(reopened) == 1
+        assert reopened.ingest([make_event("1", 2.0, "2025-08-01T10:00:00")]) == 0
+
+    def test_query(self, catalog_path):
+        catalog = SeismicCatalog(catalog_path)
+        catalog.ingest([
+            make_event("1", 2.0, "2025-08-01T10:00:00"),
+            make_event("2", 3.0, "2025-09-15T10:00:00Z"),
+            make_event("3", 1.5, "2025-10-01T10:00:00", region="acores")
+        ])
+
+        assert [e.id for e in catalog.query()] == ["3", "2", "1"]
+        assert [e.id for e in catalog.query(region="continente")] == ["2", "1"]
+        assert [e.id for e in catalog.query(since=datetime(2025, 9, 1), until=datetime(2025, 9, 30))] == ["2"]
+        assert [e.id for e in catalog.query(min_magnitude=2.0, limit=1)] == ["2"]
+        assert catalog.query(region="acores")[0].region == "acores"
@@ -0,0 +1,103 @@
+import random
+import pytest
+from app.services.spatial import (
+    KDTree, PolygonIndex, SpatialIndex, geometry_bounds, haversine_km, parse_bbox, point_in_polygon
+)
+
+
+class TestSpatialIndex:
+
+    @pytest.fixture
+    def points(self):
+        rng = random.Random(42)
+        return [(rng.uniform(32.0, 42.5), rng.uniform(-31.5, -6.0)) for _ in range(300)]
+
+    @pytest.fixture
+    def index(self, points):
+        return SpatialIndex(points, lambda point: point)
+
+    def test_haversine_km(self):
+        # Lisboa -> Porto
+        assert haversine_km(38.7223, -9.1393, 41.1579, -8.6291) == pytest.approx(274, abs=2)
+
+    def test_nearest_matches_linear_scan(self, index, points):
+        target = (38.72, -9.14)
+        expected = sorted(points, key=lambda point: haversine_km(*target, *point))[:5]
+
+        result = index.nearest(*target, k=5)
+
+        assert [point for point, _ in result] == expected
+        assert result[0][1] == pytest.approx(haversine_km(*target, *expected[0]))
+
+    def test_within_radius_matches_linear_scan(self, index, points):
+        target = (39.5, -8.0)
+        expected = {point for point in points if haversine_km(*target, *point) <= 150}
+
+        result = index.within_radius(*target, radius_km=150)
+
+        assert {point for point, _ in result} == expected
+        distances = [distance for _, distance in result]
+        assert distances == sorted(distances)
+
+    def test_within_bbox_matches_linear_scan(self, index, points):
+        expected = [point for point in points if 37 <= point[0] <= 40 and -9.5 <= point[1] <= -7]
+
+        assert index.within_bbox(37, -9.5, 40, -7) == expected
+
+    def test_items_without_coordinates_are_skipped(self):
+        index = SpatialIndex([(38.7, -9.1), None], lambda point: point)
+        assert len(index) == 1
+
+    def test_empty_tree(self):
+        assert KDTree([]).nearest((0.0, 0.0), 3) == []
+
+    def test_parse_bbox(self):
+        assert parse_bbox("-9.5,37,-7,40") == (37.0, -9.5, 40.0, -7.0)
+
+        with pytest.raises(ValueError):
+            parse_bbox("-9.5,37,-7")
+        with pytest.raises(ValueError):
+            parse_bbox("-7,37,-9.5,40")
+
+
+class TestPolygonIndex:
+
+    @staticmethod
+    def square(min_lon, min_lat, size, holes=()):
+        ring = [[min_lon, min_lat], [min_lon + size, min_lat], [min_lon + size, min_lat + size],
+                [min_lon, min_lat + size], [min_lon, min_lat]]
+        return {"type": "Polygon", "coordinates": [ring, *holes]}
+
+    def test_point_in_polygon_respects_holes(self):
+        hole = [[-8.8, 38.2], [-8.6, 38.2], [-8.6, 38.4], [-8.8, 38.4], [-8.8, 38.2]]
+        polygon = self.square(-9.0, 38.0, 0.6, holes=[hole])["coordinates"]
+
+        assert point_in_polygon(-8.9, 38.1, polygon)
+        assert not point_in_polygon(-8.7, 38.3, polygon)
+        assert not point_in_polygon(-8.0, 38.1, polygon)
+
+    def test_geometry_bounds(self):
+        assert geometry_bounds(self.square(-9.0, 38.0, 0.5)) == (38.0, -9.0, 38.5, -8.5)
+        assert geometry_bounds({"type": "Point", "coordinates": [-9.1, 38.7]}) == (38.7, -9.1, 38.7, -9.1)
+        assert geometry_bounds(None) is None
+
+    def test_containing_matches_linear_scan(self):
+        rng = random.Random(7)
+        zones = [
+            (name, self.square(rng.uniform(-10, -7), rng.uniform(37, 42), rng.uniform(0.05, 0.6)))
+            for name in range(200)
+        ]
+        multi = ("multi", {"type": "MultiPolygon", "coordinates": [
+            self.square(-9.0, 38.0, 0.1)["coordinates"], self.square(-8.0, 39.0, 0.1)["coordinates"]
+        ]})
+        index = PolygonIndex(zones + [multi, ("ponto", {"type": "Point", "coordinates": [-9, 38]})],
+                             lambda zone: zone[1])
+
+        assert len(index) == 201
+        for _ in range(200):
+            lat, lon = rng.uniform(37, 42.5), rng.uniform(-10, -6.5)
+            expected = [zone for zone in zones if point_in_polygon(lon, lat, zone[1]["coordinates"])]
+            assert [zone for zone in index.containing(lat, lon) if zone is not multi] == expected
+
+        assert multi in index.containing(39.05, -7.95)
+        assert multi not in index.containing(38.5, -8.5)
@@ -0,0 +1,156 @@
+import json
+import pytest
+from datetime import timedelta
+from unittest.mock import Mock, patch
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models import SeismicData
+from app.services import tracing
+from app.services.ipma_service import IPMAService
+from app.services.tracing import (
+    FileSpanExporter, LogSpanExporter, OTLPSpanExporter, SpanExporter, configure_tracing, exporter_from_env,
+    otlp_payload, span
+)
+
+client = TestClient(app)
+
+
+class MemoryExporter(SpanExporter):
+
+    def __init__(self):
+        self.traces = []
+
+    def export(self, spans):
+        self.traces.append(spans)
+
+    def spans(self):
+        return [span_ for trace in self.traces for span_ in trace]
+
+
+class TestTracing:
+
+    @pytest.fixture
+    def exporter(self):
+        exporter = MemoryExporter()
+        previous = configure_tracing(exporter)
+        yield exporter
+        configure_tracing(previous)
+
+    def test_disabled_by_default(self):
+        assert tracing.tracing_enabled() is False
+        with span("nada") as current:
+            current.set_attribute("a", 1)
+
+    def test_nested_spans_exported_with_root(self, exporter):
+        with span("raiz", pedido="x") as root:
+            with span("filho") as child:
+                child.set_attribute("resultado", "hit")
+            assert exporter.traces == []
+
+        [trace] = exporter.traces
+        assert [span_.name for span_ in trace] == ["filho", "raiz"]
+        assert trace[0].parent is root and trace[0].trace_id == root.trace_id
+        assert trace[0].attributes == {"resultado": "hit"}
+        assert root.last_child_end_ns == trace[0].end_ns
+
+    def test_error_recorded(self, exporter):
+        with pytest.raises(ValueError):
+            with span("falha"):
+                raise ValueError("inválido")
+
+        assert exporter.spans()[0].error == "ValueError: inválido"
+
+    def test_context_propagated_to_concurrent_fetches(self, exporter):
+        service = IPMAService()
+
+        def fetch(name):
+            with span("ipma.fetch", nome=name):
+                return name
+
+        with span("http.request") as root:
+            results = service._fetch_concurrently({key: (fetch, key) for key in ("a", "b", "c")})
+
+        assert results == {"a": "a", "b": "b", "c": "c"}
+        fetches = [span_ for span_ in exporter.spans() if span_.name == "ipma.fetch"]
+        assert len(fetches) == 3
+        assert all(span_.parent is root for span_ in fetches)
+
+    @patch("requests.Session.request")
+    def test_service_stages(self, mock_request, exporter):
+        payload = {"data": [{"id": 1, "magnitude": 2.5, "depth": 8, "lat": 38.7, "lon": -9.1, "time": "2025-10-03T08:30:00"}]}
+        mock_request.return_value = Mock(
+            status_code=200, content=json.dumps(payload).encode(), elapsed=timedelta(milliseconds=40),
+            json=lambda: payload, raise_for_status=lambda: None
+        )
+        service = IPMAService()
+        service.get_seismic_data.cache_clear()
+
+        with span("http.request"):
+            events = service.get_seismic_data("madeira")
+        assert len(events) == 1
+
+        spans = {span_.name: span_ for span_ in exporter.spans()}
+        assert spans["cache.get"].attributes["cache.result"] == "miss"
+        assert spans["ipma.fetch"].parent is spans["cache.get"]
+        assert spans["ipma.fetch"].attributes["ipma.endpoint"] == "/earthquake/hp2-madeira.json"
+        assert spans["ipma.fetch"].attributes["http.time_to_headers_ms"] == 40.0
+        assert spans["ipma.parse"].attributes["parser"] == "seismic"
+        assert spans["ipma.decode"].parent is spans["ipma.parse"]
+        service.get_seismic_data.cache_clear()
+
+    def test_file_exporter_and_otlp_payload(self, tmp_path):
+        path = tmp_path / "traces.jsonl"
+        memory = MemoryExporter()
+        previous = configure_tracing(memory)
+        try:
+            with span("raiz", kind=tracing.SPAN_KIND_SERVER, rota="/seismic/"):
+                with span("filho", bytes=10, ratio=0.5, hit=True):
+                    pass
+        finally:
+            configure_tracing(previous)
+
+        spans = memory.spans()
+        FileSpanExporter(str(path)).export(spans)
+        lines = [json.loads(line) for line in path.read_text().splitlines()]
+        assert [line["name"] for line in lines] == ["filho", "raiz"]
+        assert lines[0]["parent_id"] == lines[1]["span_id"]
+
+        payload = otlp_payload(spans, "weather_api_ipma")
+        [child, root] = payload["resourceSpans"][0]["scopeSpans"][0]["spans"]
+        assert root["kind"] == tracing.SPAN_KIND_SERVER and root["parentSpanId"] == ""
+        assert child["parentSpanId"] == root["spanId"]
+        assert {"key": "bytes", "value": {"intValue": "10"}} in child["attributes"]
+        assert {"key": "hit", "value": {"boolValue": True}} in child["attributes"]
+
+    def test_exporter_from_env(self, monkeypatch, tmp_path):
+        monkeypatch.setenv("TRACING_EXPORTER", "log")
+        assert isinstance(exporter_from_env(), LogSpanExporter)
+
+        monkeypatch.setenv("TRACING_EXPORTER", "file")
+        monkeypatch.setenv("TRACING_FILE", str(tmp_path / "spans.jsonl"))
+        assert exporter_from_env().path == str(tmp_path / "spans.jsonl")
+
+        monkeypatch.setenv("TRACING_EXPORTER", "otlp")
+        with patch("threading.Thread.start"):
+            assert isinstance(exporter_from_env(), OTLPSpanExporter)
+
+        monkeypatch.setenv("TRACING_EXPORTER", "none")
+        assert exporter_from_env() is None
+
+    @patch('app.routers.seismic.ipma_service.get_seismic_data')
+    def test_request_trace(self, mock_get_seismic, exporter):
+        mock_get_seismic.return_value = [
+            SeismicData(id="1", magnitude=3.4, depth=12.0, location="Algarve", time="2025-10-03T08:30:00",
+                        coordinates={"latitude": 37.0, "longitude": -8.0})
+        ]
+
+        response = client.get("/seismic/magnitude/3")
+        assert response.status_code == 200
+
+        spans = {span_.name: span_ for span_ in exporter.spans()}
+        assert {"http.request", "http.route", "endpoint", "response.encode"} <= set(spans)
+        assert response.headers["x-trace-id"] == spans["http.request"].trace_id
+        assert spans["http.request"].attributes["http.route"] == "/seismic/magnitude/{min_magnitude}"
+        assert spans["endpoint"].parent is spans["http.route"]
+        assert spans["response.encode"].start_ns == spans["endpoint"].end_ns
+        assert spans["response.encode"].attributes["response.bytes"] == len(response.content)
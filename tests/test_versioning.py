@@ -0,0 +1,51 @@
+from app.services.versioning import VersionedDataset
+
+
+def make_dataset(max_log=64):
+    return VersionedDataset("teste", key=lambda record: record["id"], max_log=max_log)
+
+
+class TestVersionedDataset:
+
+    def test_version_only_grows_with_changes(self):
+        dataset = make_dataset()
+
+        assert dataset.update([{"id": 1, "v": "a"}]) == 1
+        assert dataset.update([{"id": 1, "v": "a"}]) == 1
+        assert dataset.update([{"id": 1, "v": "b"}]) == 2
+
+    def test_changes_since(self):
+        dataset = make_dataset()
+        dataset.update([{"id": 1, "v": "a"}, {"id": 2, "v": "a"}])                   # v1
+        dataset.update([{"id": 1, "v": "b"}, {"id": 2, "v": "a"}, {"id": 3, "v": "a"}])  # v2
+        dataset.update([{"id": 1, "v": "b"}, {"id": 3, "v": "a"}, {"id": 4, "v": "a"}])  # v3
+
+        assert dataset.changes_since(3) == {"inserted": [], "updated": [], "removed": []}
+        assert dataset.changes_since(2) == {
+            "inserted": [{"id": 4, "v": "a"}], "updated": [], "removed": [{"id": 2, "v": "a"}]
+        }
+        assert dataset.changes_since(1) == {
+            "inserted": [{"id": 3, "v": "a"}, {"id": 4, "v": "a"}],
+            "updated": [{"id": 1, "v": "b"}],
+            "removed": [{"id": 2, "v": "a"}]
+        }
+        assert len(dataset.changes_since(0)["inserted"]) == 3
+
+    def test_inserted_then_removed_is_omitted(self):
+        dataset = make_dataset()
+        dataset.update([{"id": 1}])
+        dataset.update([{"id": 1}, {"id": 2}])
+        dataset.update([{"id": 1}])
+
+        assert dataset.changes_since(1) == {"inserted": [], "updated": [], "removed": []}
+
+    def test_client_too_far_behind_needs_snapshot(self):
+        dataset = make_dataset(max_log=2)
+        for value in range(5):
+            dataset.update([{"id": 1, "v": value}])
+
+        assert dataset.version == 5
+        assert dataset.changes_since(1) is None
+        assert dataset.changes_since(3) is not None
+        assert dataset.changes_since(9) is None
+        assert dataset.snapshot() == [{"id": 1, "v": 4}]
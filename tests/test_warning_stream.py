@@ -0,0 +1,165 @@
+import asyncio
+import pytest
+from datetime import datetime
+from unittest.mock import patch
+from app.models import WeatherWarning
+from app.routers import warnings as warnings_router
+from app.services.ipma_service import IPMAService
+from app.services.versioning import UnavailableRecords
+from app.services.warning_stream import WarningBroadcaster
+
+
+def make_warning(area, level, end_time="2099-10-04T18:00:00"):
+    return WeatherWarning(
+        id=area,
+        area=area,
+        warning_type="Vento",
+        level=level,
+        start_time="2025-10-04T06:00:00",
+        end_time=end_time,
+        description="",
+        phenomenon=""
+    )
+
+
+class TestWarningBroadcaster:
+
+    @pytest.fixture
+    def broadcaster(self):
+        service = IPMAService()
+        warnings = [make_warning("LSB", "amarelo"), make_warning("PTO", "amarelo")]
+        with patch.object(service, 'get_weather_warnings', return_value=warnings):
+            yield WarningBroadcaster(service, interval=3600)
+
+    @staticmethod
+    def version_of(broadcaster, warnings):
+        return broadcaster.service.track_dataset_version("warnings", warnings)
+
+    def test_snapshot(self, broadcaster):
+        snapshot = asyncio.run(broadcaster.snapshot())
+        assert snapshot["type"] == "snapshot"
+        assert {w["id"] for w in snapshot["warnings"]} == {"LSB", "PTO"}
+        assert snapshot["version"] == self.version_of(broadcaster, broadcaster.service.get_weather_warnings())
+
+    def test_apply_reports_only_differences(self, broadcaster):
+        now = datetime(2025, 10, 4, 12)
+        asyncio.run(broadcaster.snapshot())
+
+        same = [make_warning("LSB", "amarelo"), make_warning("PTO", "amarelo")]
+        assert broadcaster.apply(same, self.version_of(broadcaster, same), now) is None
+
+        warnings = [make_warning("LSB", "laranja"), make_warning("FAR", "amarelo")]
+        event = broadcaster.apply(warnings, self.version_of(broadcaster, warnings), now)
+        assert event["type"] == "changes"
+        # A versão do evento é a do conjunto versionado (GET /warnings/?since_version=)
+        assert event["version"] == 2
+        changes = broadcaster.service._versioned["warnings"].changes_since(1)
+        assert [w.id for w in changes["inserted"]] == ["FAR"]
+        assert [w["id"] for w in event["added"]] == ["FAR"]
+        assert [w["level"] for w in event["updated"]] == ["laranja"]
+        assert [w["id"] for w in event["expired"]] == ["PTO"]
+
+        # Uma lista obtida antes da versão já integrada é ignorada
+        assert broadcaster.apply(same, 1, now) is None
+        assert broadcaster.version == 2
+
+    def test_apply_expires_finished_warnings(self, broadcaster):
+        asyncio.run(broadcaster.snapshot())
+
+        warnings = [make_warning("LSB", "amarelo"), make_warning("PTO", "amarelo")]
+        event = broadcaster.apply(warnings, self.version_of(broadcaster, warnings), datetime(2099, 10, 4, 19))
+        assert {w["id"] for w in event["expired"]} == {"LSB", "PTO"}
+
+    def test_snapshot_integrates_newer_version(self, broadcaster):
+        async def scenario():
+            service = broadcaster.service
+            service.get_weather_warnings.return_value = [make_warning("LSB", "amarelo")]
+            first = broadcaster.subscribe()
+            await broadcaster.snapshot(first)
+
+            # A cache foi renovada entre difusões: o snapshot de outro cliente traz PTO
+            service.get_weather_warnings.return_value = [make_warning("LSB", "amarelo"), make_warning("PTO", "amarelo")]
+            second = broadcaster.subscribe()
+            snapshot = await broadcaster.snapshot(second)
+            assert {w["id"] for w in snapshot["warnings"]} == {"LSB", "PTO"}
+            assert second.empty()
+            assert [w["id"] for w in first.get_nowait()["added"]] == ["PTO"]
+
+            # Nova renovação sem PTO: ambos os clientes recebem a expiração
+            warnings = [make_warning("LSB", "amarelo")]
+            event = broadcaster.apply(warnings, self.version_of(broadcaster, warnings))
+            assert [w["id"] for w in event["expired"]] == ["PTO"]
+
+            broadcaster.unsubscribe(first)
+            broadcaster.unsubscribe(second)
+
+        asyncio.run(scenario())
+
+    def test_failed_refresh_not_published(self, broadcaster):
+        async def scenario():
+            await broadcaster.snapshot()
+            version = broadcaster.version
+            broadcaster.interval = 0
+            with patch.object(broadcaster.service, 'refresh_weather_warnings',
+                              return_value=UnavailableRecords()) as refresh:
+                queue = broadcaster.subscribe()
+                await asyncio.sleep(0.05)
+                broadcaster.unsubscribe(queue)
+            return queue, version, refresh
+
+        queue, version, refresh = asyncio.run(scenario())
+        assert refresh.called
+        assert queue.empty()
+        assert broadcaster.version == version
+        assert {key[0] for key in broadcaster._live} == {"LSB", "PTO"}
+
+    def test_slow_subscriber_resynchronized_with_snapshot(self, broadcaster):
+        async def scenario():
+            await broadcaster.snapshot()
+            queue = broadcaster.subscribe()
+            for version in range(queue.maxsize + 1):
+                broadcaster.publish({"type": "changes", "version": version})
+            broadcaster.unsubscribe(queue)
+            return queue
+
+        queue = asyncio.run(scenario())
+        assert queue.qsize() == 1
+        event = queue.get_nowait()
+        assert event["type"] == "snapshot" and event["version"] == broadcaster.version
+        assert {w["id"] for w in event["warnings"]} == {"LSB", "PTO"}
+
+    def test_stream_subscribes_before_snapshot(self):
+        class Request:
+            checks = 0
+
+            async def is_disconnected(self):
+                self.checks += 1
+                return self.checks > 1
+
+        broadcaster = warnings_router.broadcaster
+        original_snapshot = broadcaster.snapshot
+
+        async def snapshot_with_broadcast(queue):
+            # Difusões à volta do snapshot: a anterior já está incluída nele, a seguinte não
+            broadcaster.publish({"type": "changes", "version": 0})
+            snapshot = await original_snapshot(queue)
+            broadcaster.publish({"type": "changes", "version": snapshot["version"] + 1, "added": []})
+            return snapshot
+
+        async def read_stream():
+            response = await warnings_router.stream_warnings(Request())
+            return [chunk async for chunk in response.body_iterator]
+
+        with patch.object(warnings_router.ipma_service, 'get_weather_warnings',
+                          return_value=[make_warning("LSB", "amarelo")]), \
+                patch.object(broadcaster, 'snapshot', snapshot_with_broadcast):
+            chunks = asyncio.run(read_stream())
+            version = warnings_router.ipma_service.track_dataset_version(
+                "warnings", warnings_router.ipma_service.get_weather_warnings()
+            )
+
+        assert [chunk.split("\n")[:2] for chunk in chunks] == [
+            ["event: snapshot", f"id: {version}"],
+            ["event: changes", f"id: {version + 1}"]
+        ]
+        assert not broadcaster._subscribers